@@ -4,6 +4,8 @@ from agents.relevant_bdi import RelevantBDIAgent
 from agents.knowledge_bdi import KnowledgeAggregatorBDIAgent
 from agents.analysis import AnalysisAgent
 from agents.synthesis import SynthesisAgent
+from agents.launcher import LauncherAgent, shutdown_agents
+from agents.mesh import AgentMesh
 
 __all__ = [
     "QueryConstructionBDIAgent",
@@ -12,4 +14,7 @@ __all__ = [
     "KnowledgeAggregatorBDIAgent",
     "AnalysisAgent",
     "SynthesisAgent",
+    "LauncherAgent",
+    "shutdown_agents",
+    "AgentMesh",
 ]
\ No newline at end of file
@@ -1,105 +1,161 @@
 import json
 import os
-import requests
+import time
 from datetime import datetime
 from pathlib import Path
 import asyncio
 from services.gemini import GeminiLLMService
+from services.http_client import PooledHTTPMixin
+from agents.transport import TransportMixin
 
 from spade.agent import Agent
-from spade.behaviour import OneShotBehaviour
 from spade.template import Template
 
+from agents.launcher import report_failure
+from agents.worker import QueueWorkerMixin, wait_for_capacity
+from utils.chunking import chunk_markdown
+from utils.concurrency import loop_semaphore
+from utils.events import EventType, event_bus
 from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 from spade.message import Message
 
 
-async def analyze_paper(content: str, research_question: str) -> dict:
-    """
-    Analyze a paper's content using Gemini LLM to extract methodology, findings, and future work.
-    """
-    api_key = CONFIG.get("gemini_api_key")
-    if not api_key:
-        logger.error("GEMINI_API_KEY not found in config.")
-        return {"methodology": "", "findings": "", "future_work": ""}
+EMPTY_ANALYSIS = {"methodology": "", "findings": "", "future_work": ""}
 
-    gemini = GeminiLLMService(api_key)
+def _get_chunk_semaphore() -> asyncio.Semaphore:
+    """Chunk-level calls from every paper share one limit"""
+    return loop_semaphore("analysis_chunks", CONFIG["analysis_chunk_concurrency"])
 
-    prompt = (
-        "You are an expert researcher in this field. "
-        "Given the following research paper content, extract the following as a JSON object: "
-        "1. Methodology\n2. Findings\n3. Future work (leave as an empty string if the paper does not mention any future work).\n"
-        f"Research Question: {research_question}\n"
-        f"Paper Content:\n{content[:5000]}\n"  # Limit content to avoid token limits
-        "Return a JSON object with keys: methodology, findings, future_work. "
-        "Be concise, comprehensive and accurate."
-    )
 
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "methodology": {"type": "STRING"},
+        "findings": {"type": "STRING"},
+        "future_work": {"type": "STRING"}
+    },
+    "required": ["methodology", "findings", "future_work"],
+    "propertyOrdering": ["methodology", "findings", "future_work"]
+}
+
+
+async def _request_analysis(gemini: GeminiLLMService, prompt: str, max_output_tokens: int = 512,
+                            name: str = "analysis") -> dict:
+    """Send an analysis prompt and return the validated methodology/findings/future_work object"""
     generation_config = {
         "temperature": 0.3,
-        "maxOutputTokens": 512,
+        "maxOutputTokens": max_output_tokens,
         "topP": 0.9,
         "topK": 40
     }
     try:
         logger.info(f"Calling Gemini API for paper analysis")
-        response = await gemini.generate_content(prompt, generation_config)
+        result = await gemini.generate_structured(prompt, ANALYSIS_SCHEMA, name, generation_config)
         logger.info(f"Received response from Gemini API for paper analysis")
-        
-        # Try to parse JSON from response
-        try:
-            # Look for JSON in the response
-            import re
-            json_match = re.search(r'```json\s*(.*?)```', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group(1))
-            else:
-                # Try direct JSON parsing
-                try:
-                    result = json.loads(response)
-                except:
-                    # Last resort - try to extract anything between { and }
-                    start_idx = response.find('{')
-                    end_idx = response.rfind('}') + 1
-                    if start_idx >= 0 and end_idx > 0:
-                        json_str = response[start_idx:end_idx]
-                        result = json.loads(json_str)
-                    else:
-                        raise Exception("No JSON found in response")
-            
-            return {
-                "methodology": result.get("methodology", ""),
-                "findings": result.get("findings", ""),
-                "future_work": result.get("future_work", "")
-            }
-        except Exception as e:
-            logger.warning(f"Failed to parse Gemini response as JSON: {e}")
+        if result is None:
             return {
-                "methodology": "Failed to parse response: " + str(e),
-                "findings": "Raw response from API: " + response[:100] + "...",
+                "methodology": "Failed to parse response: no valid JSON after repair",
+                "findings": "",
                 "future_work": ""
             }
+        return {
+            "methodology": result.get("methodology", ""),
+            "findings": result.get("findings", ""),
+            "future_work": result.get("future_work", "")
+        }
     except Exception as e:
         logger.error(f"Error calling Gemini: {e}")
         return {"methodology": "", "findings": "", "future_work": "Error: " + str(e)}
 
 
-class AnalysisAgent(Agent):
+async def analyze_paper(content: str, research_question: str) -> dict:
     """
-    Receives folder path and research question from KnowledgeAgent, analyzes each paper using Gemini,
-    and sends results to SummarizationAgent.
+    Analyze a paper's content using Gemini LLM to extract methodology, findings, and future work.
+    In "chunked" mode long papers are split into section-aware chunks that are analyzed in
+    parallel (map) and merged by a final call (reduce); "truncated" mode only sends the
+    first 5000 characters.
     """
+    api_key = CONFIG.get("gemini_api_key")
+    if not api_key:
+        logger.error("GEMINI_API_KEY not found in config.")
+        return dict(EMPTY_ANALYSIS)
+
+    gemini = GeminiLLMService(api_key)
+
+    if CONFIG["analysis_mode"] == "chunked":
+        chunks = chunk_markdown(content, CONFIG["analysis_chunk_tokens"], CONFIG["analysis_token_budget"])
+    else:
+        chunks = [content[:5000]]  # Limit content to avoid token limits
+
+    if len(chunks) <= 1:
+        prompt = (
+            "You are an expert researcher in this field. "
+            "Given the following research paper content, extract the following as a JSON object: "
+            "1. Methodology\n2. Findings\n3. Future work (leave as an empty string if the paper does not mention any future work).\n"
+            f"Research Question: {research_question}\n"
+            f"Paper Content:\n{chunks[0] if chunks else ''}\n"
+            "Return a JSON object with keys: methodology, findings, future_work. "
+            "Be concise, comprehensive and accurate."
+        )
+        return await _request_analysis(gemini, prompt)
 
-    class AnalyzePapersBehaviour(OneShotBehaviour):
-        async def run(self):
-            msg = await self.receive(timeout=CONFIG["timeout"])
-            if not msg:
-                logger.warning("AnalysisAgent timeout - no message received")
-                return
+    logger.info(f"Analyzing paper in {len(chunks)} chunks")
+    partials = await asyncio.gather(*(
+        _analyze_chunk(gemini, chunk, index, len(chunks), research_question)
+        for index, chunk in enumerate(chunks)
+    ))
+    # Drop excerpts that produced nothing usable before reducing
+    partials = [
+        p for p in partials
+        if any(p.get(key) for key in EMPTY_ANALYSIS)
+        and not p["methodology"].startswith("Failed to parse response")
+        and not p["future_work"].startswith("Error: ")
+    ]
+    if not partials:
+        return dict(EMPTY_ANALYSIS)
 
+    prompt = (
+        "You are an expert researcher in this field. "
+        "The following JSON list holds partial analyses, each extracted from one excerpt of the same research paper. "
+        "Merge them into a single analysis of the whole paper, removing repetition and keeping every distinct point.\n"
+        f"Research Question: {research_question}\n"
+        f"Partial Analyses:\n{json.dumps(partials, separators=(',', ':'))}\n"
+        "Return a JSON object with keys: methodology, findings, future_work "
+        "(future_work is an empty string if no excerpt mentions any future work). "
+        "Be concise, comprehensive and accurate."
+    )
+    return await _request_analysis(gemini, prompt, max_output_tokens=1024, name="analysis_reduce")
+
+
+async def _analyze_chunk(gemini: GeminiLLMService, chunk: str, index: int, total: int, research_question: str) -> dict:
+    """Map step: extract whatever methodology, findings and future work one excerpt contains"""
+    prompt = (
+        "You are an expert researcher in this field. "
+        f"The following is excerpt {index + 1} of {total} of a research paper. "
+        "Extract, as a JSON object, only what this excerpt states about: "
+        "1. Methodology\n2. Findings\n3. Future work\n"
+        "Use an empty string for anything the excerpt does not cover.\n"
+        f"Research Question: {research_question}\n"
+        f"Excerpt:\n{chunk}\n"
+        "Return a JSON object with keys: methodology, findings, future_work. Be concise and accurate."
+    )
+    async with _get_chunk_semaphore():
+        return await _request_analysis(gemini, prompt, max_output_tokens=384, name="analysis_chunk")
+
+
+class AnalysisAgent(QueueWorkerMixin, TransportMixin, PooledHTTPMixin, Agent):
+    """
+    Receives folder path and research question from KnowledgeAgent, analyzes each paper using Gemini,
+    and sends results to SummarizationAgent. Requests wait in a bounded queue and are served
+    by a configurable number of workers.
+    """
+
+    class AnalyzePapersBehaviour(QueueWorkerMixin.WorkerBehaviour):
+        async def process(self, msg):
             logger.info("AnalysisAgent received message")
+            run_id = msg.thread
             try:
                 data = json.loads(msg.body)
                 folder_path = data["folder_path"]
@@ -111,6 +167,9 @@ class AnalysisAgent(Agent):
                         research_data = json.load(f)
                 else:
                     logger.error(f"Research JSON not found at {research_json}")
+                    await report_failure(
+                        self, "analysis", f"research JSON not found at {research_json}", run_id=run_id
+                    )
                     return
 
                 # Find all markdown files in the folder
@@ -125,83 +184,117 @@ class AnalysisAgent(Agent):
                     with open(results_path, "w", encoding="utf-8") as f:
                         json.dump(results, f, indent=2)
                     logger.info(f"Saved empty analysis results to {results_path}")
+                    event_bus.publish(
+                        EventType.ANALYSIS_DONE, run_id=run_id, folder_path=folder_path, results_path=results_path, papers=0
+                    )
                     
                     # Continue with the pipeline
                     synthesis_agent_id = "synthesis_agent@localhost"
-                    out_msg = Message(to=synthesis_agent_id)
+                    out_msg = Message(to=synthesis_agent_id, thread=run_id)
                     out_msg.set_metadata("type", MessageType.ANALYSIS_READY)
                     out_msg.body = json.dumps({
                         "folder_path": folder_path,
                         "results_path": results_path,
                         "research_question": research_question,
                     })
+                    await wait_for_capacity(synthesis_agent_id)
                     await self.send(out_msg)
                     logger.info(f"Sent analysis results to SynthesisAgent: {results_path}")
                     return
 
-                results = {}
+                # Analyze papers concurrently with a bounded worker pool; results keep file order
+                paper_files.sort()
+                semaphore = asyncio.Semaphore(CONFIG["analysis_concurrency"])
+                progress = {"run_id": run_id, "done": 0, "total": len(paper_files)}
+                started = time.perf_counter()
+                outcomes = await asyncio.gather(*(
+                    self.analyze_file(semaphore, folder_path, md_file, research_data, research_question, progress)
+                    for md_file in paper_files
+                ))
+                wall_seconds = time.perf_counter() - started
 
-                # Analyze each paper
-                for md_file in paper_files:
-                    md_path = Path(folder_path) / md_file
-                    paper_id = md_path.stem
-                    logger.info(f"Analyzing paper {paper_id}")
-
-                    # Get paper metadata
-                    paper_metadata = None
-                    for paper in research_data.get("papers", []):
-                        if paper.get("id") == paper_id:
-                            paper_metadata = paper
-                            break
-
-                    if not paper_metadata:
-                        logger.warning(f"Metadata not found for paper {paper_id}")
-                        paper_metadata = {"title": paper_id}
-
-                    with open(md_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    
-                    logger.info(f"Paper {paper_id} content length: {len(content)}")
-                    
-                    try:
-                        analysis = await analyze_paper(content, research_question)
-                        logger.info(f"Successfully analyzed {md_file} with Gemini")
-                    except Exception as e:
-                        logger.warning(f"Gemini analysis failed for {md_file}: {e}")
-                        analysis = {"methodology": "", "findings": "", "future_work": ""}
-                    
-                    results[paper_id] = {
-                        "title": paper_metadata.get("title", ""),
-                        **analysis
-                    }
+                results = {}
+                latencies = {}
+                for paper_id, result, seconds in outcomes:
+                    results[paper_id] = result
+                    latencies[paper_id] = round(seconds, 3)
+                speedup = sum(latencies.values()) / wall_seconds if wall_seconds else 1.0
+                logger.info(
+                    f"Analyzed {len(results)} papers in {wall_seconds:.2f}s "
+                    f"(speedup {speedup:.1f}x over sequential); per-paper latency: {latencies}"
+                )
 
                 # Save results as JSON in the same folder
                 results_path = os.path.join(folder_path, "analysis.json")
                 with open(results_path, "w", encoding="utf-8") as f:
                     json.dump(results, f, indent=2)
                 logger.info(f"Saved analysis results to {results_path}")
+                event_bus.publish(
+                    EventType.ANALYSIS_DONE, run_id=run_id,
+                    folder_path=folder_path, results_path=results_path, papers=len(results)
+                )
 
                 # Send message to SynthesisAgent
                 synthesis_agent_id = "synthesis_agent@localhost"
-                out_msg = Message(to=synthesis_agent_id)
+                out_msg = Message(to=synthesis_agent_id, thread=run_id)
                 out_msg.set_metadata("type", MessageType.ANALYSIS_READY)
                 out_msg.body = json.dumps({
                     "folder_path": folder_path,
                     "results_path": results_path,
                     "research_question": research_question,
                 })
+                await wait_for_capacity(synthesis_agent_id)
                 await self.send(out_msg)
                 logger.info(f"Sent analysis results to SynthesisAgent: {results_path}")
 
             except Exception as e:
                 logger.error(f"Error in AnalysisAgent: {str(e)}")
+                await report_failure(self, "analysis", e, run_id=run_id)
+
+        async def analyze_file(self, semaphore, folder_path, md_file, research_data, research_question, progress):
+            """Analyze one markdown file under the pool limit; returns (paper_id, result, seconds)"""
+            md_path = Path(folder_path) / md_file
+            paper_id = md_path.stem
+
+            # Get paper metadata
+            paper_metadata = None
+            for paper in research_data.get("papers", []):
+                if paper.get("id") == paper_id:
+                    paper_metadata = paper
+                    break
+
+            if not paper_metadata:
+                logger.warning(f"Metadata not found for paper {paper_id}")
+                paper_metadata = {"title": paper_id}
+
+            with open(md_path, "r", encoding="utf-8") as f:
+                content = f.read()
+
+            async with semaphore:
+                logger.info(f"Analyzing paper {paper_id} (content length: {len(content)})")
+                started = time.perf_counter()
+                try:
+                    analysis = await asyncio.wait_for(
+                        analyze_paper(content, research_question),
+                        timeout=CONFIG["analysis_paper_timeout"]
+                    )
+                    logger.info(f"Successfully analyzed {md_file} with Gemini")
+                except asyncio.TimeoutError:
+                    logger.warning(f"Gemini analysis timed out for {md_file}")
+                    analysis = {"methodology": "", "findings": "", "future_work": ""}
+                except Exception as e:
+                    logger.warning(f"Gemini analysis failed for {md_file}: {e}")
+                    analysis = {"methodology": "", "findings": "", "future_work": ""}
+                seconds = time.perf_counter() - started
 
-        async def on_end(self):
-            logger.info("AnalyzePapersBehaviour has ended. Stopping the agent.")
-            await self.agent.stop()
+            progress["done"] += 1
+            event_bus.publish(EventType.PAPER_ANALYZED, paper_id=paper_id, **progress)
+            return paper_id, {"title": paper_metadata.get("title", ""), **analysis}, seconds
 
     async def setup(self):
         template = Template(metadata={"type": MessageType.KNOWLEDGE_READY})
-        behaviour = self.AnalyzePapersBehaviour()
-        self.add_behaviour(behaviour, template)
-        logger.info("AnalysisAgent is ready")
\ No newline at end of file
+        self.start_workers(
+            self.AnalyzePapersBehaviour, template,
+            concurrency=CONFIG["analysis_workers"], queue_size=CONFIG["analysis_queue_size"]
+        )
+        logger.info("AnalysisAgent is ready")
@@ -0,0 +1,107 @@
+import agentspeak as asp
+from spade.behaviour import OneShotBehaviour
+
+from agents.launcher import report_failure
+from utils.logger import logger
+from utils.payload_store import handle_id, payload_store
+
+
+def add_belief(agent, name: str, *args):
+    """
+    Add a belief to a BDI agent. Unlike `bdi.set_belief`, existing beliefs with the same
+    name are kept, so beliefs of concurrent runs (keyed by run id) do not replace each other.
+    """
+    term = asp.Literal(name, tuple(args))
+    agent.bdi_agent.call(asp.Trigger.addition, asp.GoalType.belief, term, asp.runtime.Intention())
+    if args and hasattr(agent, "touch_run"):
+        agent.touch_run(args[0])
+
+
+def retain_terms(terms):
+    for term in terms:
+        if handle_id(term):
+            payload_store.retain(handle_id(term))
+
+
+def release_terms(terms):
+    for term in terms:
+        if handle_id(term):
+            payload_store.release(handle_id(term))
+
+
+async def resolve_term(term):
+    """Python value of a grounded action argument: payload handles are loaded, atoms become strings"""
+    if isinstance(term, asp.Literal):
+        if term.functor == "payload" and term.args:
+            return await payload_store.load(handle_id(term))
+        if not term.args:
+            return term.functor
+    # AgentSpeak numbers are floats; counts such as max_papers(10) are used as ints
+    if isinstance(term, float) and term.is_integer():
+        return int(term)
+    return term
+
+
+class ActionBehaviour(OneShotBehaviour):
+    """
+    Coroutine work behind an ASL custom action. The action only schedules this behaviour, so
+    the reasoning cycle is never blocked; the issuing plan resumes when `perform()` returns
+    and its result is added as the `done` belief, done(RunId, *result). A failure is reported
+    to the launcher and recorded as action_failed(RunId, Stage) for the ASL to clean up.
+    """
+
+    stage = None
+    done = None
+
+    def __init__(self, run_id, *args):
+        super().__init__()
+        self.run_id = run_id
+        self.args = args
+
+    async def run(self):
+        try:
+            result = await self.perform(*[await resolve_term(arg) for arg in self.args])
+        except Exception as e:
+            add_belief(self.agent, "action_failed", self.run_id, self.stage)
+            await report_failure(self, self.stage, e, run_id=self.run_id)
+            return
+        finally:
+            release_terms(self.args)
+        if self.done:
+            add_belief(self.agent, self.done, self.run_id, *result)
+
+    async def perform(self, *args):
+        raise NotImplementedError
+
+
+def add_async_action(agent, actions, name: str, behaviour_class):
+    """
+    Register `name` as an ASL action that runs `behaviour_class` with the action's grounded
+    arguments (the first one is the run id). The behaviour holds its own reference to any
+    payload handle it is given, so the plan may retract the beliefs holding them right away.
+    """
+
+    @actions.add(name)
+    def _action(asp_agent, term, intention):
+        try:
+            args = [asp.grounded(arg, intention.scope) for arg in term.args]
+            retain_terms(args[1:])
+            agent.add_behaviour(behaviour_class(*args))
+            yield True
+        except Exception as e:
+            logger.error(f"Error in {name}: {str(e)}")
+            yield False
+
+
+def add_payload_actions(actions):
+    """Actions for beliefs that hold payload handles"""
+
+    @actions.add(".release_payload")
+    def _release_payload(agent, term, intention):
+        """Drop the belief's reference to a stored payload"""
+        try:
+            payload_store.release(handle_id(asp.grounded(term.args[0], intention.scope)))
+            yield True
+        except Exception as e:
+            logger.error(f"Error in .release_payload: {str(e)}")
+            yield False
@@ -0,0 +1,123 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+import agentspeak as asp
+from spade.behaviour import PeriodicBehaviour
+
+from utils.logger import logger
+from config import CONFIG
+
+
+# BDI agents with a retention policy in this process, by agent JID
+retained_agents: Dict[str, Any] = {}
+
+
+def get_belief_stats() -> Dict[str, Dict[str, Any]]:
+    return {jid: agent.get_belief_stats() for jid, agent in retained_agents.items()}
+
+
+class BeliefRetentionMixin:
+    """
+    Bounded belief base for long-running BDI agents. Per-question beliefs are the ones whose
+    first argument is a run id; a run's beliefs are retracted when its plans call
+    .finish_run(RunId), when the run has been idle for `belief_ttl` seconds, or when more
+    than `belief_max_runs` runs are retained (oldest first). Retraction goes through the
+    reasoner, so -belief plans such as payload releases still fire.
+    """
+
+    class BeliefGCBehaviour(PeriodicBehaviour):
+        def match(self, message) -> bool:
+            # Never reads messages; without this every message would also pile up in its mailbox
+            return False
+
+        async def run(self):
+            self.agent.collect_beliefs()
+
+    def start_belief_retention(self):
+        """Track runs, time reasoning cycles and schedule belief GC; call from __init__"""
+        self.run_activity: "OrderedDict[str, float]" = OrderedDict()
+        self.retention_stats = {
+            "finished_runs": 0, "expired_runs": 0, "evicted_runs": 0, "retracted_beliefs": 0,
+            "cycles": 0, "cycle_seconds": 0.0, "max_cycle_seconds": 0.0,
+        }
+        self._time_reasoning_cycles()
+        self.add_behaviour(self.BeliefGCBehaviour(period=CONFIG["belief_gc_interval"]))
+        retained_agents[str(self.jid)] = self
+
+    def _time_reasoning_cycles(self):
+        step = self.bdi_agent.step
+
+        def timed_step():
+            started = time.perf_counter()
+            worked = step()
+            # Idle cycles would only dilute the average
+            if worked:
+                elapsed = time.perf_counter() - started
+                self.retention_stats["cycles"] += 1
+                self.retention_stats["cycle_seconds"] += elapsed
+                self.retention_stats["max_cycle_seconds"] = max(self.retention_stats["max_cycle_seconds"], elapsed)
+            return worked
+
+        self.bdi_agent.step = timed_step
+
+    def touch_run(self, run_id: str):
+        """Record activity for a run; called whenever a run-keyed belief is added from Python"""
+        self.run_activity[run_id] = time.monotonic()
+        self.run_activity.move_to_end(run_id)
+
+    def retract_run(self, run_id: str) -> int:
+        """Retract every belief whose first argument is `run_id`"""
+        self.run_activity.pop(run_id, None)
+        stale = [
+            belief for beliefs in self.bdi_agent.beliefs.values() for belief in beliefs
+            if belief.args and belief.args[0] == run_id
+        ]
+        for belief in stale:
+            self.bdi_agent.call(asp.Trigger.removal, asp.GoalType.belief, belief, asp.runtime.Intention())
+        self.retention_stats["retracted_beliefs"] += len(stale)
+        return len(stale)
+
+    def finish_run(self, run_id: str):
+        self.retention_stats["finished_runs"] += 1
+        self.retract_run(run_id)
+
+    def collect_beliefs(self):
+        """Retract runs that outlived the TTL, then the oldest runs beyond the maximum count"""
+        cutoff = time.monotonic() - CONFIG["belief_ttl"]
+        expired = [run_id for run_id, seen in self.run_activity.items() if seen < cutoff]
+        excess = len(self.run_activity) - len(expired) - CONFIG["belief_max_runs"]
+        evicted = [run_id for run_id in self.run_activity if run_id not in expired][:max(excess, 0)]
+        retracted = sum(self.retract_run(run_id) for run_id in expired + evicted)
+        self.retention_stats["expired_runs"] += len(expired)
+        self.retention_stats["evicted_runs"] += len(evicted)
+        if retracted:
+            logger.info(
+                f"{self.jid}: retracted {retracted} beliefs of {len(expired)} expired and {len(evicted)} evicted runs"
+            )
+
+    def add_retention_actions(self, actions):
+        @actions.add(".finish_run")
+        def _finish_run(agent, term, intention):
+            """Retract all beliefs of a completed or failed run"""
+            try:
+                self.finish_run(asp.grounded(term.args[0], intention.scope))
+                yield True
+            except Exception as e:
+                logger.error(f"Error in .finish_run: {str(e)}")
+                yield False
+
+    def get_belief_stats(self) -> Dict[str, Any]:
+        stats = self.retention_stats
+        cycles = stats["cycles"]
+        return {
+            "beliefs": sum(len(beliefs) for beliefs in self.bdi_agent.beliefs.values()),
+            "runs": len(self.run_activity),
+            "finished_runs": stats["finished_runs"],
+            "expired_runs": stats["expired_runs"],
+            "evicted_runs": stats["evicted_runs"],
+            "retracted_beliefs": stats["retracted_beliefs"],
+            "cycles": cycles,
+            "cycle_ms_avg": round(1000 * stats["cycle_seconds"] / cycles, 3) if cycles else 0.0,
+            "cycle_ms_max": round(1000 * stats["max_cycle_seconds"], 3),
+        }
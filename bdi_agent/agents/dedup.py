@@ -0,0 +1,135 @@
+import random
+import re
+import zlib
+from typing import List, Dict, Any, Optional
+
+from config import CONFIG
+
+_VERSION_SUFFIX = re.compile(r"v\d+$")
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def strip_version(arxiv_id: str) -> str:
+    """Drop the trailing version from an arXiv id (2401.01234v2 -> 2401.01234)"""
+    return _VERSION_SUFFIX.sub("", arxiv_id or "")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and collapse everything but letters and digits to single spaces"""
+    return " ".join(re.findall(r"[a-z0-9]+", (title or "").lower()))
+
+
+class SearchResultDeduplicator:
+    """
+    Incremental deduplication of arXiv search results across queries.
+    Exact duplicates share a version-stripped arXiv id; near duplicates (re-submissions
+    under a new id, lightly edited titles) are found with MinHash over character
+    shingles of the normalized title and LSH banding. Duplicates are merged into the
+    first record seen, keeping the query provenance of every copy.
+    """
+
+    def __init__(self, similarity_threshold: Optional[float] = None, num_perm: int = 32,
+                 bands: int = 8, shingle_size: int = 4):
+        self.similarity_threshold = similarity_threshold or CONFIG["dedup_title_similarity"]
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._signatures: List[List[int]] = []
+        self._buckets: Dict[tuple, List[int]] = {}
+        self._unique: List[Dict[str, Any]] = []
+        self.stats = {"input": 0, "exact_duplicates": 0, "near_duplicates": 0}
+
+    def add(self, paper: Dict[str, Any]) -> bool:
+        """Add a search result; returns True if it is new, False if it was merged into an earlier one"""
+        self.stats["input"] += 1
+        base_id = strip_version(paper.get("id", ""))
+
+        existing = self._by_id.get(base_id) if base_id else None
+        if existing is not None:
+            self.stats["exact_duplicates"] += 1
+            self._merge(existing, paper)
+            return False
+
+        signature = self._signature(normalize_title(paper.get("title", "")))
+        if signature is not None:
+            match = self._find_similar(signature)
+            if match is not None:
+                self.stats["near_duplicates"] += 1
+                self._merge(self._unique[match], paper)
+                if base_id:
+                    self._by_id[base_id] = self._unique[match]
+                return False
+
+        record = paper.copy()
+        record["matched_queries"] = [self._provenance(paper)] if paper.get("query") else []
+        record["duplicate_ids"] = []
+        index = len(self._unique)
+        self._unique.append(record)
+        self._signatures.append(signature)
+        if base_id:
+            self._by_id[base_id] = record
+        if signature is not None:
+            for band in self._bands(signature):
+                self._buckets.setdefault(band, []).append(index)
+        return True
+
+    def extend(self, papers: List[Dict[str, Any]]):
+        for paper in papers:
+            self.add(paper)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Unique results in first-seen order"""
+        return list(self._unique)
+
+    def get_stats(self) -> Dict[str, Any]:
+        unique = len(self._unique)
+        total = self.stats["input"]
+        return {
+            **self.stats,
+            "unique": unique,
+            "dedup_ratio": 1 - unique / total if total else 0.0,
+        }
+
+    @staticmethod
+    def _provenance(paper: Dict[str, Any]) -> Dict[str, str]:
+        return {"query": paper.get("query", ""), "explanation": paper.get("query_explanation", "")}
+
+    def _merge(self, record: Dict[str, Any], duplicate: Dict[str, Any]):
+        provenance = self._provenance(duplicate)
+        if duplicate.get("query") and provenance not in record["matched_queries"]:
+            record["matched_queries"].append(provenance)
+        duplicate_id = duplicate.get("id", "")
+        if duplicate_id and duplicate_id != record.get("id") and duplicate_id not in record["duplicate_ids"]:
+            record["duplicate_ids"].append(duplicate_id)
+
+    def _signature(self, title: str) -> Optional[List[int]]:
+        if not title:
+            return None
+        k = self.shingle_size
+        shingles = {title[i:i + k] for i in range(max(len(title) - k + 1, 1))}
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _bands(self, signature: List[int]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (band, tuple(signature[start:start + self.rows]))
+
+    def _find_similar(self, signature: List[int]) -> Optional[int]:
+        candidates = set()
+        for band in self._bands(signature):
+            candidates.update(self._buckets.get(band, ()))
+        best, best_score = None, self.similarity_threshold
+        for index in candidates:
+            other = self._signatures[index]
+            score = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+            if score >= best_score:
+                best, best_score = index, score
+        return best
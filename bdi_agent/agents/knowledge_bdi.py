@@ -1,20 +1,30 @@
 import json
 import os
-import requests
+import time
 import asyncio
 from datetime import datetime
-from pathlib import Path
-import agentspeak as asp
 from spade_bdi.bdi import BDIAgent
 
+from services.blob_store import check_out, claim_count
+from services.http_client import PooledHTTPMixin
+from agents.transport import TransportMixin
+from agents.belief_retention import BeliefRetentionMixin
+from agents.reasoning_loop import EventDrivenReasoningMixin
+from agents.launcher import report_failure
+from agents.bdi_actions import ActionBehaviour, add_async_action, add_belief, add_payload_actions
+from agents.worker import wait_for_capacity
+from services.paper_fetcher import PaperContentFetcher
+from services.paper_store import paper_store
+from utils.events import EventType, event_bus
 from utils.logger import logger
+from utils.payload_store import handle_term, payload_store
 from config import CONFIG
 from models import MessageType
 from spade.message import Message
-from spade.behaviour import CyclicBehaviour, OneShotBehaviour
+from spade.behaviour import CyclicBehaviour
 from spade.template import Template
 
-class KnowledgeAggregatorBDIAgent(BDIAgent):
+class KnowledgeAggregatorBDIAgent(EventDrivenReasoningMixin, BeliefRetentionMixin, TransportMixin, PooledHTTPMixin, BDIAgent):
     """
     BDI version of KnowledgeAggregatorAgent with simplified implementation.
     """
@@ -22,7 +32,8 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
     class SPADEToBDIBehaviour(CyclicBehaviour):
         """Bridge between SPADE messages and BDI beliefs"""
         async def run(self):
-            msg = await self.receive(timeout=0.01)
+            # Sleep on the mailbox until a message arrives instead of polling every 10 ms
+            msg = await self.receive(timeout=CONFIG["timeout"])
             if not msg:
                 return
                 
@@ -34,50 +45,39 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
                     research_question = data.get("research_question", "")
                     relevant_papers = data.get("relevant_papers", [])
                     
-                    if research_question and relevant_papers:
-                        logger.info(f"KnowledgeAggregatorBDIAgent received {len(relevant_papers)} relevant papers for: {research_question}")
-                        # Add behavior to handle papers directly
-                        b = self.agent.ProcessPapersBehaviour(research_question, relevant_papers)
-                        self.agent.add_behaviour(b)
-                        # Also set belief for BDI integration
-                        self.agent.bdi.set_belief("new_relevant_papers", research_question, json.dumps(relevant_papers))
+                    if research_question and claim_count(relevant_papers):
+                        logger.info(f"KnowledgeAggregatorBDIAgent received {claim_count(relevant_papers)} relevant papers for: {research_question}")
+                        # The belief holds a handle; claim-checked papers are loaded when the plan needs them
+                        handle = payload_store.put_lazy(
+                            lambda papers=relevant_papers: check_out(papers), claim_count(relevant_papers), size=len(msg.body)
+                        )
+                        add_belief(self.agent, "new_relevant_papers", msg.thread or "", research_question, handle_term(handle))
+                    else:
+                        await report_failure(self, "knowledge", "no relevant papers to aggregate", run_id=msg.thread)
                 
             except Exception as e:
                 logger.error(f"Error in SPADEToBDIBehaviour of KnowledgeAggregatorBDIAgent: {str(e)}")
 
-    class ProcessPapersBehaviour(OneShotBehaviour):
-        """Behavior to process papers and create knowledge base"""
-        def __init__(self, question, papers):
-            super().__init__()
-            self.question = question
-            self.papers = papers
+    class ProcessPapersBehaviour(ActionBehaviour):
+        """Runs .build_knowledge_base: fetches paper content into a new knowledge folder"""
+        stage = "knowledge"
+        done = "knowledge_base_ready"
+        
+        async def perform(self, question, papers, priority, max_papers):
+            logger.info(f"Processing papers for: {question}")
             
-        async def run(self):
-            try:
-                logger.info(f"Processing papers for: {self.question}")
-                
-                # Create a knowledge folder
-                folder_path = self.create_knowledge_folder(self.question)
-                if not folder_path:
-                    logger.error("Failed to create knowledge folder")
-                    return
-                
-                # Set content priority and max papers
-                priority = "fulltext"
-                max_papers = 10
-                
-                # Process papers and fetch content
-                processed_count = await self.process_papers(folder_path, self.papers, priority, max_papers)
-                logger.info(f"Processed {processed_count} papers")
-                
-                # Save research data
-                self.save_research_json(folder_path, self.question, self.papers)
-                
-                # Notify analysis agent
-                await self.notify_analysis_agent(folder_path, self.question)
-                
-            except Exception as e:
-                logger.error(f"Error processing papers: {str(e)}")
+            # Create a knowledge folder
+            folder_path = self.create_knowledge_folder(question)
+            if not folder_path:
+                raise RuntimeError("failed to create knowledge folder")
+            
+            # Process papers and fetch content
+            processed_count = await self.process_papers(folder_path, papers, priority, max_papers)
+            logger.info(f"Processed {processed_count} papers")
+            
+            # Save research data
+            self.save_research_json(folder_path, question, papers)
+            return question, folder_path, processed_count
         
         def create_knowledge_folder(self, question):
             """Create a folder for the knowledge base"""
@@ -89,9 +89,11 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
                 safe_research_question = safe_research_question.strip().lower()
                 
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                # The run id keeps concurrent runs of the same question apart
+                suffix = f"_{timestamp}_{self.run_id[:8]}" if self.run_id else f"_{timestamp}"
                 folder_path = os.path.join(
                     "knowledge_bases",
-                    safe_research_question.replace(" ", "_") + f"_{timestamp}",
+                    safe_research_question.replace(" ", "_") + suffix,
                 )
                 os.makedirs(folder_path, exist_ok=True)
                 os.makedirs("knowledge_bases", exist_ok=True)
@@ -104,102 +106,30 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
                 return None
         
         async def process_papers(self, folder_path, papers, priority, max_papers):
-            """Process papers and fetch content"""
+            """Fetch content for all papers concurrently, writing each file as soon as it is ready"""
             try:
-                # Limit to max_papers
-                papers = papers[:max_papers]
-                
-                # Track processed papers
-                duplicate_paper_ids = set()
-                processed_count = 0
+                # Limit to max_papers and skip duplicate ids
+                unique_papers = {}
+                for paper in papers[:max_papers]:
+                    unique_papers.setdefault(paper.get("id"), paper)
                 
-                # Process each paper
-                for paper in papers:
-                    paper_id = paper.get("id")
-                    if paper_id in duplicate_paper_ids:
-                        continue
-                    
-                    url = paper.get("page_url", "")
-                    
-                    paper_url = ""
-                    arxiv_html_url = url.replace("abs", "html")
-                    ar5iv_url = url.replace("arxiv.org", "ar5iv.org")
-                    
-                    logger.info(f"Fetching content for paper {paper_id} from URL: {url}")
-                    
-                    try:
-                        # Check arXiv availability
-                        logger.info(f"Checking arXiv availability for {arxiv_html_url}")
-                        response = requests.get(arxiv_html_url, timeout=10)
-                        status = response.status_code
-                        
-                        if status == 200 or status in (301, 302, 303, 307, 308):
-                            paper_url = arxiv_html_url
-                            logger.info(f"Using arXiv HTML URL: {arxiv_html_url}")
-                        else:
-                            # Check ar5iv
-                            logger.info(f"Checking ar5iv availability for {ar5iv_url}")
-                            response = requests.get(ar5iv_url, timeout=10)
-                            status = response.status_code
-                            
-                            if status == 200 or status in (301, 302, 303, 307, 308):
-                                paper_url = ar5iv_url
-                                logger.info(f"Using ar5iv URL: {ar5iv_url}")
-                    except requests.RequestException as e:
-                        logger.warning(f"Error checking paper URL for {paper_id}: {e}")
-                    
-                    if not paper_url:
-                        logger.warning(f"Skipping paper {paper_id}: no HTML version available")
-                        continue
-                    
-                    md_filename = os.path.join(folder_path, f"{paper_id}.md")
-                    if not os.path.exists(md_filename):
-                        if priority == "fulltext" and "jina_api_key" in CONFIG and CONFIG["jina_api_key"]:
-                            jina_url = f"https://r.jina.ai/{paper_url}"
-                            headers = {"Authorization": f"Bearer {CONFIG['jina_api_key']}"}
-                            
-                            try:
-                                logger.info(f"Fetching markdown from Jina API: {jina_url}")
-                                resp = requests.get(jina_url, headers=headers, timeout=30)
-                                
-                                if resp.status_code == 200:
-                                    markdown_content = resp.text
-                                    logger.info(f"Successfully fetched content for {paper_id}, size: {len(markdown_content)} bytes")
-                                    
-                                    with open(md_filename, "w", encoding="utf-8") as md_file:
-                                        md_file.write(markdown_content)
-                                    
-                                    logger.info(f"Saved markdown for paper {paper_id} to {md_filename}")
-                                    processed_count += 1
-                                else:
-                                    logger.warning(f"Jina Reader API failed for {paper_id}: {resp.status_code}")
-                                    # Create a minimal markdown file with just the abstract
-                                    with open(md_filename, "w", encoding="utf-8") as md_file:
-                                        md_file.write(f"# {paper.get('title', 'Untitled')}\n\n")
-                                        md_file.write(f"## Abstract\n\n{paper.get('abstract', 'No abstract available.')}")
-                                    logger.info(f"Created minimal markdown for paper {paper_id} with abstract only")
-                                    processed_count += 1
-                            except Exception as e:
-                                logger.warning(f"Error fetching markdown for {paper_id}: {e}")
-                                # Create a minimal markdown file with just the abstract as fallback
-                                with open(md_filename, "w", encoding="utf-8") as md_file:
-                                    md_file.write(f"# {paper.get('title', 'Untitled')}\n\n")
-                                    md_file.write(f"## Abstract\n\n{paper.get('abstract', 'No abstract available.')}")
-                                logger.info(f"Created fallback markdown for paper {paper_id} with abstract only due to error")
-                                processed_count += 1
-                        else:
-                            # For abstract priority or if no Jina API key
-                            logger.info(f"Creating abstract-only markdown for paper {paper_id}")
-                            with open(md_filename, "w", encoding="utf-8") as md_file:
-                                md_file.write(f"# {paper.get('title', 'Untitled')}\n\n")
-                                md_file.write(f"## Abstract\n\n{paper.get('abstract', 'No abstract available.')}")
-                            logger.info(f"Created minimal markdown for paper {paper_id} with abstract only")
-                            processed_count += 1
-                    else:
-                        logger.info(f"Markdown file already exists for paper {paper_id}")
-                        processed_count += 1
-                    
-                    duplicate_paper_ids.add(paper_id)
+                fetcher = PaperContentFetcher()
+                started = time.perf_counter()
+                done = 0
+
+                async def tracked(paper):
+                    nonlocal done
+                    ok = await self.process_paper(fetcher, folder_path, paper, priority)
+                    done += 1
+                    event_bus.publish(
+                        EventType.PAPER_FETCHED, run_id=self.run_id, paper_id=paper.get("id"), ok=ok, done=done, total=len(unique_papers)
+                    )
+                    return ok
+
+                outcomes = await asyncio.gather(*(tracked(paper) for paper in unique_papers.values()))
+                processed_count = sum(1 for ok in outcomes if ok)
+                logger.info(f"Fetched {processed_count}/{len(unique_papers)} papers in {time.perf_counter() - started:.2f}s")
+                logger.info(f"Paper store stats: {paper_store.get_stats()}")
                 
                 # Check if we have any markdown files
                 md_files = [f for f in os.listdir(folder_path) if f.endswith(".md")]
@@ -211,6 +141,44 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
                 logger.error(f"Error processing papers: {str(e)}")
                 return 0
         
+        async def process_paper(self, fetcher, folder_path, paper, priority):
+            """Fetch and save a single paper; returns True if a markdown file is available"""
+            paper_id = paper.get("id")
+            md_filename = os.path.join(folder_path, f"{paper_id}.md")
+            if os.path.exists(md_filename):
+                logger.info(f"Markdown file already exists for paper {paper_id}")
+                return True
+            
+            # Papers fetched for earlier questions are linked from the shared store
+            if priority == "fulltext" and await paper_store.link_into(paper_id, md_filename):
+                logger.info(f"Linked paper {paper_id} from the paper store")
+                return True
+            
+            started = time.perf_counter()
+            try:
+                fetched = await fetcher.fetch_markdown(paper, priority)
+            except Exception as e:
+                logger.warning(f"Error fetching content for {paper_id}: {e}")
+                return False
+            
+            if not fetched:
+                logger.warning(f"Skipping paper {paper_id}: no HTML version available")
+                return False
+            
+            markdown_content, source = fetched
+            if source == "abstract":
+                # Abstract-only fallbacks stay local so a later run can still get the full text
+                with open(md_filename, "w", encoding="utf-8") as md_file:
+                    md_file.write(markdown_content)
+            else:
+                await paper_store.put(paper_id, markdown_content, source)
+                await paper_store.link_into(paper_id, md_filename)
+            logger.info(
+                f"Saved {source} markdown for paper {paper_id} ({len(markdown_content)} bytes) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            return True
+        
         def save_research_json(self, folder_path, question, papers):
             """Save research data to JSON file"""
             try:
@@ -245,31 +213,33 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
                 logger.error(f"Error saving research data: {str(e)}")
                 return False
         
-        async def notify_analysis_agent(self, folder_path, question):
-            """Notify AnalysisAgent that knowledge is ready"""
-            try:
-                # Create timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                
-                # Create message content
-                content = {
-                    "folder_path": folder_path,
-                    "research_question": question,
-                    "timestamp": timestamp
-                }
-                
-                # Create and send SPADE message
-                msg = Message(to="analysis_agent@localhost")
-                msg.set_metadata("type", MessageType.KNOWLEDGE_READY)
-                msg.body = json.dumps(content)
-                
-                await self.send(msg)
-                logger.info(f"Notified AnalysisAgent about knowledge base: {folder_path}")
-                return True
-                
-            except Exception as e:
-                logger.error(f"Error notifying analysis agent: {str(e)}")
-                return False
+    class NotifyAnalysisBehaviour(ActionBehaviour):
+        """Runs .notify_analysis_agent: tells the AnalysisAgent that a knowledge base is ready"""
+        stage = "knowledge"
+        
+        async def perform(self, question, folder_path, processed_count):
+            # Create timestamp
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            
+            # Create message content
+            content = {
+                "folder_path": folder_path,
+                "research_question": question,
+                "timestamp": timestamp
+            }
+            
+            # Create and send SPADE message
+            msg = Message(to="analysis_agent@localhost", thread=self.run_id)
+            msg.set_metadata("type", MessageType.KNOWLEDGE_READY)
+            msg.body = json.dumps(content)
+            
+            # Hold the hand-off while AnalysisAgent's queue is full
+            await wait_for_capacity("analysis_agent@localhost")
+            await self.send(msg)
+            logger.info(f"Notified AnalysisAgent about knowledge base: {folder_path}")
+            event_bus.publish(
+                EventType.KNOWLEDGE_READY, run_id=self.run_id, question=question, folder_path=folder_path, papers=processed_count
+            )
 
     def __init__(self, jid, password, asl_file):
         super().__init__(jid, password, asl_file)
@@ -277,60 +247,11 @@ class KnowledgeAggregatorBDIAgent(BDIAgent):
         # Add SPADE to BDI bridge behavior
         template = Template()
         self.add_behaviour(self.SPADEToBDIBehaviour(), template)
+        self.start_belief_retention()
 
     def add_custom_actions(self, actions):
-        """Define minimal custom ASL actions"""
-        
-        @actions.add(".create_knowledge_folder")
-        def _create_knowledge_folder(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                question = asp.grounded(term.args[0], intention.scope)
-                
-                # Log the request - actual work done in OneShotBehaviour
-                logger.info(f"BDI action .create_knowledge_folder called for: {question}")
-                
-                # Unify with a placeholder
-                placeholder = "/tmp/placeholder"
-                asp.unify(term.args[1], placeholder, intention.scope, intention.stack)
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .create_knowledge_folder: {str(e)}")
-                yield False
-        
-        @actions.add(".process_papers")
-        def _process_papers(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                # Log the request - actual work done in OneShotBehaviour
-                logger.info("BDI action .process_papers called")
-                
-                # Unify with a placeholder
-                placeholder = 0
-                asp.unify(term.args[4], placeholder, intention.scope, intention.stack)
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .process_papers: {str(e)}")
-                yield False
-        
-        @actions.add(".save_research_json")
-        def _save_research_json(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                # Log the request - actual work done in OneShotBehaviour
-                logger.info("BDI action .save_research_json called")
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .save_research_json: {str(e)}")
-                yield False
-        
-        @actions.add(".notify_analysis_agent")
-        def _notify_analysis_agent(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                # Log the request - actual work done in OneShotBehaviour
-                logger.info("BDI action .notify_analysis_agent called")
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .notify_analysis_agent: {str(e)}")
-                yield False
\ No newline at end of file
+        """Custom ASL actions; each runs its behaviour and resumes the plan through a belief"""
+        add_async_action(self, actions, ".build_knowledge_base", self.ProcessPapersBehaviour)
+        add_async_action(self, actions, ".notify_analysis_agent", self.NotifyAnalysisBehaviour)
+        add_payload_actions(actions)
+        self.add_retention_actions(actions)
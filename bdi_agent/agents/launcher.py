@@ -0,0 +1,146 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+
+from spade.agent import Agent
+from spade.behaviour import CyclicBehaviour, OneShotBehaviour
+from spade.message import Message
+from spade.template import Template
+
+from agents.transport import TransportMixin
+from utils.events import EventType, event_bus
+from utils.logger import logger
+from config import CONFIG
+from models import MessageType
+
+LAUNCHER_JID = "user@localhost"
+
+
+def new_run_id() -> str:
+    """Correlation id for one research question; travels as the SPADE message thread"""
+    return uuid.uuid4().hex
+
+
+async def notify_launcher(behaviour, msg_type: str, run_id: Optional[str] = None, **details):
+    """Send a pipeline status message (completion or failure) for a run from a behaviour to the launcher"""
+    try:
+        msg = Message(
+            to=LAUNCHER_JID, thread=run_id, body=json.dumps({"run_id": run_id, **details}), metadata={"type": msg_type}
+        )
+        await behaviour.send(msg)
+    except Exception as e:
+        logger.error(f"Error notifying launcher: {str(e)}")
+
+
+async def report_failure(behaviour, stage: str, error: Any, run_id: Optional[str] = None):
+    """Tell the launcher that `stage` failed for a run so it ends now instead of at the timeout"""
+    logger.error(f"Pipeline stage {stage} failed for run {run_id}: {error}")
+    event_bus.publish(EventType.PIPELINE_FAILED, run_id=run_id, stage=stage, error=str(error))
+    await notify_launcher(behaviour, MessageType.PIPELINE_FAILED, run_id=run_id, stage=stage, error=str(error))
+
+
+class LauncherAgent(TransportMixin, Agent):
+    """
+    Entry point of the agent mesh: submits research questions and tracks their outcomes.
+    Every submission gets a run id that all stages carry as the message thread. A run's
+    future resolves when the agent running `final_stage` reports completion for it or any
+    agent reports a failure for it; completions from earlier stages are only logged.
+    """
+
+    class SendQuery(OneShotBehaviour):
+        def __init__(self, question, run_id):
+            super().__init__()
+            self.question = question
+            self.run_id = run_id
+
+        async def run(self):
+            query_msg = Message(
+                to="query_construction_agent@localhost",
+                thread=self.run_id,
+                body=json.dumps({"research_question": self.question}),
+                metadata={"type": MessageType.RESEARCH_QUERY}
+            )
+            await self.send(query_msg)
+            logger.info(f"Sent research query for run {self.run_id} to QueryConstructionAgent")
+
+    class AwaitOutcome(CyclicBehaviour):
+        async def run(self):
+            msg = await self.receive(timeout=CONFIG["timeout"])
+            if not msg:
+                return
+            try:
+                details = json.loads(msg.body) if msg.body else {}
+            except json.JSONDecodeError:
+                details = {"raw": msg.body}
+            run_id = msg.thread or details.get("run_id")
+
+            if msg.get_metadata("type") == MessageType.PIPELINE_FAILED:
+                outcome = {"status": "failed", **details}
+            elif details.get("stage", self.agent.final_stage) == self.agent.final_stage:
+                outcome = {"status": "completed", **details}
+            else:
+                logger.info(f"Pipeline stage {details.get('stage')} completed for run {run_id}")
+                return
+
+            future = self.agent.runs.get(run_id)
+            if future is None:
+                logger.warning(f"Outcome for unknown run {run_id}: {outcome}")
+            elif not future.done():
+                future.set_result(outcome)
+
+    def __init__(self, jid, password, final_stage: str = "synthesis"):
+        super().__init__(jid, password)
+        self.final_stage = final_stage
+        self.runs: Dict[str, asyncio.Future] = {}
+
+    async def setup(self):
+        template = Template(metadata={"type": MessageType.PIPELINE_COMPLETE}) | \
+            Template(metadata={"type": MessageType.PIPELINE_FAILED})
+        self.add_behaviour(self.AwaitOutcome(), template)
+
+    def submit_question(self, question: str, run_id: Optional[str] = None) -> str:
+        """
+        Send a research question into the mesh and return its run id. (Not named
+        `submit`: SPADE's Agent.submit schedules the agent's behaviour coroutines.)
+        """
+        run_id = run_id or new_run_id()
+        self.runs[run_id] = asyncio.get_running_loop().create_future()
+        self.add_behaviour(self.SendQuery(question, run_id))
+        return run_id
+
+    async def wait_for_completion(self, run_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for a run's outcome; returns {"status": "timeout"} if none arrives in time"""
+        timeout = timeout or CONFIG["pipeline_timeout"]
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.runs[run_id]), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Run {run_id} did not finish within {timeout}s")
+            event_bus.publish(
+                EventType.PIPELINE_FAILED, run_id=run_id, stage="pipeline", error=f"no outcome within {timeout}s"
+            )
+            return {"status": "timeout", "run_id": run_id}
+        finally:
+            self.runs.pop(run_id, None)
+
+
+async def shutdown_agents(agents: List[Agent], grace: Optional[float] = None):
+    """
+    Stop agents gracefully: one-shot behaviours still doing work get `grace` seconds
+    to finish, then every agent is stopped concurrently.
+    """
+    grace = grace if grace is not None else CONFIG["shutdown_grace"]
+    alive = [agent for agent in agents if agent.is_alive()]
+    in_flight = [
+        behaviour for agent in alive for behaviour in agent.behaviours
+        if isinstance(behaviour, OneShotBehaviour) and not behaviour.is_done()
+    ]
+    if in_flight:
+        logger.info(f"Draining {len(in_flight)} in-flight behaviours")
+        _, pending = await asyncio.wait([asyncio.ensure_future(b.join()) for b in in_flight], timeout=grace)
+        for join in pending:
+            join.cancel()
+    results = await asyncio.gather(*(agent.stop() for agent in alive), return_exceptions=True)
+    for agent, result in zip(alive, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Error stopping {agent.jid}: {result}")
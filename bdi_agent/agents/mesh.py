@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from spade.agent import Agent
+
+from agents.query_bdi import QueryConstructionBDIAgent
+from agents.search import SearchAgent
+from agents.relevant_bdi import RelevantBDIAgent
+from agents.knowledge_bdi import KnowledgeAggregatorBDIAgent
+from agents.analysis import AnalysisAgent
+from agents.synthesis import SynthesisAgent
+from agents.launcher import LauncherAgent, LAUNCHER_JID, shutdown_agents
+from agents.transport import transport_stats
+from agents.worker import get_worker_stats
+from agents.belief_retention import get_belief_stats
+from utils.logger import logger
+from services.blob_store import blob_store
+from services.http_client import http_clients
+from utils.payload_store import payload_store
+from config import CONFIG
+
+
+class AgentMesh:
+    """
+    Long-lived set of pipeline agents shared by every research question.
+    The agents log in once; questions are submitted through the launcher and run
+    concurrently, kept apart by their run id.
+    """
+
+    def __init__(self, password: str = "password"):
+        self.launcher = LauncherAgent(LAUNCHER_JID, password)
+        self.agents: List[Agent] = [
+            QueryConstructionBDIAgent("query_construction_agent@localhost", password, "asl/query_construction.asl"),
+            SearchAgent("search_agent@localhost", password),
+            RelevantBDIAgent("relevant_agent@localhost", password, "asl/relevant.asl"),
+            KnowledgeAggregatorBDIAgent("knowledge_aggregator_agent@localhost", password, "asl/knowledge_aggregator.asl"),
+            AnalysisAgent("analysis_agent@localhost", password),
+            SynthesisAgent("synthesis_agent@localhost", password),
+        ]
+        self.started = False
+
+    async def start(self):
+        """Start every agent concurrently; later calls are no-ops"""
+        if self.started:
+            return
+        transport_stats.install()
+        await asyncio.gather(*(agent.start() for agent in self.agents + [self.launcher]))
+        self.started = True
+        logger.info("All agents started. MAS is running.")
+
+    def submit(self, question: str, run_id: Optional[str] = None) -> str:
+        """Submit a research question and return its run id"""
+        return self.launcher.submit_question(question, run_id)
+
+    async def run(self, question: str, run_id: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Submit a research question and wait for its outcome"""
+        run_id = self.submit(question, run_id)
+        outcome = await self.launcher.wait_for_completion(run_id, timeout)
+        logger.info(f"Run {run_id} finished: {outcome}")
+        return outcome
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput of the multi-request workers"""
+        return get_worker_stats()
+
+    def get_belief_stats(self) -> Dict[str, Any]:
+        """Belief-base size and reasoning-cycle time of the BDI agents"""
+        return get_belief_stats()
+
+    async def stop(self):
+        if self.started:
+            logger.info(f"Worker queue stats: {self.get_stats()}")
+            logger.info(f"Belief payload store stats: {payload_store.get_stats()}")
+            logger.info(f"BDI belief base stats: {self.get_belief_stats()}")
+            logger.info(f"Message blob store stats: {blob_store.get_stats()}")
+            logger.info(f"Transport stats: {transport_stats.get_stats()}")
+            # Let queued requests finish within the shutdown grace period
+            queues = [agent.work_queue for agent in self.agents if hasattr(agent, "work_queue")]
+            try:
+                await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in queues)), CONFIG["shutdown_grace"])
+            except asyncio.TimeoutError:
+                logger.warning("Shutting down with queued requests still pending")
+            await shutdown_agents(self.agents + [self.launcher])
+            transport_stats.uninstall()
+            logger.info(f"HTTP client stats: {http_clients.get_stats()}")
+            self.started = False
@@ -0,0 +1,83 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from config import CONFIG
+
+_STOPWORDS = frozenset("""
+a an and are as at be by can for from has have how in into is it its of on or that the their
+this to using via what when which with within without latest recent advances new based towards
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and single characters removed"""
+    return [t for t in re.findall(r"[a-z0-9]+", (text or "").lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class LexicalPreRanker:
+    """
+    CPU-only BM25 pre-ranking of candidate papers against the research question.
+    Title terms are weighted above abstract (`summary`) terms. Papers scoring far below
+    the best candidate are pruned and the rest are returned best first, so the LLM
+    relevance stage only spends tokens on promising papers.
+    """
+
+    def __init__(self, cutoff: Optional[float] = None, min_keep: Optional[int] = None,
+                 title_weight: int = 2, k1: float = 1.5, b: float = 0.75):
+        self.cutoff = cutoff if cutoff is not None else CONFIG["prerank_cutoff"]
+        self.min_keep = min_keep if min_keep is not None else CONFIG["prerank_min_keep"]
+        self.title_weight = title_weight
+        self.k1 = k1
+        self.b = b
+
+    def score(self, question: str, papers: List[Dict[str, Any]]) -> np.ndarray:
+        """BM25 score of every paper for the question terms"""
+        terms = sorted(set(tokenize(question)))
+        if not terms or not papers:
+            return np.zeros(len(papers))
+
+        tf, doc_len = self._tf_matrix(terms, papers)
+
+        n_docs = len(papers)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+        avg_len = doc_len.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+        weighted = tf * (self.k1 + 1) / (tf + norm[:, None])
+        return weighted @ idf
+
+    def _tf_matrix(self, terms: List[str], papers: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Counts of each question term per paper (papers x terms) and the paper lengths in tokens"""
+        term_index = {term: i for i, term in enumerate(terms)}
+        doc_len = np.zeros(len(papers))
+        rows: List[int] = []
+        cols: List[int] = []
+        for row, paper in enumerate(papers):
+            tokens = tokenize(paper.get("summary", "")) + tokenize(paper.get("title", "")) * self.title_weight
+            doc_len[row] = len(tokens)
+            hits = [term_index[t] for t in tokens if t in term_index]
+            rows.extend([row] * len(hits))
+            cols.extend(hits)
+        tf = np.zeros((len(papers), len(terms)))
+        np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1)
+        return tf, doc_len
+
+    def rank(self, question: str, papers: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Return the kept papers best first, plus pruning statistics"""
+        scores = self.score(question, papers)
+        order = np.argsort(-scores, kind="stable")
+        best = float(scores[order[0]]) if len(order) else 0.0
+
+        keep = scores >= self.cutoff * best
+        keep[order[:self.min_keep]] = True
+        kept = [papers[i] for i in order if keep[i]]
+
+        stats = {
+            "candidates": len(papers),
+            "kept": len(kept),
+            "pruned": len(papers) - len(kept),
+            "best_score": round(best, 3),
+        }
+        return kept, stats
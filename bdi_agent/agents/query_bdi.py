@@ -1,19 +1,56 @@
 import json
-import asyncio
-import os
-from datetime import datetime
-import agentspeak as asp
 from spade_bdi.bdi import BDIAgent
 
 from services.gemini import GeminiLLMService
+from services.http_client import PooledHTTPMixin
+from agents.transport import TransportMixin
+from agents.belief_retention import BeliefRetentionMixin
+from agents.reasoning_loop import EventDrivenReasoningMixin
+from agents.bdi_actions import ActionBehaviour, add_async_action, add_belief, add_payload_actions
 from utils.logger import logger
+from utils.payload_store import handle_term, payload_store
 from config import CONFIG
 from models import MessageType
 from spade.message import Message
-from spade.behaviour import CyclicBehaviour, OneShotBehaviour
+from spade.behaviour import CyclicBehaviour
 from spade.template import Template
 
-class QueryConstructionBDIAgent(BDIAgent):
+SEARCH_QUERIES_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "search_queries": {
+            "type": "ARRAY",
+            "minItems": 1,
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "query": {"type": "STRING"},
+                    "explanation": {"type": "STRING"}
+                },
+                "required": ["query", "explanation"]
+            }
+        },
+        "rationale": {"type": "STRING"}
+    },
+    "required": ["search_queries", "rationale"]
+}
+
+
+def with_fallback(search_params, question):
+    """Use the research question itself when the LLM gave no usable search parameters"""
+    if not search_params:
+        logger.error(f"Failed to parse valid search parameters from LLM response")
+        search_params = {
+            "search_queries": [
+                {"query": question, "explanation": "Using original query as fallback"}
+            ],
+            "rationale": "Fallback to original query due to processing issues",
+        }
+    search_params["research_question"] = question
+    return search_params
+
+
+class QueryConstructionBDIAgent(EventDrivenReasoningMixin, BeliefRetentionMixin, TransportMixin, PooledHTTPMixin, BDIAgent):
     """
     BDI version of QueryConstructionAgent with simplified implementation.
     """
@@ -21,7 +58,8 @@ class QueryConstructionBDIAgent(BDIAgent):
     class SPADEToBDIBehaviour(CyclicBehaviour):
         """Bridge between SPADE messages and BDI beliefs"""
         async def run(self):
-            msg = await self.receive(timeout=0.01)
+            # Sleep on the mailbox until a message arrives instead of polling every 10 ms
+            msg = await self.receive(timeout=CONFIG["timeout"])
             if not msg:
                 return
                 
@@ -33,221 +71,126 @@ class QueryConstructionBDIAgent(BDIAgent):
                     research_question = data.get("research_question", "")
                     if research_question:
                         logger.info(f"QueryConstructionBDIAgent received research query: {research_question}")
-                        # Add a behavior to handle this query instead of using BDI actions
-                        b = self.agent.GenerateSearchQueriesBehaviour(research_question)
-                        self.agent.add_behaviour(b)
-                        # Also set belief for BDI integration
-                        self.agent.bdi.set_belief("new_query", research_question)
+                        # The ASL plans take it from here
+                        add_belief(self.agent, "new_query", msg.thread or "", research_question)
                 
                 elif msg_type == MessageType.REFINED_QUERY:
                     research_question = data.get("research_question", "")
                     previous_results = data.get("previous_results", [])
                     logger.info(f"QueryConstructionBDIAgent received refined query request: {research_question}")
-                    # Add a behavior to handle this refinement
-                    b = self.agent.GenerateRefinedQueriesBehaviour(research_question, previous_results)
-                    self.agent.add_behaviour(b)
-                    # Also set belief for BDI integration
-                    self.agent.bdi.set_belief("refined_query", research_question, json.dumps(previous_results))
+                    handle = payload_store.put(previous_results, size=len(msg.body))
+                    add_belief(self.agent, "refined_query", msg.thread or "", research_question, handle_term(handle))
                 
             except Exception as e:
                 logger.error(f"Error in SPADEToBDIBehaviour of QueryConstructionBDIAgent: {str(e)}")
 
-    class GenerateSearchQueriesBehaviour(OneShotBehaviour):
-        """Behavior to generate and send search queries for a research question"""
-        def __init__(self, question):
-            super().__init__()
-            self.question = question
+    class GenerateSearchQueriesBehaviour(ActionBehaviour):
+        """Runs .create_search_queries: generates search parameters for a research question"""
+        stage = "query_construction"
+        done = "search_params_ready"
+        
+        async def perform(self, question, domain, num_queries):
+            logger.info(f"Generating {num_queries} {domain} search queries for: {question}")
             
-        async def run(self):
-            try:
-                logger.info(f"Generating search queries for: {self.question}")
-                
-                # Determine search parameters based on complexity
-                domain = "scientific"
-                num_queries = 3
-                
-                # Initialize LLM service
-                llm_service = GeminiLLMService(CONFIG["gemini_api_key"])
-                
-                # Create the prompt
-                prompt = f"""
-                I need to search for academic papers on arXiv related to the following research question:
-                "{self.question}"
-                
-                Please create efficient arXiv search parameters to find the most relevant papers.
-                Generate exactly {num_queries} different search queries using arXiv search syntax.
-                
-                Return the response as a valid JSON object with the following structure:
-                {{
-                    "search_queries": [
-                        {{
-                            "query": "first optimized arXiv query",
-                            "explanation": "why this query is appropriate"
-                        }},
-                        {{
-                            "query": "second optimized arXiv query",
-                            "explanation": "why this query is appropriate"
-                        }},
-                        {{
-                            "query": "third optimized arXiv query",
-                            "explanation": "why this query is appropriate"
-                        }}
-                    ],
-                    "rationale": "explanation of the overall query strategy"
-                }}
-                """
-                
-                # Call the LLM
-                logger.info("Calling Gemini LLM for search query generation")
-                response = await llm_service.generate_content(prompt)
-                logger.info(f"Received response from Gemini LLM")
-                
-                # Parse the response
-                try:
-                    search_params = json.loads(response)
-                except json.JSONDecodeError:
-                    # Try to extract JSON with regex if direct parsing fails
-                    import re
-                    json_match = re.search(r'```(?:json)?\s*(.*?)```', response, re.DOTALL)
-                    if json_match:
-                        try:
-                            search_params = json.loads(json_match.group(1))
-                        except json.JSONDecodeError:
-                            search_params = None
-                    else:
-                        try:
-                            start_idx = response.find('{')
-                            end_idx = response.rfind('}') + 1
-                            if start_idx >= 0 and end_idx > 0:
-                                json_str = response[start_idx:end_idx]
-                                search_params = json.loads(json_str)
-                            else:
-                                search_params = None
-                        except (json.JSONDecodeError, ValueError):
-                            search_params = None
-                
-                # Validate parsed parameters
-                if not search_params or "search_queries" not in search_params:
-                    logger.error(f"Failed to parse valid search parameters from LLM response")
-                    search_params = {
-                        "search_queries": [
-                            {"query": self.question, "explanation": "Using original query as fallback"}
-                        ],
-                        "rationale": "Fallback to original query due to processing issues",
-                    }
-                
-                # Add research question
-                search_params["research_question"] = self.question
-                
-                # Create and send message
-                msg = Message(to="search_agent@localhost")
-                msg.set_metadata("type", MessageType.SEARCH_PARAMS)
-                msg.body = json.dumps(search_params)
-                
-                await self.send(msg)
-                logger.info(f"Sent search parameters to SearchAgent")
-                
-            except Exception as e:
-                logger.error(f"Error generating search queries: {str(e)}")
+            # Initialize LLM service
+            llm_service = GeminiLLMService(CONFIG["gemini_api_key"])
+            
+            # Create the prompt
+            prompt = f"""
+            I need to search for academic papers on arXiv related to the following research question:
+            "{question}"
+            
+            Please create efficient arXiv search parameters to find the most relevant papers.
+            Generate exactly {num_queries} different search queries using arXiv search syntax.
+            
+            Return the response as a valid JSON object with the following structure:
+            {{
+                "search_queries": [
+                    {{
+                        "query": "first optimized arXiv query",
+                        "explanation": "why this query is appropriate"
+                    }},
+                    {{
+                        "query": "second optimized arXiv query",
+                        "explanation": "why this query is appropriate"
+                    }},
+                    {{
+                        "query": "third optimized arXiv query",
+                        "explanation": "why this query is appropriate"
+                    }}
+                ],
+                "rationale": "explanation of the overall query strategy"
+            }}
+            """
+            
+            # Call the LLM
+            logger.info("Calling Gemini LLM for search query generation")
+            search_params = await llm_service.generate_structured(prompt, SEARCH_QUERIES_SCHEMA, "search_queries")
+            logger.info(f"Received response from Gemini LLM")
+            
+            return question, handle_term(payload_store.put(with_fallback(search_params, question)))
 
-    class GenerateRefinedQueriesBehaviour(OneShotBehaviour):
-        """Behavior to generate and send refined search queries"""
-        def __init__(self, question, previous_results):
-            super().__init__()
-            self.question = question
-            self.previous_results = previous_results
+    class GenerateRefinedQueriesBehaviour(ActionBehaviour):
+        """Runs .create_refined_queries: generates refined search parameters"""
+        stage = "query_construction"
+        done = "refined_params_ready"
+        
+        async def perform(self, question, previous_results):
+            logger.info(f"Generating refined search queries for: {question}")
             
-        async def run(self):
-            try:
-                logger.info(f"Generating refined search queries for: {self.question}")
-                
-                # Initialize LLM service
-                llm_service = GeminiLLMService(CONFIG["gemini_api_key"])
-                
-                # Create the prompt
-                prompt = f"""
-                I need to refine a research query based on initial search results.
-                
-                Original Research Question: "{self.question}"
-                
-                Previous Results: {json.dumps(self.previous_results[:5], indent=2)}
-                
-                Please create improved arXiv search parameters to find more relevant papers.
-                Generate three different search queries using arXiv search syntax.
-                Include specific keywords, author filters, or category filters if appropriate.
-                
-                Return the response as a valid JSON object with the following structure:
-                {{
-                    "search_queries": [
-                        {{
-                            "query": "first optimized arXiv query",
-                            "explanation": "why this query is appropriate"
-                        }},
-                        {{
-                            "query": "second optimized arXiv query",
-                            "explanation": "why this query is appropriate"
-                        }},
-                        {{
-                            "query": "third optimized arXiv query",
-                            "explanation": "why this query is appropriate"
-                        }}
-                    ],
-                    "rationale": "explanation of the overall query strategy"
-                }}
-                """
-                
-                # Call the LLM
-                logger.info("Calling Gemini LLM for refined query generation")
-                response = await llm_service.generate_content(prompt)
-                logger.info(f"Received response from Gemini LLM")
-                
-                # Parse the response (same logic as above)
-                try:
-                    search_params = json.loads(response)
-                except json.JSONDecodeError:
-                    # Try to extract JSON with regex if direct parsing fails
-                    import re
-                    json_match = re.search(r'```(?:json)?\s*(.*?)```', response, re.DOTALL)
-                    if json_match:
-                        try:
-                            search_params = json.loads(json_match.group(1))
-                        except json.JSONDecodeError:
-                            search_params = None
-                    else:
-                        try:
-                            start_idx = response.find('{')
-                            end_idx = response.rfind('}') + 1
-                            if start_idx >= 0 and end_idx > 0:
-                                json_str = response[start_idx:end_idx]
-                                search_params = json.loads(json_str)
-                            else:
-                                search_params = None
-                        except (json.JSONDecodeError, ValueError):
-                            search_params = None
-                
-                # Validate parsed parameters
-                if not search_params or "search_queries" not in search_params:
-                    logger.error(f"Failed to parse valid search parameters from LLM response")
-                    search_params = {
-                        "search_queries": [
-                            {"query": self.question, "explanation": "Using original query as fallback"}
-                        ],
-                        "rationale": "Fallback to original query due to processing issues",
-                    }
-                
-                # Add research question
-                search_params["research_question"] = self.question
-                
-                # Create and send message
-                msg = Message(to="search_agent@localhost")
-                msg.set_metadata("type", MessageType.SEARCH_PARAMS)
-                msg.body = json.dumps(search_params)
-                
-                await self.send(msg)
-                logger.info(f"Sent refined search parameters to SearchAgent")
-                
-            except Exception as e:
-                logger.error(f"Error generating refined search queries: {str(e)}")
+            # Initialize LLM service
+            llm_service = GeminiLLMService(CONFIG["gemini_api_key"])
+            
+            # Create the prompt
+            prompt = f"""
+            I need to refine a research query based on initial search results.
+            
+            Original Research Question: "{question}"
+            
+            Previous Results: {json.dumps(previous_results[:5], indent=2)}
+            
+            Please create improved arXiv search parameters to find more relevant papers.
+            Generate three different search queries using arXiv search syntax.
+            Include specific keywords, author filters, or category filters if appropriate.
+            
+            Return the response as a valid JSON object with the following structure:
+            {{
+                "search_queries": [
+                    {{
+                        "query": "first optimized arXiv query",
+                        "explanation": "why this query is appropriate"
+                    }},
+                    {{
+                        "query": "second optimized arXiv query",
+                        "explanation": "why this query is appropriate"
+                    }},
+                    {{
+                        "query": "third optimized arXiv query",
+                        "explanation": "why this query is appropriate"
+                    }}
+                ],
+                "rationale": "explanation of the overall query strategy"
+            }}
+            """
+            
+            # Call the LLM
+            logger.info("Calling Gemini LLM for refined query generation")
+            search_params = await llm_service.generate_structured(prompt, SEARCH_QUERIES_SCHEMA, "refined_search_queries")
+            logger.info(f"Received response from Gemini LLM")
+            
+            return question, handle_term(payload_store.put(with_fallback(search_params, question)))
+
+    class SendSearchParamsBehaviour(ActionBehaviour):
+        """Runs .send_search_params: sends search parameters to the SearchAgent"""
+        stage = "query_construction"
+        
+        async def perform(self, search_params):
+            msg = Message(to="search_agent@localhost", thread=self.run_id)
+            msg.set_metadata("type", MessageType.SEARCH_PARAMS)
+            msg.body = json.dumps(search_params)
+            
+            await self.send(msg)
+            logger.info(f"Sent search parameters to SearchAgent")
 
     def __init__(self, jid, password, asl_file):
         super().__init__(jid, password, asl_file)
@@ -255,58 +198,12 @@ class QueryConstructionBDIAgent(BDIAgent):
         # Add SPADE to BDI bridge behavior
         template = Template()
         self.add_behaviour(self.SPADEToBDIBehaviour(), template)
+        self.start_belief_retention()
 
     def add_custom_actions(self, actions):
-        """Define minimal custom ASL actions"""
-        
-        @actions.add(".create_search_queries")
-        def _create_search_queries(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                question = asp.grounded(term.args[0], intention.scope)
-                domain = asp.grounded(term.args[1], intention.scope)
-                num_queries = asp.grounded(term.args[2], intention.scope)
-                
-                # Just log the request but actual work is done in the OneShotBehaviour
-                logger.info(f"BDI action .create_search_queries called for: {question}")
-                
-                # Create a temporary result to unify with
-                tmp = {"status": "processing"}
-                
-                # Unify with output variable
-                asp.unify(term.args[3], json.dumps(tmp), intention.scope, intention.stack)
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .create_search_queries action: {str(e)}")
-                yield False
-        
-        @actions.add(".create_refined_queries")
-        def _create_refined_queries(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                question = asp.grounded(term.args[0], intention.scope)
-                prev_results_json = asp.grounded(term.args[1], intention.scope)
-                
-                # Just log the request but actual work is done in the OneShotBehaviour
-                logger.info(f"BDI action .create_refined_queries called for: {question}")
-                
-                # Create a temporary result to unify with
-                tmp = {"status": "processing"}
-                
-                # Unify with output variable
-                asp.unify(term.args[2], json.dumps(tmp), intention.scope, intention.stack)
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .create_refined_queries action: {str(e)}")
-                yield False
-        
-        @actions.add(".send_search_params")
-        def _send_search_params(agent, term, intention):
-            """Simple placeholder for ASL compatibility"""
-            try:
-                # This just acknowledges the request since actual sending happens in the OneShotBehaviour
-                logger.info("BDI engine requested send_search_params")
-                yield True
-            except Exception as e:
-                logger.error(f"Error in .send_search_params action: {str(e)}")
-                yield False
\ No newline at end of file
+        """Custom ASL actions; each runs its behaviour and resumes the plan through a belief"""
+        add_async_action(self, actions, ".create_search_queries", self.GenerateSearchQueriesBehaviour)
+        add_async_action(self, actions, ".create_refined_queries", self.GenerateRefinedQueriesBehaviour)
+        add_async_action(self, actions, ".send_search_params", self.SendSearchParamsBehaviour)
+        add_payload_actions(actions)
+        self.add_retention_actions(actions)
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, Optional
+
+from spade.message import Message
+from spade_bdi.bdi import BDIAgent
+
+
+class EventDrivenReasoningMixin:
+    """
+    Replaces spade_bdi's reasoning behaviour, which polls its mailbox and runs a reasoning
+    step on every pass of the event loop even when there is nothing to reason about. This
+    one sleeps while every intention is finished or suspended and wakes when a belief or
+    goal reaches the reasoner (from Python or from a plan), a BDI message arrives, or the
+    earliest `.wait` deadline of a suspended intention passes.
+    """
+
+    class BDIBehaviour(BDIAgent.BDIBehaviour):
+        def __init__(self):
+            super().__init__()
+            self.wakeup = asyncio.Event()
+
+        def wake(self):
+            self.wakeup.set()
+
+        async def on_start(self):
+            # Beliefs from action results and belief GC reach the reasoner through call()
+            asp_agent = self.agent.bdi_agent
+            if asp_agent is None:
+                return
+            call = asp_agent.call
+
+            def waking_call(*args, **kwargs):
+                self.wake()
+                return call(*args, **kwargs)
+
+            asp_agent.call = waking_call
+
+        def set_belief(self, name: str, *args):
+            super().set_belief(name, *args)
+            self.wake()
+
+        def remove_belief(self, name: str, *args):
+            super().remove_belief(name, *args)
+            self.wake()
+
+        async def enqueue(self, message: Message) -> None:
+            await super().enqueue(message)
+            self.wake()
+
+        def kill(self, exit_code: Optional[Any] = None) -> None:
+            super().kill(exit_code)
+            self.wake()
+
+        def has_work(self) -> bool:
+            """A BDI message or buffered event is waiting, or an intention can take a step"""
+            if self.mailbox_size() or self.agent.bdi_intention_buffer:
+                return True
+            asp_agent = self.agent.bdi_agent
+            return any(
+                stack and (stack[-1].waiter is None or stack[-1].waiter.poll(asp_agent.env))
+                for stack in asp_agent.intentions
+            )
+
+        async def run(self):
+            # Cleared first, so a wake-up during this cycle makes the wait below return at once
+            self.wakeup.clear()
+            timeout = None
+            if self.agent.bdi_enabled:
+                # One message, the buffered events and one reasoning step, as spade_bdi does
+                await super().run()
+                if self.has_work():
+                    return
+                asp_agent = self.agent.bdi_agent
+                deadline = asp_agent.shortest_deadline()
+                if deadline is not None:
+                    timeout = max(0.0, deadline - asp_agent.env.time())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
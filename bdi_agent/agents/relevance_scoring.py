@@ -0,0 +1,142 @@
+import asyncio
+import json
+from typing import List, Dict, Any, Optional
+
+from services.gemini import GeminiLLMService
+from utils.concurrency import loop_semaphore
+from utils.logger import logger
+from utils.tokens import estimate_tokens
+from config import CONFIG
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """One limit shared by every scorer in the process, so concurrent questions cannot flood Gemini"""
+    return loop_semaphore("relevance_scoring", CONFIG["relevance_max_concurrency"])
+
+
+RELEVANCE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "papers": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "STRING"},
+                    "relevance_score": {"type": "NUMBER", "minimum": 0, "maximum": 10},
+                    "rationale": {"type": "STRING"}
+                },
+                "required": ["id", "relevance_score", "rationale"]
+            }
+        },
+        "should_refine_query": {"type": "BOOLEAN"},
+        "refinement_suggestion": {"type": "STRING"}
+    },
+    "required": ["papers", "should_refine_query", "refinement_suggestion"]
+}
+
+
+class RelevanceScorer:
+    """
+    Scores every candidate paper against a research question.
+    Candidates are split into batches that fit a token budget, the batches are scored
+    concurrently under a process-wide limit, and the per-batch JSON is merged into one
+    ranking as the batches finish.
+    """
+
+    def __init__(self, question: str, llm_service: Optional[GeminiLLMService] = None,
+                 batch_token_budget: Optional[int] = None, max_batch_size: Optional[int] = None):
+        self.question = question
+        self.llm_service = llm_service or GeminiLLMService(CONFIG["gemini_api_key"])
+        self.batch_token_budget = batch_token_budget or CONFIG["relevance_batch_tokens"]
+        self.max_batch_size = max_batch_size or CONFIG["relevance_batch_size"]
+
+    @staticmethod
+    def paper_entry(paper: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": paper.get("id"),
+            "title": paper.get("title"),
+            "abstract": paper.get("summary", ""),
+            "authors": paper.get("authors", [])[:3]
+        }
+
+    def make_batches(self, papers: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Greedily pack papers into batches bounded by token budget and batch size"""
+        batches, current, current_tokens = [], [], 0
+        for paper in papers:
+            tokens = estimate_tokens(self.paper_entry(paper))
+            if current and (current_tokens + tokens > self.batch_token_budget or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(paper)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def build_prompt(self, batch: List[Dict[str, Any]]) -> str:
+        return f"""
+                Evaluate the relevance of these research papers to the following question:
+
+                Research Question: "{self.question}"
+
+                Papers:
+                {json.dumps([self.paper_entry(p) for p in batch], separators=(",", ":"))}
+
+                For each paper, assess its relevance on a scale of 0-10.
+                Then return a valid JSON with this structure:
+                {{
+                    "papers": [
+                        {{
+                            "id": "paper_id",
+                            "relevance_score": 8.5,
+                            "rationale": "Brief explanation of relevance"
+                        }},
+                        ...
+                    ],
+                    "should_refine_query": true/false,
+                    "refinement_suggestion": "Suggested way to refine the query if needed"
+                }}
+                """
+
+    async def score_batch(self, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Score one batch with a single LLM call, falling back to default scores on failure"""
+        async with _get_semaphore():
+            try:
+                relevance_data = await self.llm_service.generate_structured(
+                    self.build_prompt(batch), RELEVANCE_SCHEMA, "relevance"
+                )
+            except Exception as e:
+                logger.error(f"Relevance scoring call failed: {str(e)}")
+                relevance_data = None
+
+        if not relevance_data:
+            logger.error("Failed to parse valid relevance data from LLM response")
+            relevance_data = {
+                "papers": [{"id": p.get("id"), "relevance_score": 5.0, "rationale": "Default score"} for p in batch],
+                "should_refine_query": False,
+                "refinement_suggestion": ""
+            }
+        return relevance_data
+
+    async def score_all(self, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Score every paper and merge the batches into one relevance result"""
+        batches = self.make_batches(papers)
+        logger.info(f"Scoring {len(papers)} papers in {len(batches)} batches")
+
+        merged = {"papers": [], "should_refine_query": False, "refinement_suggestion": ""}
+        refine_votes = 0
+        batch_count = 0
+        for next_done in asyncio.as_completed([self.score_batch(batch) for batch in batches]):
+            relevance_data = await next_done
+            batch_count += 1
+            merged["papers"].extend(relevance_data.get("papers", []))
+            if relevance_data.get("should_refine_query", False):
+                refine_votes += 1
+                if not merged["refinement_suggestion"]:
+                    merged["refinement_suggestion"] = relevance_data.get("refinement_suggestion", "")
+            logger.info(f"Scored batch {batch_count}: {len(merged['papers'])}/{len(papers)} papers so far")
+
+        # Refine only when most batches agree the query is off target
+        merged["should_refine_query"] = batch_count > 0 and refine_votes * 2 > batch_count
+        merged["papers"].sort(key=lambda p: p.get("relevance_score", 0), reverse=True)
+        return merged
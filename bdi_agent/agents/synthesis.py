@@ -1,89 +1,162 @@
 \
+import asyncio
 import json
 from pathlib import Path
 
 from spade.agent import Agent
-from spade.behaviour import OneShotBehaviour
 from spade.template import Template
 
+from utils.events import EventType, event_bus
 from utils.logger import logger
+from utils.tokens import estimate_tokens
 from config import CONFIG
 from models import MessageType
 from services.gemini import GeminiLLMService
+from services.http_client import PooledHTTPMixin
+from agents.transport import TransportMixin
+from agents.launcher import notify_launcher, report_failure
+from agents.worker import QueueWorkerMixin
 
 
-async def synthesize_analysis(analysis_content: dict, research_question: str) -> dict:
-    """
-    Synthesize analysis content using Gemini LLM to extract common themes, research gaps, and future work.
-    """
-    api_key = CONFIG.get("gemini_api_key")
-    if not api_key:
-        logger.error("GEMINI_API_KEY not found in config.")
-        return {"common_themes": "", "research_gaps": "", "suggested_future_work": "API key not configured."}
+SYNTHESIS_KEYS = ("common_themes", "research_gaps", "suggested_future_work")
 
-    gemini = GeminiLLMService(api_key)
 
-    prompt = (
-        "You are an expert research researcher in this field. "
-        "Given the following analysis of multiple research papers, identify: "
-        "1. Common themes and trends observed across the papers.\\n"
-        "2. Research gaps that emerge from the collective findings.\\n"
-        "3. Suggested future work or new research directions based on these gaps and themes.\\n"
-        f"The overarching research question for this literature review was: {research_question}\\n"
-        f"Analysis Content in the form of dictionary:\\n{json.dumps(analysis_content, indent=2)}\\n"
-        "Return a JSON object with keys: common_themes, research_gaps, suggested_future_work. "
-        "Be concise, comprehensive, provide important details, and insightful."
-    )
+SYNTHESIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "common_themes": {"type": "STRING"},
+        "research_gaps": {"type": "STRING"},
+        "suggested_future_work": {"type": "STRING"}
+    },
+    "required": list(SYNTHESIS_KEYS),
+    "propertyOrdering": list(SYNTHESIS_KEYS)
+}
 
+
+async def _request_synthesis(gemini: GeminiLLMService, prompt: str) -> dict:
+    """Send a synthesis prompt and return the validated report object"""
     generation_config = {
         "temperature": 0.4,
         "maxOutputTokens": 2048,
         "topP": 0.9,
-        "topK": 40,
-        "responseMimeType": "application/json",
-        "responseSchema": {
-            "type": "OBJECT",
-            "properties": {
-                "common_themes": {"type": "STRING"},
-                "research_gaps": {"type": "STRING"},
-                "suggested_future_work": {"type": "STRING"}
-            },
-            "propertyOrdering": ["common_themes", "research_gaps", "suggested_future_work"]
-        }
+        "topK": 40
     }
     try:
-        response = await gemini.generate_content(prompt, generation_config)
-        try:
-            result = json.loads(response)
-            return {
-                "common_themes": result.get("common_themes", ""),
-                "research_gaps": result.get("research_gaps", ""),
-                "suggested_future_work": result.get("suggested_future_work", "")
-            }
-        except Exception as e:
-            logger.warning(f"Failed to parse Gemini response for synthesis as JSON: {e}")
-            logger.debug(f"Gemini raw response for synthesis: {response}")
+        result = await gemini.generate_structured(prompt, SYNTHESIS_SCHEMA, "synthesis", generation_config)
+        if result is None:
+            logger.warning("Gemini returned no valid synthesis JSON")
             return {"common_themes": "", "research_gaps": "", "suggested_future_work": "Failed to parse LLM response."}
+        return {key: result.get(key, "") for key in SYNTHESIS_KEYS}
     except Exception as e:
         logger.error(f"Error calling Gemini for synthesis: {e}")
         return {"common_themes": "", "research_gaps": "", "suggested_future_work": "Error during LLM call."}
 
 
-class SynthesisAgent(Agent):
+def _papers_prompt(analysis_content: dict, research_question: str) -> str:
+    return (
+        "You are an expert research researcher in this field. "
+        "Given the following analysis of multiple research papers, identify: "
+        "1. Common themes and trends observed across the papers.\\n"
+        "2. Research gaps that emerge from the collective findings.\\n"
+        "3. Suggested future work or new research directions based on these gaps and themes.\\n"
+        f"The overarching research question for this literature review was: {research_question}\\n"
+        f"Analysis Content in the form of dictionary:\\n{json.dumps(analysis_content, separators=(',', ':'))}\\n"
+        "Return a JSON object with keys: common_themes, research_gaps, suggested_future_work. "
+        "Be concise, comprehensive, provide important details, and insightful."
+    )
+
+
+def _merge_prompt(partials: list, research_question: str) -> str:
+    return (
+        "You are an expert research researcher in this field. "
+        "Each of the following partial syntheses covers a different subset of the papers in one literature review. "
+        "Merge them into a single synthesis of the whole set: combine overlapping themes, keep distinct ones, "
+        "and keep the research gaps and suggested future work that the combined evidence supports.\\n"
+        f"The overarching research question for this literature review was: {research_question}\\n"
+        f"Partial syntheses:\\n{json.dumps(partials, separators=(',', ':'))}\\n"
+        "Return a JSON object with keys: common_themes, research_gaps, suggested_future_work. "
+        "Be concise, comprehensive, provide important details, and insightful."
+    )
+
+
+def _group_by_tokens(items: list, token_budget: int) -> list:
     """
-    Receives analysis results path from AnalysisAgent, reads the analysis,
-    synthesizes it using Gemini, and saves the final report.
+    Pack items, in order, into groups within the token budget. An item that exceeds the
+    budget on its own gets a group to itself. If no two items fit together, neighbours are
+    paired instead, so every level of the tree still has fewer groups than items.
     """
+    groups, current, current_tokens = [], [], 0
+    for item in items:
+        tokens = estimate_tokens(item)
+        if current and current_tokens + tokens > token_budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        if tokens > token_budget:
+            groups.append([item])
+            continue
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    if len(items) > 1 and len(groups) == len(items):
+        groups = [items[i:i + 2] for i in range(0, len(items), 2)]
+    return groups
+
+
+async def synthesize_analysis(analysis_content: dict, research_question: str) -> dict:
+    """
+    Synthesize analysis content using Gemini LLM to extract common themes, research gaps, and future work.
+    Analysis sets larger than one token budget are reduced as a tree: groups of papers are synthesized
+    concurrently, then partial syntheses are merged level by level until one report remains.
+    """
+    api_key = CONFIG.get("gemini_api_key")
+    if not api_key:
+        logger.error("GEMINI_API_KEY not found in config.")
+        return {"common_themes": "", "research_gaps": "", "suggested_future_work": "API key not configured."}
+
+    gemini = GeminiLLMService(api_key)
+    token_budget = CONFIG["synthesis_group_tokens"]
+
+    if estimate_tokens(analysis_content) <= token_budget:
+        return await _request_synthesis(gemini, _papers_prompt(analysis_content, research_question))
+
+    semaphore = asyncio.Semaphore(CONFIG["synthesis_concurrency"])
+
+    async def bounded(prompt):
+        async with semaphore:
+            return await _request_synthesis(gemini, prompt)
+
+    # Leaves: groups of paper analyses
+    groups = _group_by_tokens(list(analysis_content.items()), token_budget)
+    logger.info(f"Synthesizing {len(analysis_content)} paper analyses in {len(groups)} groups")
+    partials = await asyncio.gather(*(bounded(_papers_prompt(dict(group), research_question)) for group in groups))
 
-    class SynthesizeReportBehaviour(OneShotBehaviour):
-        async def run(self):
-            logger.info(f"{self.agent.jid}: Waiting for analysis results...")
-            msg = await self.receive(timeout=CONFIG["timeout"] * 2)
-            if not msg:
-                logger.warning(f"{self.agent.jid}: Timeout - no message received from AnalysisAgent")
-                return
+    # Inner nodes: merge partial syntheses until a single report remains
+    level = 1
+    while len(partials) > 1:
+        usable = [p for p in partials if any(p.get(key) for key in SYNTHESIS_KEYS[:2])]
+        partials = usable or partials[:1]
+        if len(partials) == 1:
+            break
+        groups = _group_by_tokens(partials, token_budget)
+        level += 1
+        logger.info(f"Synthesis level {level}: merging {len(partials)} partial syntheses in {len(groups)} groups")
+        partials = await asyncio.gather(*(bounded(_merge_prompt(group, research_question)) for group in groups))
 
+    return partials[0]
+
+
+class SynthesisAgent(QueueWorkerMixin, TransportMixin, PooledHTTPMixin, Agent):
+    """
+    Receives analysis results path from AnalysisAgent, reads the analysis,
+    synthesizes it using Gemini, and saves the final report. Requests wait in a
+    bounded queue and are served by a configurable number of workers.
+    """
+
+    class SynthesizeReportBehaviour(QueueWorkerMixin.WorkerBehaviour):
+        async def process(self, msg):
             logger.info(f"{self.agent.jid}: Received message from AnalysisAgent")
+            run_id = msg.thread
             try:
                 data = json.loads(msg.body)
                 folder_path_str = data["folder_path"]
@@ -95,6 +168,9 @@ class SynthesisAgent(Agent):
 
                 if not analysis_results_path.exists():
                     logger.error(f"{self.agent.jid}: Analysis results file not found at {analysis_results_path}")
+                    await report_failure(
+                        self, "synthesis", f"analysis results not found at {analysis_results_path}", run_id=run_id
+                    )
                     return
 
                 with open(analysis_results_path, "r", encoding="utf-8") as f:
@@ -113,19 +189,26 @@ class SynthesisAgent(Agent):
                 with open(final_report_path, "w", encoding="utf-8") as f:
                     json.dump(synthesis_output, f, indent=2)
                 logger.info(f"{self.agent.jid}: Saved final report to {final_report_path}")
+                event_bus.publish(
+                    EventType.REPORT_READY, run_id=run_id,
+                    folder_path=folder_path_str, report_path=str(final_report_path), report=synthesis_output
+                )
                 
                 logger.info(f"{self.agent.jid}: Literature review process completed. Final report at {final_report_path}")
+                await notify_launcher(
+                    self, MessageType.PIPELINE_COMPLETE, run_id=run_id,
+                    stage="synthesis", folder_path=folder_path_str, report_path=str(final_report_path)
+                )
 
             except Exception as e:
                 logger.error(f"{self.agent.jid}: Error in SynthesizeReportBehaviour: {str(e)}")
-
-        async def on_end(self):
-            logger.info(f"{self.agent.jid}: SynthesizeReportBehaviour has ended. Stopping the agent.")
-            await self.agent.stop()
+                await report_failure(self, "synthesis", e, run_id=run_id)
 
     async def setup(self):
         template = Template(metadata={"type": MessageType.ANALYSIS_READY})
-        behaviour = self.SynthesizeReportBehaviour()
-        self.add_behaviour(behaviour, template)
+        self.start_workers(
+            self.SynthesizeReportBehaviour, template,
+            concurrency=CONFIG["synthesis_workers"], queue_size=CONFIG["synthesis_queue_size"]
+        )
         logger.info("SynthesisAgent is ready")
 
@@ -0,0 +1,78 @@
+import time
+from typing import Any, Dict
+
+from spade.container import Container
+
+from utils.logger import logger
+from config import CONFIG
+
+
+class TransportStats:
+    """
+    Counts message hops by route. SPADE's container already hands a Message object
+    straight to the receiver's behaviour queues (template matching included) when the
+    receiver lives in this process, and only uses XMPP for other JIDs.
+    """
+
+    def __init__(self):
+        self.stats = {"local": 0, "xmpp": 0, "send_seconds": 0.0}
+        self._send = None
+
+    def install(self):
+        """
+        Wrap the container's send to count hops and time local deliveries. On the in-process
+        transport a message for a JID outside this process fails instead of being queued on
+        an unconnected XMPP client. The container is process-wide, so the owner of the agents
+        (the mesh) installs this on start and uninstalls it on stop.
+        """
+        if self._send is not None:
+            return
+        container = Container()
+        send = self._send = container.send
+
+        async def counted_send(msg, behaviour):
+            local = container.has_agent(str(msg.to))
+            if not local and CONFIG["transport"] == "local":
+                raise ConnectionError(f"{msg.to} is not in this process and {behaviour.agent.jid} has no XMPP connection")
+            started = time.perf_counter()
+            await send(msg, behaviour)
+            self.stats["local" if local else "xmpp"] += 1
+            if local:
+                self.stats["send_seconds"] += time.perf_counter() - started
+
+        container.send = counted_send
+
+    def uninstall(self):
+        """Restore the container's own send"""
+        if self._send is None:
+            return
+        Container().send = self._send
+        self._send = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        local = self.stats["local"]
+        return {
+            "mode": CONFIG["transport"],
+            "local_hops": local,
+            "xmpp_hops": self.stats["xmpp"],
+            "local_hop_us_avg": round(1e6 * self.stats["send_seconds"] / local, 2) if local else 0.0,
+        }
+
+
+transport_stats = TransportStats()
+
+
+class TransportMixin:
+    """
+    Agent mixin for the configured transport. Agents start and stop through SPADE's own
+    start()/stop() on either transport, so setup, behaviours and the start/stop hooks of the
+    other mixins always run. "xmpp" logs in to the XMPP server; "local" leaves the XMPP
+    client unconnected so a single-process mesh runs without a server.
+    """
+
+    async def _async_connect(self):
+        """The login step of Agent.start(); skipped on the in-process transport"""
+        if CONFIG["transport"] == "local":
+            logger.info(f"{self.jid} started on the in-process transport")
+            return
+        await super()._async_connect()
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any, Dict
+
+from spade.behaviour import CyclicBehaviour
+
+from utils.logger import logger
+from config import CONFIG
+
+
+class WorkQueue:
+    """
+    Bounded queue of requests in front of an agent's worker behaviours.
+    Senders in the same process can wait for capacity before sending, which is how
+    a busy stage pushes back on the stage feeding it.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._capacity = asyncio.Condition()
+        self.in_flight = 0
+        self.stats = {"received": 0, "processed": 0, "failed": 0, "max_depth": 0, "blocked_puts": 0}
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def has_capacity(self) -> bool:
+        return not self._queue.full()
+
+    async def put(self, item: Any):
+        if self._queue.full():
+            self.stats["blocked_puts"] += 1
+            logger.info(f"{self.name} work queue full ({self.maxsize}), holding new requests")
+        await self._queue.put(item)
+        self.stats["received"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+
+    async def get(self) -> Any:
+        item = await self._queue.get()
+        self.in_flight += 1
+        async with self._capacity:
+            self._capacity.notify_all()
+        return item
+
+    def done(self, failed: bool = False):
+        self.in_flight -= 1
+        self.stats["failed" if failed else "processed"] += 1
+        self._queue.task_done()
+
+    async def join(self):
+        """Wait until every queued request has been processed"""
+        await self._queue.join()
+
+    async def wait_for_capacity(self):
+        async with self._capacity:
+            await self._capacity.wait_for(self.has_capacity)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "depth": self.depth(), "in_flight": self.in_flight, "capacity": self.maxsize}
+
+
+# Work queues of the workers running in this process, by agent JID
+work_queues: Dict[str, WorkQueue] = {}
+
+
+async def wait_for_capacity(jid: str):
+    """Block a sender until the worker at `jid` can accept another request (no-op for remote agents)"""
+    queue = work_queues.get(jid)
+    if queue is not None and not queue.has_capacity():
+        logger.info(f"Waiting for capacity at {jid} (queue depth {queue.depth()})")
+        await queue.wait_for_capacity()
+
+
+def get_worker_stats() -> Dict[str, Dict[str, Any]]:
+    return {jid: queue.get_stats() for jid, queue in work_queues.items()}
+
+
+class QueueWorkerMixin:
+    """
+    Turns an agent into a multi-request worker: an intake behaviour moves matching
+    messages into a bounded WorkQueue and `concurrency` copies of a worker behaviour
+    process them. The worker behaviour implements `process(msg)`.
+    """
+
+    class IntakeBehaviour(CyclicBehaviour):
+        async def run(self):
+            msg = await self.receive(timeout=CONFIG["timeout"])
+            if msg:
+                # Blocks while the queue is full, leaving further requests in the mailbox
+                await self.agent.work_queue.put(msg)
+
+    class WorkerBehaviour(CyclicBehaviour):
+        def match(self, message) -> bool:
+            # Workers read from the work queue; without this every message would also pile up in their mailboxes
+            return False
+
+        async def run(self):
+            msg = await self.agent.work_queue.get()
+            failed = False
+            try:
+                await self.process(msg)
+            except Exception as e:
+                failed = True
+                logger.error(f"{self.agent.jid}: worker failed: {str(e)}")
+            finally:
+                self.agent.work_queue.done(failed)
+
+        async def process(self, msg):
+            raise NotImplementedError
+
+    def start_workers(self, worker_class, template, concurrency: int, queue_size: int):
+        """Create the work queue and add the intake and worker behaviours; call from setup()"""
+        self.work_queue = WorkQueue(str(self.jid), queue_size)
+        work_queues[str(self.jid)] = self.work_queue
+        self.add_behaviour(self.IntakeBehaviour(), template)
+        for _ in range(concurrency):
+            self.add_behaviour(worker_class())
+        logger.info(f"{self.jid} running {concurrency} workers with a queue of {queue_size}")
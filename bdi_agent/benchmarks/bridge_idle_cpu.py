@@ -0,0 +1,129 @@
+"""
+Idle CPU cost of the BDI agents in the real agent mesh.
+
+Starts the AgentMesh of main.py on the in-process transport, leaves it idle and reports
+process CPU use, passes through the BDI reasoning behaviours and the latency for an idle
+reasoner to pick up a new belief. Each mode runs in a fresh process: "spade_bdi" uses the
+stock reasoning behaviour, which polls and steps on every event-loop pass; "event-driven"
+uses the agents' own behaviour, which sleeps until a belief, message or deadline wakes it.
+
+    python benchmarks/bridge_idle_cpu.py --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+MODES = ("spade_bdi", "event-driven")
+
+
+async def measure(mode: str, seconds: float, probes: int) -> dict:
+    from spade_bdi.bdi import BDIAgent
+    from agents import AgentMesh
+    from agents.bdi_actions import add_belief
+    from agents.knowledge_bdi import KnowledgeAggregatorBDIAgent
+    from agents.query_bdi import QueryConstructionBDIAgent
+    from agents.relevant_bdi import RelevantBDIAgent
+
+    bdi_classes = (QueryConstructionBDIAgent, RelevantBDIAgent, KnowledgeAggregatorBDIAgent)
+    if mode == "spade_bdi":
+        for cls in bdi_classes:
+            cls.BDIBehaviour = BDIAgent.BDIBehaviour
+
+    mesh = AgentMesh()
+    bdi_agents = [agent for agent in mesh.agents if isinstance(agent, bdi_classes)]
+
+    # Count reasoning passes and remember when each agent last entered one
+    counters = {"passes": 0}
+    last_pass = {}
+    for agent in bdi_agents:
+        def counted(run=agent.bdi.run, jid=str(agent.jid)):
+            counters["passes"] += 1
+            last_pass[jid] = time.perf_counter()
+            return run()
+        agent.bdi.run = counted
+
+    await mesh.start()
+    await asyncio.sleep(1.0)
+
+    counters["passes"] = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    passes = counters["passes"]
+
+    # Latency from a belief added to an idle agent to its next reasoning pass
+    latencies = []
+    for i in range(probes):
+        await asyncio.sleep(0.05)
+        agent = bdi_agents[i % len(bdi_agents)]
+        added = time.perf_counter()
+        add_belief(agent, "benchmark_probe", f"probe-{i}")
+        while last_pass.get(str(agent.jid), 0.0) < added:
+            await asyncio.sleep(0)
+        latencies.append(last_pass[str(agent.jid)] - added)
+
+    await mesh.stop()
+    return {
+        "bdi_agents": len(bdi_agents),
+        "cpu_percent": 100 * cpu / wall,
+        "passes_per_second": passes / wall,
+        "latency_ms_median": 1000 * statistics.median(latencies),
+        "latency_ms_max": 1000 * max(latencies),
+    }
+
+
+def child(mode: str, seconds: float, probes: int):
+    # Must happen before the agents are imported: they read CONFIG at import time
+    from config import CONFIG
+    CONFIG["transport"] = "local"
+    result = asyncio.run(measure(mode, seconds, probes))
+    print(json.dumps(result))
+
+
+def run_child(mode: str, args) -> dict:
+    """Measure one mode in a fresh interpreter, so the modes cannot share agents or loop state"""
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode,
+         "--seconds", str(args.seconds), "--probes", str(args.probes)],
+        cwd=ROOT_DIR, env={**os.environ, "AGENT_TRANSPORT": "local"},
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"{mode} run exited with {process.returncode}:\n{process.stderr[-2000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="idle measurement window")
+    parser.add_argument("--probes", type=int, default=20, help="beliefs used to measure wake latency")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.seconds, args.probes)
+        return
+
+    results = {mode: run_child(mode, args) for mode in MODES}
+
+    agents = next(iter(results.values()))["bdi_agents"]
+    print(f"Idle agent mesh with {agents} BDI agents, {args.seconds:g}s window")
+    print(f"{'mode':<16}{'CPU %':>8}{'passes/s':>12}{'median ms':>12}{'max ms':>9}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<16}{r['cpu_percent']:>8.2f}{r['passes_per_second']:>12.1f}"
+            f"{r['latency_ms_median']:>12.3f}{r['latency_ms_max']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
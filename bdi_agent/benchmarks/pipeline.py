@@ -0,0 +1,291 @@
+"""
+End-to-end benchmark of the six-agent pipeline against local stand-ins.
+
+Starts the arXiv, Gemini and Jina stand-ins (benchmarks/standins.py) and, for each
+scenario, runs the agent mesh of main.py in a fresh process on the in-process transport,
+so neither API keys, network access nor an XMPP server are needed. Every scenario
+serves a corpus of N papers and reports per-stage latency percentiles, wall time, LLM
+calls and peak memory; the results are written as JSON for comparing runs.
+
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --scenarios 10 100 --runs 3 --gemini-latency 800 --gemini-error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+QUESTIONS = [
+    "What are the latest advances in quantum machine learning for drug discovery?",
+    "How are graph neural networks used to predict protein-ligand binding affinity?",
+    "Which generative models are used for molecular design and how are they evaluated?",
+    "What are the limitations of variational quantum circuits on noisy hardware?",
+]
+
+# Pipeline milestones in order; each stage ends at the last event of its type for the run
+STAGES = [
+    ("search", "search_done"),
+    ("relevance", "relevance_done"),
+    ("knowledge", "knowledge_ready"),
+    ("analysis", "analysis_done"),
+    ("synthesis", "report_ready"),
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, Any]:
+    """Nearest-rank p50/p90/p99 of a sample"""
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+    return {"n": len(ordered), "p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(ordered[-1], 3)}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process; conversion workers are not included"""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+# Child process: one scenario
+
+async def run_scenario(spec: Dict[str, Any]) -> Dict[str, Any]:
+    from agents import AgentMesh
+    from agents.launcher import new_run_id
+    from services.structured import structured_stats
+    from utils.events import EventType, event_bus
+    from utils.html_markdown import shutdown_conversion_pool
+
+    runs: Dict[str, Dict[str, Any]] = {}
+    subscription = event_bus.subscribe()
+
+    async def collect():
+        async for event in subscription:
+            run = runs.get(event.get("run_id"))
+            if run is None:
+                continue
+            if event["type"] == EventType.RELEVANCE_DONE and event.get("refine"):
+                run["refinements"] += 1
+                continue
+            run["events"][event["type"]] = event["time"]
+            if event["type"] == EventType.SEARCH_DONE:
+                run["results"] = event.get("results")
+            elif event["type"] == EventType.RELEVANCE_DONE:
+                run["relevant"] = event.get("relevant")
+            elif event["type"] == EventType.KNOWLEDGE_READY:
+                run["papers"] = event.get("papers")
+
+    collector = asyncio.create_task(collect())
+    mesh = AgentMesh()
+    started = time.perf_counter()
+    await mesh.start()
+    startup = time.perf_counter() - started
+
+    for i in range(spec["runs"]):
+        run_id = new_run_id()
+        runs[run_id] = {"start": time.time(), "events": {}, "refinements": 0}
+        outcome = await mesh.run(QUESTIONS[i % len(QUESTIONS)], run_id=run_id, timeout=spec["run_timeout"])
+        runs[run_id]["end"] = time.time()
+        runs[run_id]["status"] = outcome.get("status")
+    # Let the last events reach the collector
+    await asyncio.sleep(0.1)
+    wall = time.perf_counter() - started
+
+    await mesh.stop()
+    shutdown_conversion_pool()
+    collector.cancel()
+    subscription.close()
+
+    stages = {name: [] for name, _ in STAGES}
+    for run in runs.values():
+        previous = run["start"]
+        for name, event_type in STAGES:
+            if event_type not in run["events"]:
+                break
+            stages[name].append(run["events"][event_type] - previous)
+            previous = run["events"][event_type]
+
+    return {
+        "startup_seconds": round(startup, 3),
+        "wall_seconds": round(wall, 3),
+        "runs": [
+            {k: v for k, v in run.items() if k != "events"} | {"seconds": round(run["end"] - run["start"], 3)}
+            for run in runs.values()
+        ],
+        "stages": {name: values for name, values in stages.items()},
+        "structured_calls": structured_stats.get_stats(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def child(spec_path: str):
+    with open(spec_path, encoding="utf-8") as f:
+        spec = json.load(f)
+    # Must happen before the agents and services are imported: they read CONFIG at import time
+    from config import CONFIG
+    CONFIG.update(spec["config"])
+    result = asyncio.run(run_scenario(spec))
+    with open(spec["output"], "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# Orchestrator
+
+async def run_child(papers: int, args, services, workdir: str) -> Dict[str, Any]:
+    """Run one scenario in a fresh interpreter whose working directory is `workdir`"""
+    os.symlink(os.path.join(ROOT_DIR, "asl"), os.path.join(workdir, "asl"))
+    spec = {
+        "runs": args.runs,
+        "run_timeout": args.run_timeout,
+        "output": os.path.join(workdir, "result.json"),
+        "config": {
+            "transport": "local",
+            "max_results": papers,
+            "arxiv_request_interval": 0.0,
+            "llm_cache_enabled": False,
+            "gemini_api_key": "benchmark",
+            "jina_api_key": "benchmark",
+            "local_html_conversion": args.conversion == "local",
+        },
+    }
+    spec_path = os.path.join(workdir, "spec.json")
+    with open(spec_path, "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+
+    log_path = os.path.join(workdir, "pipeline.log")
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "--child", spec_path,
+            cwd=workdir, env={**os.environ, **services.environment(), "AGENT_TRANSPORT": "local"},
+            stdout=log, stderr=asyncio.subprocess.STDOUT,
+        )
+        await process.wait()
+    if process.returncode != 0 or not os.path.exists(spec["output"]):
+        with open(log_path, encoding="utf-8") as f:
+            tail = "".join(f.readlines()[-20:])
+        raise RuntimeError(f"{papers}-paper scenario exited with {process.returncode}:\n{tail}")
+    with open(spec["output"], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def summarize(papers: int, result: Dict[str, Any], stand_ins: Dict[str, Any]) -> Dict[str, Any]:
+    runs = result["runs"]
+    completed = [run for run in runs if run["status"] == "completed"]
+    llm_calls = sum(stand_ins["llm_calls"].values())
+    return {
+        "papers": papers,
+        "runs": len(runs),
+        "completed": len(completed),
+        "wall_seconds": result["wall_seconds"],
+        "startup_seconds": result["startup_seconds"],
+        "run_seconds": percentiles([run["seconds"] for run in completed]),
+        "stage_seconds": {name: percentiles(values) for name, values in result["stages"].items()},
+        "llm_calls": llm_calls,
+        "llm_calls_per_run": round(llm_calls / len(runs), 1) if runs else 0.0,
+        "llm_calls_by_kind": stand_ins["llm_calls"],
+        "structured_calls": result["structured_calls"],
+        "requests": stand_ins["requests"],
+        "injected_errors": stand_ins["errors"],
+        "peak_rss_mb": result["peak_rss_mb"],
+        "run_details": runs,
+    }
+
+
+async def orchestrate(args) -> Dict[str, Any]:
+    from benchmarks.standins import LatencyProfile, StandInServices, SyntheticCorpus
+
+    profile = lambda ms, error_rate: LatencyProfile(ms, args.sigma, error_rate)
+    services = StandInServices(
+        SyntheticCorpus(0, args.seed),
+        arxiv=profile(args.arxiv_latency, args.arxiv_error_rate),
+        gemini=profile(args.gemini_latency, args.gemini_error_rate),
+        jina=profile(args.jina_latency, args.jina_error_rate),
+        pages=profile(args.page_latency, 0.0),
+        relevant_rate=args.relevant_rate,
+        refine_rate=args.refine_rate,
+        seed=args.seed,
+    )
+    runner = await services.start()
+    scenarios = []
+    try:
+        for papers in args.scenarios:
+            services.corpus = SyntheticCorpus(papers, args.seed)
+            services.reset()
+            print(f"Running {papers}-paper scenario ({args.runs} runs)...", flush=True)
+            with tempfile.TemporaryDirectory(prefix=f"pipeline_bench_{papers}_") as workdir:
+                result = await run_child(papers, args, services, workdir)
+            scenarios.append(summarize(papers, result, services.snapshot()))
+    finally:
+        await runner.cleanup()
+
+    return {
+        "benchmark": "pipeline",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("child", "output")},
+        "scenarios": scenarios,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    stage_names = [name for name, _ in STAGES]
+    print(f"{'papers':>7}{'done':>6}{'run p50 s':>11}{'run p90 s':>11}"
+          + "".join(f"{name[:9] + ' p50':>14}" for name in stage_names)
+          + f"{'LLM/run':>9}{'RSS MB':>8}")
+    for scenario in report["scenarios"]:
+        run = scenario["run_seconds"]
+        stages = scenario["stage_seconds"]
+        print(
+            f"{scenario['papers']:>7}{scenario['completed']:>3}/{scenario['runs']:<2}"
+            f"{run.get('p50', float('nan')):>11.2f}{run.get('p90', float('nan')):>11.2f}"
+            + "".join(f"{stages[name].get('p50', float('nan')):>14.2f}" for name in stage_names)
+            + f"{scenario['llm_calls_per_run']:>9}{scenario['peak_rss_mb']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, nargs="+", default=[10, 100, 1000], help="papers per scenario")
+    parser.add_argument("--runs", type=int, default=5, help="research questions per scenario, run one after another")
+    parser.add_argument("--run-timeout", type=float, default=900, help="seconds before a run counts as timed out")
+    parser.add_argument("--conversion", choices=["local", "jina"], default="local", help="HTML to markdown path")
+    parser.add_argument("--arxiv-latency", type=float, default=300, help="median arXiv response time (ms)")
+    parser.add_argument("--gemini-latency", type=float, default=1000, help="median Gemini response time (ms)")
+    parser.add_argument("--jina-latency", type=float, default=500, help="median Jina response time (ms)")
+    parser.add_argument("--page-latency", type=float, default=100, help="median paper page response time (ms)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="log-normal spread of response times")
+    parser.add_argument("--arxiv-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--jina-error-rate", type=float, default=0.0)
+    parser.add_argument("--relevant-rate", type=float, default=0.3, help="share of papers scored as relevant")
+    parser.add_argument("--refine-rate", type=float, default=0.0, help="share of relevance calls asking for a refined query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/pipeline_<time>.json)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    report = asyncio.run(orchestrate(args))
+    output = args.output or os.path.join(BENCH_DIR, "results", f"pipeline_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Local stand-ins for the external services the pipeline calls, served by one aiohttp app:
+
+    GET  /arxiv/api/query                      arXiv API: synthetic Atom feed
+    GET  /abs/{id}, /html/{id}                 arXiv abstract and HTML paper pages
+    POST /gemini/models/{model}:generateContent  Gemini generateContent
+    GET  /jina/{url}                           Jina Reader markdown
+
+Gemini answers are generated from the request's responseSchema, so every structured call
+site gets valid output; paper ids found in the prompt are echoed back so relevance scores
+refer to real candidates. Each service has its own latency distribution and error rate.
+"""
+import asyncio
+import json
+import random
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+WORDS = (
+    "quantum learning molecular graph neural network kernel variational circuit drug discovery "
+    "protein binding affinity generative model dataset benchmark transformer embedding docking "
+    "optimization sampling simulation chemistry representation classical hybrid encoding feature "
+    "noise hardware scalability accuracy inference training evaluation ligand target screening"
+).split()
+
+# arXiv ids of the synthetic papers quoted in a prompt
+ID_PATTERN = re.compile(r'"id":\s*"(\d{4}\.\d{5}v\d+)"')
+
+
+class LatencyProfile:
+    """Log-normal response time around `median_ms`, failing with `error_status` at `error_rate`"""
+
+    def __init__(self, median_ms: float = 0.0, sigma: float = 0.5, error_rate: float = 0.0, error_status: int = 503):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms / 1000 * rng.lognormvariate(0, self.sigma)
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+
+class SyntheticCorpus:
+    """Deterministic papers 0..size-1; every query sees the whole corpus in its own order"""
+
+    def __init__(self, size: int, seed: int = 0, abstract_words: int = 180, sections: int = 8):
+        self.size = size
+        self.seed = seed
+        self.abstract_words = abstract_words
+        self.sections = sections
+
+    @staticmethod
+    def paper_id(index: int) -> str:
+        return f"2401.{index:05d}v1"
+
+    @staticmethod
+    def index_of(paper_id: str) -> int:
+        return int(paper_id.split(".")[-1].split("v")[0])
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(zlib.crc32(repr((self.seed,) + key).encode("utf-8")))
+
+    def text(self, rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def paper(self, index: int) -> Dict[str, Any]:
+        rng = self._rng("paper", index)
+        return {
+            "id": self.paper_id(index),
+            "title": self.text(rng, 8).rstrip(".").title(),
+            "summary": self.text(rng, self.abstract_words),
+            "authors": [f"Author {rng.randint(1, 500)}" for _ in range(rng.randint(1, 6))],
+        }
+
+    def ranking(self, query: str) -> List[int]:
+        order = list(range(self.size))
+        self._rng("query", query).shuffle(order)
+        return order
+
+    def sections_of(self, index: int) -> List[tuple]:
+        rng = self._rng("body", index)
+        return [(f"Section {n + 1}", [self.text(rng, 120) for _ in range(4)]) for n in range(self.sections)]
+
+
+class StandInServices:
+    """
+    The stand-in HTTP services over one synthetic corpus. `relevant_rate` is the share of
+    papers scored above the relevance threshold and `refine_rate` how often the relevance
+    call asks for a refined query. Counters record requests, injected errors and LLM calls
+    by call site (the first property of the response schema).
+    """
+
+    def __init__(self, corpus: SyntheticCorpus, arxiv: LatencyProfile, gemini: LatencyProfile,
+                 jina: LatencyProfile, pages: Optional[LatencyProfile] = None,
+                 relevant_rate: float = 0.3, refine_rate: float = 0.0, seed: int = 0):
+        self.corpus = corpus
+        self.profiles = {"arxiv": arxiv, "gemini": gemini, "jina": jina, "pages": pages or LatencyProfile()}
+        self.relevant_rate = relevant_rate
+        self.refine_rate = refine_rate
+        self.rng = random.Random(seed)
+        self.base_url = ""
+        self.counters: Dict[str, Any] = {}
+        self.reset()
+
+    def reset(self):
+        self.counters = {"requests": {}, "errors": {}, "llm_calls": {}}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return json.loads(json.dumps(self.counters))
+
+    def _count(self, group: str, key: str):
+        self.counters[group][key] = self.counters[group].get(key, 0) + 1
+
+    async def _gate(self, service: str) -> Optional[web.Response]:
+        """Apply the service's latency; returns an error response when the request should fail"""
+        self._count("requests", service)
+        profile = self.profiles[service]
+        await asyncio.sleep(profile.delay(self.rng))
+        if profile.fails(self.rng):
+            self._count("errors", service)
+            return web.Response(status=profile.error_status, text=f"{service} stand-in error")
+        return None
+
+    # arXiv
+
+    async def arxiv_query(self, request: web.Request) -> web.Response:
+        error = await self._gate("arxiv")
+        if error:
+            return error
+        query = request.query.get("search_query", "")
+        start = int(request.query.get("start", 0))
+        max_results = int(request.query.get("max_results", 10))
+        indices = self.corpus.ranking(query)[start:start + max_results]
+        entries = "".join(self._atom_entry(self.corpus.paper(i)) for i in indices)
+        feed = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            f"<title>ArXiv Query: {escape(query)}</title>"
+            f"<opensearch:totalResults>{self.corpus.size}</opensearch:totalResults>"
+            f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+            f"{entries}</feed>"
+        )
+        return web.Response(text=feed, content_type="application/atom+xml")
+
+    def _atom_entry(self, paper: Dict[str, Any]) -> str:
+        authors = "".join(f"<author><name>{escape(a)}</name></author>" for a in paper["authors"])
+        return (
+            f"<entry><id>http://arxiv.org/abs/{paper['id']}</id>"
+            f"<published>2024-01-01T00:00:00Z</published>"
+            f"<title>{escape(paper['title'])}</title><summary>{escape(paper['summary'])}</summary>{authors}"
+            f'<link href="{self.base_url}/abs/{paper["id"]}" rel="alternate" type="text/html"/>'
+            f'<link title="pdf" href="{self.base_url}/pdf/{paper["id"]}" rel="related" type="application/pdf"/>'
+            f'<category term="quant-ph"/></entry>'
+        )
+
+    # Paper pages
+
+    async def abstract_page(self, request: web.Request) -> web.Response:
+        error = await self._gate("pages")
+        if error:
+            return error
+        paper = self.corpus.paper(self.corpus.index_of(request.match_info["paper_id"]))
+        return web.Response(text=f"<html><body><h1>{escape(paper['title'])}</h1></body></html>", content_type="text/html")
+
+    async def html_page(self, request: web.Request) -> web.Response:
+        error = await self._gate("pages")
+        if error:
+            return error
+        index = self.corpus.index_of(request.match_info["paper_id"])
+        paper = self.corpus.paper(index)
+        body = "".join(
+            f"<section><h2>{escape(title)}</h2>" + "".join(f"<p>{escape(p)}</p>" for p in paragraphs) + "</section>"
+            for title, paragraphs in self.corpus.sections_of(index)
+        )
+        html = (
+            f"<html><head><title>{escape(paper['title'])}</title></head><body><article>"
+            f"<h1>{escape(paper['title'])}</h1><div class='abstract'><p>{escape(paper['summary'])}</p></div>"
+            f"{body}</article></body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    # Jina Reader
+
+    async def jina(self, request: web.Request) -> web.Response:
+        error = await self._gate("jina")
+        if error:
+            return error
+        index = self.corpus.index_of(request.match_info["target"].rstrip("/").split("/")[-1])
+        paper = self.corpus.paper(index)
+        sections = "\n\n".join(
+            f"## {title}\n\n" + "\n\n".join(paragraphs) for title, paragraphs in self.corpus.sections_of(index)
+        )
+        markdown = f"Title: {paper['title']}\n\nMarkdown Content:\n# {paper['title']}\n\n## Abstract\n\n{paper['summary']}\n\n{sections}"
+        return web.Response(text=markdown, content_type="text/plain")
+
+    # Gemini
+
+    async def gemini(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        schema = (payload.get("generationConfig") or {}).get("responseSchema")
+        kind = next(iter(schema.get("properties", {})), "object") if schema else "text"
+        self._count("llm_calls", kind)
+        error = await self._gate("gemini")
+        if error:
+            return error
+        if schema:
+            text = json.dumps(self._instance(schema, ID_PATTERN.findall(prompt), None))
+        else:
+            text = self.corpus.text(self.rng, 120)
+        return web.json_response({
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4},
+        })
+
+    def _instance(self, schema: Dict[str, Any], prompt_ids: List[str], name: Optional[str]) -> Any:
+        """A value that satisfies `schema`; field names steer the content a little"""
+        rng = self.rng
+        kind = schema.get("type", "STRING").upper()
+        if "enum" in schema:
+            return rng.choice(schema["enum"])
+        if kind == "OBJECT":
+            properties = schema.get("properties", {})
+            return {key: self._instance(sub, prompt_ids, key) for key, sub in properties.items()}
+        if kind == "ARRAY":
+            items = schema.get("items", {"type": "STRING"})
+            if prompt_ids and "id" in items.get("properties", {}):
+                values = []
+                for paper_id in prompt_ids:
+                    value = self._instance(items, [], None)
+                    value["id"] = paper_id
+                    values.append(value)
+                return values
+            count = max(schema.get("minItems", 0), 3)
+            return [self._instance(items, prompt_ids, name) for _ in range(count)]
+        if kind in ("NUMBER", "INTEGER"):
+            low, high = schema.get("minimum", 0), schema.get("maximum", 10)
+            if name == "relevance_score":
+                value = rng.uniform(8, high) if rng.random() < self.relevant_rate else rng.uniform(low, 5)
+            else:
+                value = rng.uniform(low, high)
+            return int(round(value)) if kind == "INTEGER" else round(value, 2)
+        if kind == "BOOLEAN":
+            if name == "should_refine_query":
+                return rng.random() < self.refine_rate
+            return rng.random() < 0.5
+        if name == "query":
+            return " AND ".join(f"all:{rng.choice(WORDS)}" for _ in range(2))
+        return self.corpus.text(rng, 12)
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_get("/arxiv/api/query", self.arxiv_query)
+        app.router.add_get("/abs/{paper_id}", self.abstract_page)
+        app.router.add_get("/html/{paper_id}", self.html_page)
+        app.router.add_post("/gemini/models/{model}", self.gemini)
+        app.router.add_get("/jina/{target:.*}", self.jina)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> web.AppRunner:
+        """Serve the stand-ins; sets `base_url` to the bound address"""
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return runner
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point the pipeline's services at these stand-ins"""
+        return {
+            "ARXIV_API_URL": f"{self.base_url}/arxiv/api/query",
+            "GEMINI_API_URL": f"{self.base_url}/gemini",
+            "JINA_READER_URL": f"{self.base_url}/jina",
+        }
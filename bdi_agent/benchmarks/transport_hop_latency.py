@@ -0,0 +1,97 @@
+"""
+Latency of one message hop between two SPADE agents.
+
+Two agents play ping-pong with pipeline-sized message bodies. With the in-process
+transport no XMPP server is needed; with --transport xmpp both agents log in to the
+server on localhost (e.g. `pyjabber`) so the hop includes the socket round trip.
+
+    python benchmarks/transport_hop_latency.py --hops 2000
+    AGENT_TRANSPORT=xmpp python benchmarks/transport_hop_latency.py --hops 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spade.agent import Agent  # noqa: E402
+from spade.behaviour import CyclicBehaviour  # noqa: E402
+from spade.message import Message  # noqa: E402
+from spade.template import Template  # noqa: E402
+
+from agents.transport import TransportMixin, transport_stats  # noqa: E402
+from config import CONFIG  # noqa: E402
+
+
+class EchoAgent(TransportMixin, Agent):
+    """Sends every ping straight back"""
+
+    class Echo(CyclicBehaviour):
+        async def run(self):
+            msg = await self.receive(timeout=CONFIG["timeout"])
+            if msg:
+                await self.send(Message(to=str(msg.sender), body=msg.body, metadata={"type": "pong"}))
+
+    async def setup(self):
+        self.add_behaviour(self.Echo(), Template(metadata={"type": "ping"}))
+
+
+class PingAgent(TransportMixin, Agent):
+    """Times round trips to the echo agent"""
+
+    class Collect(CyclicBehaviour):
+        async def run(self):
+            msg = await self.receive(timeout=CONFIG["timeout"])
+            if msg:
+                self.agent.pongs.put_nowait(time.perf_counter())
+
+    async def setup(self):
+        self.pongs = asyncio.Queue()
+        self.sender = self.Collect()
+        self.add_behaviour(self.sender, Template(metadata={"type": "pong"}))
+
+    async def round_trip(self, to: str, body: str) -> float:
+        started = time.perf_counter()
+        await self.sender.send(Message(to=to, body=body, metadata={"type": "ping"}))
+        return await self.pongs.get() - started
+
+
+async def measure(hops: int, body_bytes: int) -> dict:
+    echo = EchoAgent("bench_echo@localhost", "password")
+    ping = PingAgent("bench_ping@localhost", "password")
+    transport_stats.install()
+    await asyncio.gather(echo.start(), ping.start())
+    body = "x" * body_bytes
+    try:
+        for _ in range(min(50, hops)):
+            await ping.round_trip("bench_echo@localhost", body)
+        # Half a round trip is one hop
+        hop_us = sorted([1e6 * await ping.round_trip("bench_echo@localhost", body) / 2 for _ in range(hops)])
+    finally:
+        await asyncio.gather(echo.stop(), ping.stop())
+        transport_stats.uninstall()
+    return {
+        "transport": CONFIG["transport"],
+        "hops": hops,
+        "body_bytes": body_bytes,
+        "hop_us_median": round(statistics.median(hop_us), 1),
+        "hop_us_p99": round(hop_us[int(0.99 * (len(hop_us) - 1))], 1),
+        "send_us_avg": transport_stats.get_stats()["local_hop_us_avg"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hops", type=int, default=2000, help="timed round trips")
+    parser.add_argument("--body-bytes", type=int, default=4096, help="message body size")
+    args = parser.parse_args()
+    if "AGENT_TRANSPORT" not in os.environ:
+        CONFIG["transport"] = "local"
+    print(asyncio.run(measure(args.hops, args.body_bytes)))
+
+
+if __name__ == "__main__":
+    main()
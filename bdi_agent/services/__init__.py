@@ -1,7 +1,20 @@
 from services.gemini import GeminiLLMService
 from services.arXiv import ArxivService
+from services.llm_cache import LLMResponseCache, llm_cache
+from services.http_client import HTTPClientRegistry, PooledHTTPMixin, http_clients
+from services.structured import StructuredOutputStats, structured_stats
+from services.blob_store import BlobStore, blob_store
 
 __all__ = [
     "GeminiLLMService",
-    "ArxivService"
+    "ArxivService",
+    "LLMResponseCache",
+    "llm_cache",
+    "HTTPClientRegistry",
+    "PooledHTTPMixin",
+    "http_clients",
+    "StructuredOutputStats",
+    "structured_stats",
+    "BlobStore",
+    "blob_store"
 ]
\ No newline at end of file
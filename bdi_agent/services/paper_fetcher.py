@@ -0,0 +1,100 @@
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from services.http_client import http_clients
+from utils.concurrency import loop_semaphore
+from utils.html_markdown import convert_html
+from utils.logger import logger
+from config import CONFIG
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    """Per-host limit shared by every fetcher in the process"""
+    return loop_semaphore(("fetch_host", urlparse(url).netloc), CONFIG["fetch_per_host_concurrency"])
+
+
+def abstract_markdown(paper: Dict[str, Any]) -> str:
+    """Minimal markdown document holding just the title and abstract of a paper"""
+    abstract = paper.get("summary") or paper.get("abstract") or "No abstract available."
+    return f"# {paper.get('title', 'Untitled')}\n\n## Abstract\n\n{abstract}"
+
+
+class PaperContentFetcher:
+    """
+    Asynchronous retrieval of full-text paper content.
+    Finds an HTML rendering of the paper (arxiv.org/html, then ar5iv) and converts it
+    to markdown, locally in a worker process or through the Jina Reader API. Requests
+    go through the pooled "papers" client, are limited per host, and every stage has
+    its own timeout.
+    """
+
+    def __init__(self):
+        self.jina_api_key = CONFIG.get("jina_api_key")
+        self.probe_timeout = CONFIG["fetch_probe_timeout"]
+        self.jina_timeout = CONFIG["fetch_jina_timeout"]
+
+    async def _get(self, url: str, timeout: float, headers: Optional[dict] = None) -> Tuple[int, str]:
+        """GET a URL under its host's concurrency limit; returns (status, body)"""
+        session = http_clients.get_session("papers")
+        async with _host_semaphore(url):
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                return response.status, await response.text()
+
+    async def find_html_url(self, page_url: str) -> Optional[Tuple[str, str]]:
+        """Return (url, html) for the first HTML rendering of the paper that is available"""
+        arxiv_html_url = page_url.replace("abs", "html")
+        ar5iv_url = page_url.replace("arxiv.org", "ar5iv.org")
+
+        for candidate in (arxiv_html_url, ar5iv_url):
+            try:
+                logger.info(f"Checking availability of {candidate}")
+                status, body = await self._get(candidate, self.probe_timeout)
+                if status == 200:
+                    return candidate, body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Error checking paper URL {candidate}: {e}")
+        return None
+
+    async def fetch_jina_markdown(self, html_url: str) -> Optional[str]:
+        """Convert an HTML paper to markdown with the Jina Reader API"""
+        jina_url = f"{CONFIG['jina_reader_url']}/{html_url}"
+        headers = {"Authorization": f"Bearer {self.jina_api_key}"}
+        try:
+            logger.info(f"Fetching markdown from Jina API: {jina_url}")
+            status, body = await self._get(jina_url, self.jina_timeout, headers=headers)
+            if status == 200:
+                return body
+            logger.warning(f"Jina Reader API failed for {html_url}: {status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Error fetching markdown for {html_url}: {e}")
+        return None
+
+    async def fetch_markdown(self, paper: Dict[str, Any], priority: str = "fulltext") -> Optional[Tuple[str, str]]:
+        """
+        Fetch the content of one paper as (markdown, source).
+        The HTML downloaded by the availability probe is converted locally; Jina is only
+        asked when local conversion is disabled or yields too little text. Returns None
+        when no HTML version exists and falls back to the abstract when the full text
+        cannot be converted or is not wanted.
+        """
+        found = await self.find_html_url(paper.get("page_url", ""))
+        if not found:
+            return None
+        html_url, html = found
+
+        if priority == "fulltext":
+            if CONFIG["local_html_conversion"]:
+                try:
+                    markdown = await convert_html(html)
+                    if len(markdown) >= CONFIG["local_conversion_min_chars"]:
+                        return markdown, "local"
+                    logger.info(f"Local conversion of {html_url} produced too little text, trying Jina")
+                except Exception as e:
+                    logger.warning(f"Local HTML conversion failed for {html_url}: {e}")
+            if self.jina_api_key:
+                markdown = await self.fetch_jina_markdown(html_url)
+                if markdown:
+                    return markdown, "jina"
+        return abstract_markdown(paper), "abstract"
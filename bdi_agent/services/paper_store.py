@@ -0,0 +1,136 @@
+import asyncio
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from utils.logger import logger
+from config import CONFIG
+
+
+class PaperStore:
+    """
+    Global store of converted paper content shared by every knowledge base.
+    Entries are keyed by versioned arXiv id and indexed in SQLite; knowledge base
+    folders receive hardlinks to the stored files instead of fresh copies. Once the
+    store grows past its size bound the least recently used entries are evicted
+    (knowledge bases that link to them keep their copy). File and SQLite work runs
+    in a worker thread so the fetchers keep the event loop.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or CONFIG["paper_store_path"]
+        self.max_bytes = max_bytes or CONFIG["paper_store_max_bytes"]
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(paper_id: str) -> str:
+        return re.sub(r"[^A-Za-z0-9._-]", "_", paper_id or "")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                "key TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, "
+                "source TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_accessed ON papers(accessed)")
+            self._conn.commit()
+        return self._conn
+
+    async def get(self, paper_id: str) -> Optional[str]:
+        """Path of the stored content for a paper, or None if it is not in the store"""
+        return await asyncio.to_thread(self._get, paper_id)
+
+    async def put(self, paper_id: str, content: str, source: str) -> str:
+        """Store content for a paper and return its path"""
+        return await asyncio.to_thread(self._put, paper_id, content, source)
+
+    async def link_into(self, paper_id: str, destination: str) -> bool:
+        """Hardlink the stored content for a paper to `destination`; returns False on a store miss"""
+        return await asyncio.to_thread(self._link_into, paper_id, destination)
+
+    def _get(self, paper_id: str) -> Optional[str]:
+        key = self._key(paper_id)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT path FROM papers WHERE key = ?", (key,)).fetchone()
+            if row is not None and os.path.exists(row[0]):
+                conn.execute("UPDATE papers SET accessed = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.stats["hits"] += 1
+                return row[0]
+            if row is not None:
+                # The file vanished behind our back; forget the entry
+                conn.execute("DELETE FROM papers WHERE key = ?", (key,))
+                conn.commit()
+            self.stats["misses"] += 1
+            return None
+
+    def _put(self, paper_id: str, content: str, source: str) -> str:
+        key = self._key(paper_id)
+        path = os.path.join(self.root, "objects", f"{key}.md")
+        with self._lock:
+            conn = self._connect()
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO papers (key, path, size, source, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, path, os.path.getsize(path), source, now, now),
+            )
+            conn.commit()
+            self.stats["stores"] += 1
+            self._evict(conn, keep=key)
+        return path
+
+    def _link_into(self, paper_id: str, destination: str) -> bool:
+        path = self._get(paper_id)
+        if path is None:
+            return False
+        try:
+            os.link(path, destination)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Different filesystem or no hardlink support: fall back to a copy
+            shutil.copyfile(path, destination)
+        return True
+
+    def _evict(self, conn: sqlite3.Connection, keep: str):
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM papers").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT key, path, size FROM papers WHERE key != ? ORDER BY accessed ASC", (keep,)
+        ).fetchall()
+        for key, path, size in rows:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM papers WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted {key} from paper store")
+        conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM papers").fetchone()
+        return {**self.stats, "entries": count, "bytes": total}
+
+
+paper_store = PaperStore()
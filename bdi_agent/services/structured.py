@@ -0,0 +1,123 @@
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_TYPE_CHECKS = {
+    "OBJECT": lambda v: isinstance(v, dict),
+    "ARRAY": lambda v: isinstance(v, list),
+    "STRING": lambda v: isinstance(v, str),
+    "NUMBER": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "INTEGER": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "BOOLEAN": lambda v: isinstance(v, bool),
+}
+
+
+def extract_json(response: str) -> Optional[Any]:
+    """Extract a JSON value from an LLM response, tolerating code fences and surrounding text"""
+    try:
+        return json.loads(response)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    json_match = re.search(r'```(?:json)?\s*(.*?)```', response or "", re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            return None
+    start_idx = (response or "").find('{')
+    end_idx = (response or "").rfind('}') + 1
+    if start_idx >= 0 and end_idx > 0:
+        try:
+            return json.loads(response[start_idx:end_idx])
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Check a parsed value against a Gemini response schema; returns a list of errors (empty when valid)"""
+    expected = schema.get("type", "").upper()
+    check = _TYPE_CHECKS.get(expected)
+    if value is None:
+        return [] if schema.get("nullable") else [f"{path}: expected {expected}, got null"]
+    if check and not check(value):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if expected in ("NUMBER", "INTEGER"):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path}: {value} is below the minimum {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path}: {value} is above the maximum {schema['maximum']}")
+    elif expected == "ARRAY":
+        if "minItems" in schema and len(value) < int(schema["minItems"]):
+            errors.append(f"{path}: expected at least {schema['minItems']} items, got {len(value)}")
+        item_schema = schema.get("items")
+        if item_schema:
+            for i, item in enumerate(value):
+                errors.extend(validate(item, item_schema, f"{path}[{i}]"))
+    elif expected == "OBJECT":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required key '{key}'")
+        for key, prop_schema in properties.items():
+            if key in value:
+                errors.extend(validate(value[key], prop_schema, f"{path}.{key}"))
+    return errors
+
+
+def parse_structured(response: str, schema: Dict[str, Any]) -> Tuple[Optional[Any], List[str]]:
+    """Parse and validate an LLM response; returns (value, errors) where value is None unless it is valid"""
+    value = extract_json(response)
+    if value is None:
+        return None, ["response is not valid JSON"]
+    errors = validate(value, schema)
+    return (None, errors) if errors else (value, [])
+
+
+def repair_prompt(response: str, schema: Dict[str, Any], errors: List[str], max_chars: int = 6000) -> str:
+    """Prompt asking the model to fix its own output instead of redoing the whole task"""
+    return (
+        "The following output was supposed to be a JSON object matching the schema below, "
+        "but it failed validation.\n"
+        f"Schema:\n{json.dumps(schema, separators=(',', ':'))}\n"
+        f"Validation errors:\n" + "\n".join(f"- {e}" for e in errors[:10]) + "\n"
+        f"Output:\n{(response or '')[:max_chars]}\n"
+        "Return only the corrected JSON object. Keep all content that is already valid; "
+        "complete truncated values briefly and fill missing keys with sensible values."
+    )
+
+
+class StructuredOutputStats:
+    """Per call site counters of structured LLM calls and how their output had to be recovered"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, outcome: str):
+        """Count one call; outcome is "valid", "repaired", "failed" or "error" """
+        with self._lock:
+            site = self._sites.setdefault(name, {"calls": 0, "valid": 0, "repaired": 0, "failed": 0, "error": 0})
+            site["calls"] += 1
+            site[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for name, site in self._sites.items():
+                answered = site["calls"] - site["error"]
+                stats[name] = {
+                    **site,
+                    "parse_failure_rate": round((site["repaired"] + site["failed"]) / answered, 3) if answered else 0.0,
+                    "final_failure_rate": round(site["failed"] / answered, 3) if answered else 0.0,
+                }
+            return stats
+
+
+structured_stats = StructuredOutputStats()
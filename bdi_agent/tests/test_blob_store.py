@@ -0,0 +1,37 @@
+import asyncio
+import importlib
+
+import pytest
+
+from services.blob_store import BlobStore, check_in, check_out, claim_count, is_claim
+
+# `services.blob_store` as an attribute is the shared instance re-exported by the package
+blob_store_module = importlib.import_module("services.blob_store")
+
+
+def test_claim_check_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store_module, "blob_store", BlobStore(path=str(tmp_path / "blobs.sqlite3")))
+    papers = [{"id": f"2401.{i:05d}v1", "title": "Quantum Kernels"} for i in range(20)]
+
+    async def scenario():
+        claim = await check_in(papers, min_bytes=100)
+        return claim, await check_out(claim)
+
+    claim, loaded = asyncio.run(scenario())
+    assert is_claim(claim) and claim_count(claim) == 20
+    assert loaded == papers
+
+
+def test_small_payloads_stay_inline():
+    async def scenario():
+        inline = await check_in(["a"], min_bytes=1024)
+        return inline, await check_out(inline)
+
+    assert asyncio.run(scenario()) == (["a"], ["a"])
+
+
+def test_missing_blob_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store_module, "blob_store", BlobStore(path=str(tmp_path / "blobs.sqlite3")))
+    claim = {"claim_check": {"sha256": "0" * 64, "size": 2, "count": 0}}
+    with pytest.raises(LookupError):
+        asyncio.run(check_out(claim))
@@ -0,0 +1,36 @@
+import asyncio
+
+from utils.concurrency import loop_semaphore
+
+
+async def contend(key, limit, tasks):
+    """Run more tasks than the limit allows, so waiters bind the semaphore to this loop"""
+    running = peak = 0
+
+    async def task():
+        nonlocal running, peak
+        async with loop_semaphore(key, limit):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+    await asyncio.gather(*(task() for _ in range(tasks)))
+    return peak
+
+
+def test_limit_holds_within_a_loop():
+    assert asyncio.run(contend("test_limit", 2, 8)) == 2
+
+
+def test_semaphore_survives_later_event_loops():
+    # A module-level semaphore raised "bound to a different event loop" on the second run
+    assert asyncio.run(contend("test_runs", 2, 8)) == 2
+    assert asyncio.run(contend("test_runs", 2, 8)) == 2
+
+
+def test_same_key_is_shared_within_a_loop():
+    async def scenario():
+        return loop_semaphore("test_shared", 3) is loop_semaphore("test_shared", 3)
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,66 @@
+from agents.dedup import SearchResultDeduplicator, normalize_title, strip_version
+
+
+def paper(arxiv_id, title, query="q1", explanation=""):
+    return {"id": arxiv_id, "title": title, "query": query, "query_explanation": explanation}
+
+
+def test_helpers():
+    assert strip_version("2401.01234v2") == "2401.01234"
+    assert normalize_title("  Quantum-Kernel  Methods: A Survey! ") == "quantum kernel methods a survey"
+
+
+def test_near_duplicate_titles_merge():
+    dedup = SearchResultDeduplicator(similarity_threshold=0.8)
+    assert dedup.add(paper("2401.00001v1", "Variational Quantum Circuits for Molecular Property Prediction"))
+    # Re-submission under a new id with light punctuation and case edits
+    assert not dedup.add(paper("2402.00002v1", "Variational quantum circuits for molecular property prediction.", "q2"))
+
+    results = dedup.results()
+    assert len(results) == 1
+    assert results[0]["duplicate_ids"] == ["2402.00002v1"]
+    assert dedup.get_stats()["near_duplicates"] == 1
+
+
+def test_exact_duplicates_across_versions_merge():
+    dedup = SearchResultDeduplicator()
+    dedup.extend([
+        paper("2401.00001v1", "Graph Neural Networks for Docking"),
+        paper("2401.00001v2", "Graph Neural Networks for Docking (revised)", "q2"),
+    ])
+    assert len(dedup.results()) == 1
+    assert dedup.get_stats()["exact_duplicates"] == 1
+
+
+def test_distinct_papers_survive():
+    dedup = SearchResultDeduplicator()
+    titles = [
+        "Variational Quantum Circuits for Molecular Property Prediction",
+        "Graph Neural Networks for Protein Ligand Binding Affinity",
+        "Diffusion Models for De Novo Drug Design",
+        "Quantum Kernel Methods on Noisy Intermediate-Scale Hardware",
+    ]
+    dedup.extend([paper(f"2401.0000{i}v1", title) for i, title in enumerate(titles)])
+
+    assert [r["title"] for r in dedup.results()] == titles
+    stats = dedup.get_stats()
+    assert stats["unique"] == 4
+    assert stats["dedup_ratio"] == 0.0
+
+
+def test_metadata_is_merged_into_first_record():
+    dedup = SearchResultDeduplicator()
+    dedup.extend([
+        paper("2401.00001v1", "Diffusion Models for De Novo Drug Design", "q1", "generative"),
+        paper("2401.00001v2", "Diffusion Models for De Novo Drug Design", "q2", "design"),
+        # Same query twice adds no second provenance entry
+        paper("2401.00001v1", "Diffusion Models for De Novo Drug Design", "q1", "generative"),
+    ])
+
+    (record,) = dedup.results()
+    assert record["id"] == "2401.00001v1"
+    assert record["matched_queries"] == [
+        {"query": "q1", "explanation": "generative"},
+        {"query": "q2", "explanation": "design"},
+    ]
+    assert record["duplicate_ids"] == ["2401.00001v2"]
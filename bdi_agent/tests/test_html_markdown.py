@@ -0,0 +1,21 @@
+from utils.html_markdown import html_to_markdown
+
+
+def test_self_closing_void_tag_keeps_nav_skipped():
+    html = '<nav><img src="logo.png"/> Back to arXiv <a href="/">Home</a></nav><p>Body text</p>'
+    markdown = html_to_markdown(html)
+    assert "Back to arXiv" not in markdown
+    assert "Home" not in markdown
+    assert "Body text" in markdown
+
+
+def test_self_closing_br_keeps_header_skipped():
+    markdown = html_to_markdown("<header><br/><span>Report issue</span></header><p>Abstract</p>")
+    assert "Report issue" not in markdown
+    assert "Abstract" in markdown
+
+
+def test_self_closing_br_outside_skipped_region_still_breaks_line():
+    markdown = html_to_markdown("<p>first<br/>second</p>")
+    assert "first" in markdown and "second" in markdown
+    assert "firstsecond" not in markdown
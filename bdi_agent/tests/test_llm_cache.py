@@ -0,0 +1,62 @@
+import asyncio
+import importlib
+import types
+
+from services.llm_cache import LLMResponseCache
+
+# `services.llm_cache` as an attribute is the shared instance re-exported by the package
+llm_cache_module = importlib.import_module("services.llm_cache")
+
+
+def make_cache(tmp_path, **kwargs) -> LLMResponseCache:
+    return LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), **kwargs)
+
+
+def freeze_time(monkeypatch, start: float = 1000.0):
+    """Replace the clock seen by the cache module; returns a one-item list holding "now" """
+    now = [start]
+    monkeypatch.setattr(llm_cache_module, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = freeze_time(monkeypatch)
+    cache = make_cache(tmp_path, ttl=60)
+    asyncio.run(cache.put("k", "response"))
+
+    now[0] += 59
+    assert asyncio.run(cache.get("k")) == "response"
+
+    now[0] += 2
+    assert asyncio.run(cache.get("k")) is None
+    # The expired row is gone from disk as well, so a fresh cache misses too
+    assert asyncio.run(make_cache(tmp_path, ttl=60).get("k")) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    asyncio.run(make_cache(tmp_path).put("k", "response"))
+
+    # A new instance starts with an empty memory tier over the same SQLite file
+    cache = make_cache(tmp_path)
+    assert asyncio.run(cache.get("k")) == "response"
+    assert asyncio.run(cache.get("k")) == "response"
+
+    stats = cache.get_stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["memory_size"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, memory_entries=2)
+
+    async def fill():
+        for key in ("a", "b", "c"):
+            await cache.put(key, key.upper())
+
+    asyncio.run(fill())
+    assert list(cache._memory) == ["b", "c"]
+    # "a" is still on disk and comes back through the SQLite tier
+    assert asyncio.run(cache.get("a")) == "A"
+    assert cache.get_stats()["disk_hits"] == 1
@@ -0,0 +1,33 @@
+import asyncio
+import os
+
+from services.paper_store import PaperStore
+
+
+def test_put_then_link_into_knowledge_folder(tmp_path):
+    store = PaperStore(root=str(tmp_path / "store"), max_bytes=1024)
+    destination = str(tmp_path / "2401.00001v1.md")
+
+    async def scenario():
+        assert await store.link_into("2401.00001v1", destination) is False
+        await store.put("2401.00001v1", "# Quantum Kernels", "html")
+        return await store.link_into("2401.00001v1", destination)
+
+    assert asyncio.run(scenario()) is True
+    with open(destination, encoding="utf-8") as f:
+        assert f.read() == "# Quantum Kernels"
+    assert (store.stats["hits"], store.stats["misses"]) == (1, 1)
+
+
+def test_put_evicts_least_recently_used(tmp_path):
+    store = PaperStore(root=str(tmp_path), max_bytes=10)
+
+    async def scenario():
+        first = await store.put("old", "a" * 8, "html")
+        await store.put("new", "b" * 8, "html")
+        return first, await store.get("old"), await store.get("new")
+
+    first, old, new = asyncio.run(scenario())
+    assert old is None and new is not None
+    assert not os.path.exists(first)
+    assert store.get_stats()["evictions"] == 1
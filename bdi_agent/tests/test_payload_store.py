@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from utils.payload_store import PayloadStore, handle_id, handle_term
+
+
+def test_put_measures_serialized_size():
+    store = PayloadStore()
+    papers = [{"id": "2401.00001v1", "title": "Quantum Kernels"}, {"id": "2401.00002v1", "title": "VQE"}]
+
+    handle = store.put(papers)
+
+    assert handle.count == 2
+    assert handle.size == len(json.dumps(papers, separators=(",", ":")))
+    assert store.get_stats()["live_bytes"] == handle.size
+
+
+def test_explicit_size_is_kept():
+    store = PayloadStore()
+    handle = store.put({"research_question": "q"}, size=123)
+    assert handle.size == 123
+
+
+def test_last_release_frees_bytes():
+    store = PayloadStore()
+    handle = store.put(["a", "b"], refs=1)
+    store.retain(handle.id)
+
+    store.release(handle.id)
+    assert store.get(handle.id) == ["a", "b"]
+
+    store.release(handle.id)
+    stats = store.get_stats()
+    assert store.get(handle.id) is None
+    assert (stats["live"], stats["live_bytes"], stats["freed"]) == (0, 0, 1)
+    assert stats["peak_bytes"] == handle.size
+
+
+def test_handle_term_round_trip():
+    handle = PayloadStore().put([1, 2, 3])
+    assert handle_id(handle_term(handle)) == handle.id
+
+
+def test_lazy_payload_is_loaded_on_first_load():
+    store = PayloadStore()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return ["a", "b"]
+
+    handle = store.put_lazy(loader, 2, size=10)
+    assert store.get(handle.id) is None
+
+    async def scenario():
+        return await store.load(handle.id), await store.load(handle.id)
+
+    assert asyncio.run(scenario()) == (["a", "b"], ["a", "b"])
+    assert store.get(handle.id) == ["a", "b"]
+    assert len(calls) == 1
@@ -0,0 +1,52 @@
+import numpy as np
+
+from agents.prerank import LexicalPreRanker, tokenize
+
+QUESTION = "quantum machine learning for drug discovery"
+
+
+def paper(title, summary=""):
+    return {"title": title, "summary": summary}
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The latest advances in a quantum-ML model") == ["quantum", "ml", "model"]
+
+
+def test_rank_orders_by_term_overlap():
+    papers = [
+        paper("Protein folding with transformers", "Structure prediction of proteins."),
+        paper("Quantum machine learning for drug discovery", "Quantum learning methods for discovery of drugs."),
+        paper("Machine learning for drug discovery", "Classical learning for drug screening."),
+        paper("Quantum error correction codes", "Surface codes on superconducting hardware."),
+    ]
+    ranker = LexicalPreRanker(cutoff=0.0, min_keep=0)
+    kept, stats = ranker.rank(QUESTION, papers)
+
+    assert [p["title"] for p in kept[:2]] == [papers[1]["title"], papers[2]["title"]]
+    assert kept[-1] is papers[0]
+    assert stats["candidates"] == 4
+
+
+def test_title_terms_outweigh_abstract_terms():
+    in_title = paper("Drug discovery", "An overview.")
+    in_abstract = paper("An overview", "Drug discovery.")
+    kept, _ = LexicalPreRanker(cutoff=0.0, min_keep=0).rank("drug discovery", [in_abstract, in_title])
+    assert kept[0] is in_title
+
+
+def test_cutoff_prunes_weak_matches_but_keeps_min_keep():
+    papers = [paper("Quantum drug discovery"), paper("Unrelated topic"), paper("Another unrelated topic")]
+    kept, stats = LexicalPreRanker(cutoff=0.5, min_keep=0).rank(QUESTION, papers)
+    assert kept == [papers[0]]
+    assert stats["pruned"] == 2
+
+    kept, _ = LexicalPreRanker(cutoff=0.5, min_keep=2).rank(QUESTION, papers)
+    assert len(kept) == 2
+
+
+def test_tf_matrix_counts_weighted_title_terms():
+    ranker = LexicalPreRanker(title_weight=2)
+    tf, doc_len = ranker._tf_matrix(["drug", "quantum"], [paper("Quantum drug", "quantum quantum"), paper("", "")])
+    np.testing.assert_array_equal(tf, [[2, 4], [0, 0]])
+    np.testing.assert_array_equal(doc_len, [6, 0])
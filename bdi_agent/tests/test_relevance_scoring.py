@@ -0,0 +1,51 @@
+import asyncio
+import re
+
+from agents.relevance_scoring import RelevanceScorer
+
+
+class FakeLLM:
+    """Scores each paper by its position and votes to refine for every batch but the first"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_structured(self, prompt, schema, name, generation_config=None):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(0.01 * (3 - call))  # later batches finish first
+        ids = re.findall(r'"id":"([^"]+)"', prompt)
+        return {
+            "papers": [{"id": i, "relevance_score": float(i.split("-")[1]), "rationale": ""} for i in ids],
+            "should_refine_query": call > 1,
+            "refinement_suggestion": f"suggestion {call}",
+        }
+
+
+def papers(n):
+    return [{"id": f"p-{i}", "title": f"Paper {i}", "summary": "abstract", "authors": []} for i in range(n)]
+
+
+def test_score_all_merges_every_batch():
+    llm = FakeLLM()
+    scorer = RelevanceScorer("q", llm_service=llm, batch_token_budget=10_000, max_batch_size=4)
+
+    merged = asyncio.run(scorer.score_all(papers(10)))
+
+    assert llm.calls == 3
+    assert [p["id"] for p in merged["papers"]] == [f"p-{i}" for i in reversed(range(10))]
+    # Two of three batches voted to refine
+    assert merged["should_refine_query"] is True
+    assert merged["refinement_suggestion"].startswith("suggestion")
+
+
+def test_failed_batch_falls_back_to_default_scores():
+    class FailingLLM:
+        async def generate_structured(self, *args, **kwargs):
+            return None
+
+    scorer = RelevanceScorer("q", llm_service=FailingLLM(), max_batch_size=5)
+    merged = asyncio.run(scorer.score_all(papers(3)))
+
+    assert {p["relevance_score"] for p in merged["papers"]} == {5.0}
+    assert merged["should_refine_query"] is False
@@ -0,0 +1,61 @@
+import asyncio
+
+import agents.synthesis as synthesis
+from agents.synthesis import _group_by_tokens
+from config import CONFIG
+from utils.tokens import estimate_tokens
+
+
+def text(tokens: int) -> str:
+    """A string that estimate_tokens counts as `tokens` tokens"""
+    return "x" * (4 * (tokens - 1))
+
+
+def test_items_within_budget_share_a_group():
+    items = [text(10), text(10), text(10)]
+    assert _group_by_tokens(items, 100) == [items]
+
+
+def test_groups_split_at_the_budget():
+    items = [text(40), text(40), text(40), text(40)]
+    assert _group_by_tokens(items, 80) == [items[:2], items[2:]]
+    # One token short: no two items fit together, so neighbours are paired and the level still halves
+    assert _group_by_tokens(items, 79) == [items[:2], items[2:]]
+    items = [text(40), text(40), text(50)]
+    assert _group_by_tokens(items, 80) == [items[:2], items[2:]]
+
+
+def test_oversized_item_gets_its_own_group():
+    small, huge = text(10), text(500)
+    items = [small, small, huge, small]
+    assert estimate_tokens(huge) > 100
+    assert _group_by_tokens(items, 100) == [[small, small], [huge], [small]]
+
+
+def test_levels_shrink_when_nothing_fits_together():
+    items = [text(500), text(500), text(500)]
+    groups = _group_by_tokens(items, 100)
+    assert groups == [items[:2], items[2:]]
+    assert _group_by_tokens([text(500)], 100) == [[text(500)]]
+
+
+def test_tree_reduce_merges_until_one_report(monkeypatch):
+    prompts = []
+
+    async def fake_request(gemini, prompt):
+        prompts.append(prompt)
+        return {"common_themes": f"themes {len(prompts)}", "research_gaps": "gaps", "suggested_future_work": ""}
+
+    monkeypatch.setattr(synthesis, "_request_synthesis", fake_request)
+    monkeypatch.setattr(synthesis, "GeminiLLMService", lambda api_key: None)
+    monkeypatch.setitem(CONFIG, "gemini_api_key", "test")
+    monkeypatch.setitem(CONFIG, "synthesis_group_tokens", 300)
+
+    analysis = {f"2401.{i:05d}": {"title": f"Paper {i}", "findings": text(120)} for i in range(8)}
+    report = asyncio.run(synthesis.synthesize_analysis(analysis, "question"))
+
+    leaves = [p for p in prompts if "Analysis Content" in p]
+    merges = [p for p in prompts if "Partial syntheses" in p]
+    assert len(leaves) == 4
+    assert merges
+    assert report["common_themes"] == f"themes {len(prompts)}"
@@ -0,0 +1,73 @@
+import asyncio
+
+from spade.agent import Agent
+from spade.behaviour import OneShotBehaviour
+from spade.container import Container
+from spade.message import Message
+
+from agents.transport import TransportMixin, TransportStats
+from config import CONFIG
+from services.http_client import PooledHTTPMixin, http_clients
+
+
+class PooledAgent(TransportMixin, PooledHTTPMixin, Agent):
+    pass
+
+
+class SendOnce(OneShotBehaviour):
+    def __init__(self, to):
+        super().__init__()
+        self.to = to
+        self.error = None
+
+    async def run(self):
+        try:
+            await self.send(Message(to=self.to, body="ping"))
+        except ConnectionError as e:
+            self.error = e
+
+
+def test_local_agents_run_mixin_hooks_and_release_pools(monkeypatch):
+    monkeypatch.setitem(CONFIG, "transport", "local")
+
+    async def scenario():
+        agent = PooledAgent("transport_test@localhost", "password")
+        await agent.start()
+        assert agent.is_alive()
+        http_clients.get_session("transport_test")
+        await agent.stop()
+        return agent
+
+    closed_before = http_clients.stats["closed"]
+    agent = asyncio.run(scenario())
+
+    assert not agent.is_alive()
+    assert http_clients.stats["closed"] == closed_before + 1
+    assert http_clients.get_stats()["clients"] == {}
+
+
+def test_send_patch_is_scoped_and_rejects_remote_jids(monkeypatch):
+    monkeypatch.setitem(CONFIG, "transport", "local")
+    stats = TransportStats()
+
+    async def scenario():
+        sender = PooledAgent("transport_sender@localhost", "password")
+        receiver = PooledAgent("transport_receiver@localhost", "password")
+        stats.install()
+        try:
+            await asyncio.gather(sender.start(), receiver.start())
+            local, remote = SendOnce("transport_receiver@localhost"), SendOnce("elsewhere@example.org")
+            for behaviour in (local, remote):
+                sender.add_behaviour(behaviour)
+                await behaviour.join()
+            await asyncio.gather(sender.stop(), receiver.stop())
+        finally:
+            stats.uninstall()
+        return local, remote
+
+    local, remote = asyncio.run(scenario())
+
+    assert local.error is None
+    assert isinstance(remote.error, ConnectionError)
+    assert stats.get_stats()["local_hops"] == 1
+    assert Container().send.__func__ is Container.send
@@ -0,0 +1,44 @@
+import asyncio
+
+from spade.agent import Agent
+from spade.message import Message
+from spade.template import Template
+
+from agents.transport import TransportMixin
+from agents.worker import QueueWorkerMixin
+from config import CONFIG
+
+
+class EchoWorkerAgent(QueueWorkerMixin, TransportMixin, Agent):
+    class Worker(QueueWorkerMixin.WorkerBehaviour):
+        async def process(self, msg):
+            self.agent.processed.append(msg.body)
+
+    async def setup(self):
+        self.processed = []
+        template = Template()
+        template.set_metadata("type", "work")
+        self.start_workers(self.Worker, template, concurrency=2, queue_size=4)
+
+
+def test_worker_mailboxes_stay_empty(monkeypatch):
+    monkeypatch.setitem(CONFIG, "transport", "local")
+
+    async def scenario():
+        agent = EchoWorkerAgent("worker_test@localhost", "password")
+        await agent.start()
+        for i in range(3):
+            msg = Message(to="worker_test@localhost", body=f"job-{i}")
+            msg.set_metadata("type", "work")
+            agent.dispatch(msg)
+        agent.dispatch(Message(to="worker_test@localhost", body="unrelated"))
+        await asyncio.sleep(0.1)
+        await agent.work_queue.join()
+        workers = [b for b in agent.behaviours if isinstance(b, EchoWorkerAgent.Worker)]
+        mailboxes = [worker.mailbox_size() for worker in workers]
+        await agent.stop()
+        return agent.processed, mailboxes
+
+    processed, mailboxes = asyncio.run(scenario())
+    assert sorted(processed) == ["job-0", "job-1", "job-2"]
+    assert mailboxes == [0, 0]
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+class EventType:
+    SEARCH_DONE = "search_done"  # SearchAgent returned its deduplicated results
+    RELEVANCE_DONE = "relevance_done"  # RelevantAgent kept papers or asked for a refined query
+    PAPER_FETCHED = "paper_fetched"  # KnowledgeAggregator finished one paper (done/total)
+    KNOWLEDGE_READY = "knowledge_ready"  # Knowledge base folder is complete
+    PAPER_ANALYZED = "paper_analyzed"  # AnalysisAgent finished one paper (done/total)
+    ANALYSIS_DONE = "analysis_done"  # analysis.json was written
+    REPORT_READY = "report_ready"  # final_report.json was written
+    PIPELINE_FAILED = "pipeline_failed"  # A stage reported a failure
+
+
+class Subscription:
+    """
+    Queue of events for one consumer, readable from the consumer's own event loop.
+    Iterate with `async for`; iteration ends after `idle_timeout` seconds without events.
+    """
+
+    def __init__(self, bus: "EventBus", idle_timeout: Optional[float] = None):
+        self._bus = bus
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.idle_timeout = idle_timeout
+
+    def _deliver(self, event: Dict[str, Any]):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            self.close()
+            raise StopAsyncIteration
+
+
+class EventBus:
+    """
+    In-process publish/subscribe channel for pipeline progress.
+    Agents publish from the pipeline's event loop; subscribers may live on another
+    loop or thread (the Gradio UI does), so delivery goes through each subscriber's loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+
+    def subscribe(self, idle_timeout: Optional[float] = None) -> Subscription:
+        """Start receiving events; must be called from the consumer's event loop"""
+        subscription = Subscription(self, idle_timeout)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, event_type: str, **data):
+        """Deliver an event to every current subscriber; never blocks the publisher"""
+        event = {"type": event_type, "time": time.time(), **data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription._deliver(event)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(subscription)
+
+
+event_bus = EventBus()
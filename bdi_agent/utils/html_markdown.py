@@ -0,0 +1,164 @@
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from config import CONFIG
+
+_SKIP_TAGS = {"script", "style", "nav", "header", "footer", "noscript", "button", "svg", "head"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "figure", "figcaption", "blockquote", "table", "ul", "ol", "dl"}
+# Elements without an end tag; in XHTML they are self-closing and get an end callback too
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+
+class _MarkdownBuilder(HTMLParser):
+    """Streaming HTML -> Markdown conversion tuned for arXiv / ar5iv paper pages"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[str] = []
+        self.skip_depth = 0
+        self.math_depth = 0
+        self.pre_depth = 0
+        self.list_stack: List[str] = []
+        self.href: Optional[str] = None
+
+    def _newlines(self, count: int = 2):
+        text = "".join(self.out[-3:])
+        missing = count - (len(text) - len(text.rstrip("\n")))
+        if self.out and missing > 0:
+            self.out.append("\n" * missing)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self.skip_depth or tag in _SKIP_TAGS:
+            self.skip_depth += tag not in _VOID_TAGS
+            return
+        if self.math_depth:
+            self.math_depth += tag not in _VOID_TAGS
+            return
+        if tag == "math":
+            # arXiv HTML carries the LaTeX source of every formula in alttext
+            self.math_depth = 1
+            latex = (attrs.get("alttext") or "").strip()
+            if latex:
+                block = attrs.get("display") == "block"
+                self.out.append(f"\n\n$${latex}$$\n\n" if block else f"${latex}$")
+            return
+        if tag in _HEADINGS:
+            self._newlines()
+            self.out.append("#" * _HEADINGS[tag] + " ")
+        elif tag in ("ul", "ol"):
+            self.list_stack.append(tag)
+            self._newlines(1)
+        elif tag == "li":
+            self._newlines(1)
+            indent = "  " * max(len(self.list_stack) - 1, 0)
+            marker = "1." if self.list_stack and self.list_stack[-1] == "ol" else "-"
+            self.out.append(f"{indent}{marker} ")
+        elif tag == "pre":
+            self.pre_depth += 1
+            self._newlines()
+            self.out.append("```\n")
+        elif tag == "code" and not self.pre_depth:
+            self.out.append("`")
+        elif tag in ("strong", "b"):
+            self.out.append("**")
+        elif tag in ("em", "i"):
+            self.out.append("*")
+        elif tag == "a":
+            self.href = attrs.get("href")
+            self.out.append("[")
+        elif tag == "tr":
+            self._newlines(1)
+        elif tag in ("td", "th"):
+            self.out.append("| ")
+        elif tag == "br":
+            self.out.append("\n")
+        elif tag in _BLOCK_TAGS:
+            self._newlines()
+
+    def handle_endtag(self, tag):
+        # Void tags never opened a level, so they must not close one
+        if tag in _VOID_TAGS and (self.skip_depth or self.math_depth):
+            return
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if self.math_depth:
+            self.math_depth -= 1
+            return
+        if tag in _HEADINGS:
+            self._newlines()
+        elif tag in ("ul", "ol"):
+            if self.list_stack:
+                self.list_stack.pop()
+            self._newlines()
+        elif tag == "pre":
+            self.pre_depth = max(self.pre_depth - 1, 0)
+            self._newlines(1)
+            self.out.append("```")
+            self._newlines()
+        elif tag == "code" and not self.pre_depth:
+            self.out.append("`")
+        elif tag in ("strong", "b"):
+            self.out.append("**")
+        elif tag in ("em", "i"):
+            self.out.append("*")
+        elif tag == "a":
+            href = self.href
+            self.href = None
+            self.out.append(f"]({href})" if href and href.startswith("http") else "]")
+        elif tag in ("td", "th"):
+            self.out.append(" ")
+        elif tag == "tr":
+            self.out.append("|")
+            self._newlines(1)
+        elif tag in _BLOCK_TAGS:
+            self._newlines()
+
+    def handle_data(self, data):
+        if self.skip_depth or self.math_depth:
+            return
+        if self.pre_depth:
+            self.out.append(data)
+        else:
+            self.out.append(re.sub(r"\s+", " ", data))
+
+
+def html_to_markdown(html: str) -> str:
+    """Convert a paper's HTML page into markdown"""
+    builder = _MarkdownBuilder()
+    builder.feed(html)
+    builder.close()
+    markdown = "".join(builder.out)
+    markdown = re.sub(r"[ \t]+\n", "\n", markdown)
+    markdown = re.sub(r"\n{3,}", "\n\n", markdown)
+    return markdown.strip() + "\n"
+
+
+_conversion_pool: Optional[ProcessPoolExecutor] = None
+
+
+async def convert_html(html: str) -> str:
+    """Run html_to_markdown in a worker process so the event loop stays free"""
+    global _conversion_pool
+    if _conversion_pool is None:
+        # The pool starts lazily inside a process that already runs aiohttp and SQLite threads;
+        # forking it could copy a lock held by one of them, so workers are spawned fresh
+        _conversion_pool = ProcessPoolExecutor(
+            max_workers=CONFIG["conversion_workers"], mp_context=multiprocessing.get_context("spawn")
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_conversion_pool, html_to_markdown, html)
+
+
+def shutdown_conversion_pool():
+    """Stop the conversion worker processes"""
+    global _conversion_pool
+    if _conversion_pool is not None:
+        _conversion_pool.shutdown(wait=False, cancel_futures=True)
+        _conversion_pool = None
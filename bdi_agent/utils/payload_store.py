@@ -0,0 +1,113 @@
+import json
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+import agentspeak as asp
+
+from utils.logger import logger
+
+
+class PayloadHandle(NamedTuple):
+    id: str
+    count: int
+    size: int
+
+
+class _Lazy(NamedTuple):
+    loader: Callable[[], Awaitable[Any]]
+
+
+class PayloadStore:
+    """
+    In-process store for bulk message payloads referenced from BDI beliefs.
+    Beliefs carry a small payload(Id, Count, Size) term instead of the serialized data;
+    every holder of a handle owns one reference and the payload is dropped when the
+    last reference is released (the ASL plans release on belief retraction).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, list] = {}
+        self.stats = {"puts": 0, "releases": 0, "freed": 0, "live_bytes": 0, "peak_bytes": 0}
+
+    def put(self, payload: Any, size: Optional[int] = None, refs: int = 1) -> PayloadHandle:
+        """
+        Store a payload with `refs` references. `size` is its serialized size; when the caller
+        does not already know it, the payload is measured as the JSON it would be sent as.
+        """
+        if size is None:
+            size = len(json.dumps(payload, separators=(",", ":")))
+        handle = PayloadHandle(uuid.uuid4().hex[:12], len(payload) if hasattr(payload, "__len__") else 1, size)
+        with self._lock:
+            self._entries[handle.id] = [payload, refs, handle]
+            self.stats["puts"] += 1
+            self.stats["live_bytes"] += size
+            self.stats["peak_bytes"] = max(self.stats["peak_bytes"], self.stats["live_bytes"])
+        return handle
+
+    def put_lazy(self, loader: Callable[[], Awaitable[Any]], count: int, size: int = 0, refs: int = 1) -> PayloadHandle:
+        """Store a payload that is only loaded by awaiting `loader` on first load() (e.g. a claim check)"""
+        handle = PayloadHandle(uuid.uuid4().hex[:12], count, size)
+        with self._lock:
+            self._entries[handle.id] = [_Lazy(loader), refs, handle]
+            self.stats["puts"] += 1
+            self.stats["live_bytes"] += size
+            self.stats["peak_bytes"] = max(self.stats["peak_bytes"], self.stats["live_bytes"])
+        return handle
+
+    def get(self, handle_id: str) -> Optional[Any]:
+        """Stored payload; None if it was released or is a lazy payload that has not been loaded"""
+        with self._lock:
+            entry = self._entries.get(handle_id)
+        if not entry or isinstance(entry[0], _Lazy):
+            return None
+        return entry[0]
+
+    async def load(self, handle_id: str) -> Optional[Any]:
+        """Stored payload, running the loader of a lazy payload on first access"""
+        with self._lock:
+            entry = self._entries.get(handle_id)
+        if not entry:
+            return None
+        if isinstance(entry[0], _Lazy):
+            entry[0] = await entry[0].loader()
+        return entry[0]
+
+    def retain(self, handle_id: str):
+        with self._lock:
+            if handle_id in self._entries:
+                self._entries[handle_id][1] += 1
+
+    def release(self, handle_id: str):
+        """Drop one reference; the payload is freed with the last one"""
+        with self._lock:
+            entry = self._entries.get(handle_id)
+            if entry is None:
+                logger.warning(f"Release of unknown payload {handle_id}")
+                return
+            self.stats["releases"] += 1
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._entries[handle_id]
+                self.stats["freed"] += 1
+                self.stats["live_bytes"] -= entry[2].size
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "live": len(self._entries)}
+
+
+def handle_term(handle: PayloadHandle) -> asp.Literal:
+    """AgentSpeak term for a handle: payload(Id, Count, Size)"""
+    return asp.Literal("payload", (handle.id, handle.count, handle.size))
+
+
+def handle_id(term) -> Optional[str]:
+    """Payload id of a grounded payload(Id, Count, Size) term"""
+    if isinstance(term, asp.Literal) and term.functor == "payload" and term.args:
+        return str(term.args[0])
+    return None
+
+
+payload_store = PayloadStore()
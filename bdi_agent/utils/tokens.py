@@ -0,0 +1,7 @@
+import json
+
+
+def estimate_tokens(value) -> int:
+    """Rough token count (about four characters per token) for a string or JSON-serialisable value"""
+    text = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+    return len(text) // 4 + 1
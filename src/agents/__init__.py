@@ -4,6 +4,7 @@ from agents.relevant import RelevantAgent
 from agents.knowledge import KnowledgeAggregatorAgent
 from agents.analysis import AnalysisAgent
 from agents.synthesis import SynthesisAgent
+from agents.launcher import LauncherAgent, shutdown_agents
 
 __all__ = [
     "QueryConstructionAgent",
@@ -12,4 +13,6 @@ __all__ = [
     "KnowledgeAggregatorAgent",
     "AnalysisAgent",
     "SynthesisAgent",
+    "LauncherAgent",
+    "shutdown_agents",
 ]
\ No newline at end of file
@@ -1,77 +1,134 @@
 import json
 import os
-import requests
 from datetime import datetime
 from pathlib import Path
 import asyncio
 from services.gemini import GeminiLLMService
+from services.http_client import PooledHTTPMixin
+from agents.launcher import report_failure
 
 from spade.agent import Agent
 from spade.behaviour import OneShotBehaviour
 from spade.template import Template
 
+from utils.chunking import chunk_markdown
+from utils.concurrency import loop_semaphore
 from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 from spade.message import Message
 
 
+EMPTY_ANALYSIS = {"methodology": "", "findings": "", "future_work": ""}
+
+def _get_chunk_semaphore() -> asyncio.Semaphore:
+    """Chunk-level calls from every paper share one limit"""
+    return loop_semaphore("analysis_chunks", CONFIG["analysis_chunk_concurrency"])
+
+
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "methodology": {"type": "STRING"},
+        "findings": {"type": "STRING"},
+        "future_work": {"type": "STRING"}
+    },
+    "required": ["methodology", "findings", "future_work"],
+    "propertyOrdering": ["methodology", "findings", "future_work"]
+}
+
+
+async def _request_analysis(gemini: GeminiLLMService, prompt: str, max_output_tokens: int = 512,
+                            name: str = "analysis") -> dict:
+    """Send an analysis prompt and return the validated methodology/findings/future_work object"""
+    generation_config = {
+        "temperature": 0.3,
+        "maxOutputTokens": max_output_tokens,
+        "topP": 0.9,
+        "topK": 40
+    }
+    try:
+        result = await gemini.generate_structured(prompt, ANALYSIS_SCHEMA, name, generation_config)
+        if result is None:
+            logger.warning("Gemini returned no valid analysis JSON")
+            return dict(EMPTY_ANALYSIS)
+        return {key: result.get(key, "") for key in EMPTY_ANALYSIS}
+    except Exception as e:
+        logger.error(f"Error calling Gemini: {e}")
+        return dict(EMPTY_ANALYSIS)
+
+
 async def analyze_paper(content: str, research_question: str) -> dict:
     """
     Analyze a paper's content using Gemini LLM to extract methodology, findings, and future work.
+    In "chunked" mode long papers are split into section-aware chunks that are analyzed in
+    parallel (map) and merged by a final call (reduce); "truncated" mode only sends the
+    first 5000 characters.
     """
     api_key = CONFIG.get("gemini_api_key")
     if not api_key:
         logger.error("GEMINI_API_KEY not found in config.")
-        return {"methodology": "", "findings": "", "future_work": ""}
+        return dict(EMPTY_ANALYSIS)
 
     gemini = GeminiLLMService(api_key)
 
+    if CONFIG["analysis_mode"] == "chunked":
+        chunks = chunk_markdown(content, CONFIG["analysis_chunk_tokens"], CONFIG["analysis_token_budget"])
+    else:
+        chunks = [content[:5000]]
+
+    if len(chunks) <= 1:
+        prompt = (
+            "You are an expert researcher in this field. "
+            "Given the following research paper content, extract the following as a JSON object: "
+            "1. Methodology\n2. Findings\n3. Future work (leave as an empty string if the paper does not mention any future work).\n"
+            f"Research Question: {research_question}\n"
+            f"Paper Content:\n{chunks[0] if chunks else ''}\n"
+            "Return a JSON object with keys: methodology, findings, future_work. "
+            "Be concise, comprehensive and accurate."
+        )
+        return await _request_analysis(gemini, prompt)
+
+    logger.info(f"Analyzing paper in {len(chunks)} chunks")
+    partials = await asyncio.gather(*(
+        _analyze_chunk(gemini, chunk, index, len(chunks), research_question)
+        for index, chunk in enumerate(chunks)
+    ))
+    # Drop excerpts that produced nothing before reducing
+    partials = [p for p in partials if any(p.get(key) for key in EMPTY_ANALYSIS)]
+    if not partials:
+        return dict(EMPTY_ANALYSIS)
+
     prompt = (
         "You are an expert researcher in this field. "
-        "Given the following research paper content, extract the following as a JSON object: "
-        "1. Methodology\n2. Findings\n3. Future work (leave as an empty string if the paper does not mention any future work).\n"
+        "The following JSON list holds partial analyses, each extracted from one excerpt of the same research paper. "
+        "Merge them into a single analysis of the whole paper, removing repetition and keeping every distinct point.\n"
         f"Research Question: {research_question}\n"
-        f"Paper Content:\n{content}\n"
-        "Return a JSON object with keys: methodology, findings, future_work. "
+        f"Partial Analyses:\n{json.dumps(partials, separators=(',', ':'))}\n"
+        "Return a JSON object with keys: methodology, findings, future_work "
+        "(future_work is an empty string if no excerpt mentions any future work). "
         "Be concise, comprehensive and accurate."
     )
+    return await _request_analysis(gemini, prompt, max_output_tokens=1024, name="analysis_reduce")
 
-    generation_config = {
-        "temperature": 0.3,
-        "maxOutputTokens": 512,
-        "topP": 0.9,
-        "topK": 40,
-        "responseMimeType": "application/json",
-        "responseSchema": {
-            "type": "OBJECT",
-            "properties": {
-                "methodology": {"type": "STRING"},
-                "findings": {"type": "STRING"},
-                "future_work": {"type": "STRING"}
-            },
-            "propertyOrdering": ["methodology", "findings", "future_work"]
-        }
-    }
-    try:
-        response = await gemini.generate_content(prompt, generation_config)
-        # Try to parse JSON from response
-        try:
-            result = json.loads(response)
-            return {
-                "methodology": result.get("methodology", ""),
-                "findings": result.get("findings", ""),
-                "future_work": result.get("future_work", "")
-            }
-        except Exception as e:
-            logger.warning(f"Failed to parse Gemini response as JSON: {e}")
-            return {"methodology": "", "findings": "", "future_work": ""}
-    except Exception as e:
-        logger.error(f"Error calling Gemini: {e}")
-        return {"methodology": "", "findings": "", "future_work": ""}
+
+async def _analyze_chunk(gemini: GeminiLLMService, chunk: str, index: int, total: int, research_question: str) -> dict:
+    """Map step: extract whatever methodology, findings and future work one excerpt contains"""
+    prompt = (
+        "You are an expert researcher in this field. "
+        f"The following is excerpt {index + 1} of {total} of a research paper. "
+        "Extract, as a JSON object, only what this excerpt states about: "
+        "1. Methodology\n2. Findings\n3. Future work\n"
+        "Use an empty string for anything the excerpt does not cover.\n"
+        f"Research Question: {research_question}\n"
+        f"Excerpt:\n{chunk}\n"
+        "Return a JSON object with keys: methodology, findings, future_work. Be concise and accurate."
+    )
+    async with _get_chunk_semaphore():
+        return await _request_analysis(gemini, prompt, max_output_tokens=384, name="analysis_chunk")
 
 
-class AnalysisAgent(Agent):
+class AnalysisAgent(PooledHTTPMixin, Agent):
     """
     Receives folder path and research question from KnowledgeAgent, analyzes each paper using Gemini,
     and sends results to SummarizationAgent.
@@ -79,9 +136,11 @@ class AnalysisAgent(Agent):
 
     class AnalyzePapersBehaviour(OneShotBehaviour):
         async def run(self):
-            msg = await self.receive(timeout=CONFIG["timeout"])
+            # The launcher bounds the whole run, so wait as long as it does for upstream stages
+            msg = await self.receive(timeout=CONFIG["pipeline_timeout"])
             if not msg:
                 logger.warning("AnalysisAgent timeout - no message received")
+                await report_failure(self, "analysis", "no knowledge base received")
                 return
 
             logger.info("AnalysisAgent received message")
@@ -117,7 +176,7 @@ class AnalysisAgent(Agent):
                         logger.info(f"Analyzed {md_file} with Gemini")
                     except Exception as e:
                         logger.warning(f"Gemini analysis failed for {md_file}: {e}")
-                        analysis = {"methodology": "", "findings": "", "future_work": ""}
+                        analysis = dict(EMPTY_ANALYSIS)
                     results[paper_id] = {
                         "title": paper_metadata.get("title", ""),
                         **analysis
@@ -143,6 +202,7 @@ class AnalysisAgent(Agent):
 
             except Exception as e:
                 logger.error(f"Error in AnalysisAgent: {str(e)}")
+                await report_failure(self, "analysis", e)
 
         async def on_end(self):
             logger.info("AnalyzePapersBehaviour has ended. Stopping the agent.")
@@ -1,19 +1,25 @@
+import asyncio
 import json
 import os
-import requests
+import time
 from datetime import datetime
 
 from spade.agent import Agent
 from spade.behaviour import OneShotBehaviour
 from spade.template import Template
 
+from services.blob_store import check_out
+from services.http_client import PooledHTTPMixin
+from services.paper_fetcher import PaperContentFetcher
+from services.paper_store import paper_store
+from agents.launcher import notify_launcher, report_failure
 from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 from spade.message import Message
 
 
-class KnowledgeAggregatorAgent(Agent):
+class KnowledgeAggregatorAgent(PooledHTTPMixin, Agent):
     """
     Responsible for aggregating knowledge from relevant papers.
     Uses OneShotBehaviour as it processes each set of relevant papers once.
@@ -21,9 +27,11 @@ class KnowledgeAggregatorAgent(Agent):
 
     class AggregateKnowledgeBehaviour(OneShotBehaviour):
         async def run(self):
-            msg = await self.receive(timeout=CONFIG["timeout"]*2)
+            # The launcher bounds the whole run, so wait as long as it does for upstream stages
+            msg = await self.receive(timeout=CONFIG["pipeline_timeout"])
             if not msg:
                 logger.warning("KnowledgeAggregatorAgent timeout - no message received")
+                await report_failure(self, "knowledge", "no relevant papers received")
                 return
 
             logger.info("KnowledgeAggregatorAgent received message")
@@ -31,15 +39,13 @@ class KnowledgeAggregatorAgent(Agent):
             try:
                 relevant_data = json.loads(msg.body)
                 research_question = relevant_data.get("research_question", "")
-                relevant_papers = relevant_data.get("relevant_papers", [])
+                relevant_papers = await check_out(relevant_data.get("relevant_papers", []))
 
                 if not relevant_papers:
                     logger.warning("No relevant papers to aggregate")
+                    await report_failure(self, "knowledge", "no relevant papers to aggregate")
                     return
 
-                paper_data = []
-                duplicate_paper_ids = set()
-
                 # folder for markdown files
                 safe_research_question = "".join(
                     c for c in research_question if c.isalnum() or c in (" ", "_", "-")
@@ -53,76 +59,33 @@ class KnowledgeAggregatorAgent(Agent):
                 )
                 os.makedirs(folder_path, exist_ok=True)
 
+                # Fetch the papers concurrently; each markdown file is written as soon as it is ready
+                unique_papers = {}
                 for paper in relevant_papers[:10]:
-                    paper_id = paper.get("id")
-                    if paper_id in duplicate_paper_ids:
-                        continue
-
-                    url = paper.get("page_url", "")
-
-                    paper_url = ""
-                    arxiv_html_url = url.replace("abs", "html")
-                    ar5iv_url = url.replace("arxiv.org", "ar5iv.org")
-
-                    try:
-                        status = requests.get(arxiv_html_url).status_code
-                        logger.info(
-                            f"Checking arXiv availability for {arxiv_html_url}, {status}"
-                        )
-                        if status == 200 or status in (301, 302, 303, 307, 308):
-                            paper_url = arxiv_html_url
-                        else:
-                            status = requests.get(ar5iv_url).status_code
-
-                            logger.info(
-                                f"Checking ar5iv availability for {ar5iv_url}, {status}"
-                            )
-                            if status == 200 or status in (301, 302, 303, 307, 308):
-                                paper_url = ar5iv_url
-                    except requests.RequestException as e:
-                        logger.warning(f"Error fetching paper URL for {paper_id}: {e}")
-
-                    if not paper_url:
-                        logger.info(
-                            f"Skipping paper {paper_id}: no HTML version available"
-                        )
-                        continue
-
-                    md_filename = os.path.join(folder_path, f"{paper_id}.md")
-                    if not os.path.exists(md_filename):
-                        jina_url = f"https://r.jina.ai/{paper_url}"
-                        headers = {"Authorization": f"Bearer {CONFIG['jina_api_key']}"}
-                        try:
-                            resp = requests.get(jina_url, headers=headers, timeout=30)
-                            if resp.status_code == 200:
-                                markdown_content = resp.text
-                                with open(
-                                    md_filename, "w", encoding="utf-8"
-                                ) as md_file:
-                                    md_file.write(markdown_content)
-                                logger.info(
-                                    f"Saved markdown for paper {paper_id} to {md_filename}"
-                                )
-                            else:
-                                logger.warning(
-                                    f"Jina Reader API failed for {paper_id}: {resp.status_code}"
-                                )
-                        except Exception as e:
-                            logger.warning(
-                                f"Error fetching markdown for {paper_id}: {e}"
-                            )
-
-                    duplicate_paper_ids.add(paper_id)
-                    paper_data.append(
-                        {
-                            "id": paper_id,
-                            "title": paper.get("title"),
-                            "abstract": paper.get("summary", ""),
-                            "authors": paper.get("authors", [])[:3],
-                            "relevance_score": paper.get("relevance_score", 0),
-                            "url": paper.get("page_url", ""),
-                        }
-                    )
+                    unique_papers.setdefault(paper.get("id"), paper)
+
+                fetcher = PaperContentFetcher()
+                started = time.perf_counter()
+                outcomes = await asyncio.gather(
+                    *(self.fetch_paper(fetcher, folder_path, paper) for paper in unique_papers.values())
+                )
+                logger.info(
+                    f"Fetched {sum(outcomes)}/{len(unique_papers)} papers in {time.perf_counter() - started:.2f}s"
+                )
+                logger.info(f"Paper store stats: {paper_store.get_stats()}")
+
+                paper_data = [
+                    {
+                        "id": paper.get("id"),
+                        "title": paper.get("title"),
+                        "abstract": paper.get("summary", ""),
+                        "authors": paper.get("authors", [])[:3],
+                        "relevance_score": paper.get("relevance_score", 0),
+                        "url": paper.get("page_url", ""),
+                    }
+                    for paper, ok in zip(unique_papers.values(), outcomes)
+                    if ok
+                ]
 
                 aggregated_knowledge = {
                     "research_question": research_question,
@@ -153,9 +116,47 @@ class KnowledgeAggregatorAgent(Agent):
                 })
                 await self.send(msg)
                 logger.info(f"Sent folder path to AnalysisAgent: {folder_path}")
+                await notify_launcher(
+                    self, MessageType.PIPELINE_COMPLETE,
+                    stage="knowledge", folder_path=folder_path, report_path=filename
+                )
 
             except Exception as e:
                 logger.error(f"Error in KnowledgeAggregatorAgent: {str(e)}")
+                await report_failure(self, "knowledge", e)
+
+        async def fetch_paper(self, fetcher, folder_path, paper):
+            """Fetch one paper into the knowledge folder; returns False if it has no HTML version"""
+            paper_id = paper.get("id")
+            md_filename = os.path.join(folder_path, f"{paper_id}.md")
+            if os.path.exists(md_filename):
+                return True
+
+            # Papers fetched for earlier questions are linked from the shared store
+            if await paper_store.link_into(paper_id, md_filename):
+                logger.info(f"Linked paper {paper_id} from the paper store")
+                return True
+
+            try:
+                fetched = await fetcher.fetch_markdown(paper)
+            except Exception as e:
+                logger.warning(f"Error fetching content for {paper_id}: {e}")
+                return False
+
+            if not fetched:
+                logger.info(f"Skipping paper {paper_id}: no HTML version available")
+                return False
+
+            markdown_content, source = fetched
+            if source == "abstract":
+                # Abstract-only fallbacks stay local so a later run can still get the full text
+                with open(md_filename, "w", encoding="utf-8") as md_file:
+                    md_file.write(markdown_content)
+            else:
+                await paper_store.put(paper_id, markdown_content, source)
+                await paper_store.link_into(paper_id, md_filename)
+            logger.info(f"Saved {source} markdown for paper {paper_id} to {md_filename}")
+            return True
 
         async def on_end(self):
             logger.info("AggregateKnowledgeBehaviour has ended. Stopping the agent.")
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from spade.agent import Agent
+from spade.behaviour import CyclicBehaviour, OneShotBehaviour
+from spade.message import Message
+from spade.template import Template
+
+from utils.events import EventType, event_bus
+from utils.logger import logger
+from config import CONFIG
+from models import MessageType
+
+LAUNCHER_JID = "user@localhost"
+
+
+async def notify_launcher(behaviour, msg_type: str, **details):
+    """Send a pipeline status message (completion or failure) from a behaviour to the launcher"""
+    try:
+        msg = Message(to=LAUNCHER_JID, body=json.dumps(details), metadata={"type": msg_type})
+        await behaviour.send(msg)
+    except Exception as e:
+        logger.error(f"Error notifying launcher: {str(e)}")
+
+
+async def report_failure(behaviour, stage: str, error: Any):
+    """Tell the launcher that `stage` failed so the run ends now instead of at the timeout"""
+    logger.error(f"Pipeline stage {stage} failed: {error}")
+    event_bus.publish(EventType.PIPELINE_FAILED, stage=stage, error=str(error))
+    await notify_launcher(behaviour, MessageType.PIPELINE_FAILED, stage=stage, error=str(error))
+
+
+class LauncherAgent(Agent):
+    """
+    Sends the research question into the pipeline and waits for its outcome.
+    `completion` resolves when the agent running `final_stage` reports completion or
+    any agent reports a failure; completions from earlier stages are only logged.
+    """
+
+    class SendQuery(OneShotBehaviour):
+        async def run(self):
+            query_msg = Message(
+                to="query_construction_agent@localhost",
+                body=json.dumps({"research_question": self.agent.question}),
+                metadata={"type": MessageType.RESEARCH_QUERY}
+            )
+            await self.send(query_msg)
+            logger.info("Sent research query to QueryConstructionAgent")
+
+    class AwaitOutcome(CyclicBehaviour):
+        async def run(self):
+            msg = await self.receive(timeout=CONFIG["timeout"])
+            if not msg:
+                return
+            try:
+                details = json.loads(msg.body) if msg.body else {}
+            except json.JSONDecodeError:
+                details = {"raw": msg.body}
+
+            if msg.get_metadata("type") == MessageType.PIPELINE_FAILED:
+                outcome = {"status": "failed", **details}
+            elif details.get("stage", self.agent.final_stage) == self.agent.final_stage:
+                outcome = {"status": "completed", **details}
+            else:
+                logger.info(f"Pipeline stage {details.get('stage')} completed")
+                return
+
+            if not self.agent.completion.done():
+                self.agent.completion.set_result(outcome)
+
+    def __init__(self, jid, password, question: str, final_stage: str = "synthesis"):
+        super().__init__(jid, password)
+        self.question = question
+        self.final_stage = final_stage
+        self.completion: Optional[asyncio.Future] = None
+
+    async def setup(self):
+        self.completion = asyncio.get_running_loop().create_future()
+        template = Template(metadata={"type": MessageType.PIPELINE_COMPLETE}) | \
+            Template(metadata={"type": MessageType.PIPELINE_FAILED})
+        self.add_behaviour(self.AwaitOutcome(), template)
+        self.add_behaviour(self.SendQuery())
+
+    async def wait_for_completion(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for the pipeline outcome; returns {"status": "timeout"} if none arrives in time"""
+        timeout = timeout or CONFIG["pipeline_timeout"]
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.completion), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pipeline did not finish within {timeout}s")
+            event_bus.publish(EventType.PIPELINE_FAILED, stage="pipeline", error=f"no outcome within {timeout}s")
+            return {"status": "timeout"}
+
+
+async def shutdown_agents(agents: List[Agent], grace: Optional[float] = None):
+    """
+    Stop agents gracefully: one-shot behaviours still doing work get `grace` seconds
+    to finish, then every agent is stopped concurrently.
+    """
+    grace = grace if grace is not None else CONFIG["shutdown_grace"]
+    alive = [agent for agent in agents if agent.is_alive()]
+    in_flight = [
+        behaviour for agent in alive for behaviour in agent.behaviours
+        if isinstance(behaviour, OneShotBehaviour) and not behaviour.is_done()
+    ]
+    if in_flight:
+        logger.info(f"Draining {len(in_flight)} in-flight behaviours")
+        _, pending = await asyncio.wait([asyncio.ensure_future(b.join()) for b in in_flight], timeout=grace)
+        for join in pending:
+            join.cancel()
+    results = await asyncio.gather(*(agent.stop() for agent in alive), return_exceptions=True)
+    for agent, result in zip(alive, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Error stopping {agent.jid}: {result}")
@@ -1,5 +1,4 @@
 import json
-from typing import Dict, Any
 
 from spade.agent import Agent
 from spade.behaviour import OneShotBehaviour
@@ -7,12 +6,34 @@ from spade.message import Message
 from spade.template import Template
 
 from services.gemini import GeminiLLMService
+from services.http_client import PooledHTTPMixin
+from agents.launcher import report_failure
 from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 
+SEARCH_QUERIES_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "search_queries": {
+            "type": "ARRAY",
+            "minItems": 1,
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "query": {"type": "STRING"},
+                    "explanation": {"type": "STRING"}
+                },
+                "required": ["query", "explanation"]
+            }
+        },
+        "rationale": {"type": "STRING"}
+    },
+    "required": ["search_queries", "rationale"]
+}
 
-class QueryConstructionAgent(Agent):
+
+class QueryConstructionAgent(PooledHTTPMixin, Agent):
     """
     Responsible for converting research questions into structured search parameters.
     Uses Google Gemini to expand and optimize search queries.
@@ -34,6 +55,7 @@ class QueryConstructionAgent(Agent):
                 
                 if not research_question:
                     logger.error("No research question provided")
+                    await report_failure(self, "query_construction", "no research question provided")
                     return
                 
                 llm_service = GeminiLLMService(CONFIG["gemini_api_key"])
@@ -100,11 +122,10 @@ class QueryConstructionAgent(Agent):
                     }}
                     """
                 
-                llm_response = await llm_service.generate_content(prompt)
-                
-                search_params = self._extract_json_from_llm_response(llm_response)
+                name = "refined_search_queries" if is_refined else "search_queries"
+                search_params = await llm_service.generate_structured(prompt, SEARCH_QUERIES_SCHEMA, name)
                 
-                if not search_params or "search_queries" not in search_params:
+                if not search_params:
                     logger.error(f"Failed to parse valid search parameters from LLM response")
                     search_params = {
                         "search_queries": [
@@ -125,31 +146,7 @@ class QueryConstructionAgent(Agent):
                 
             except Exception as e:
                 logger.error(f"Error in QueryConstructionAgent: {str(e)}")
-        
-        def _extract_json_from_llm_response(self, response: str) -> Dict[str, Any]:
-            """Extract JSON content from LLM response text"""
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'```(?:json)?\s*(.*?)```', response, re.DOTALL)
-                if json_match:
-                    try:
-                        return json.loads(json_match.group(1))
-                    except json.JSONDecodeError:
-                        pass
-                
-                try:
-                    start_idx = response.find('{')
-                    end_idx = response.rfind('}') + 1
-                    if start_idx >= 0 and end_idx > 0:
-                        json_str = response[start_idx:end_idx]
-                        return json.loads(json_str)
-                except (json.JSONDecodeError, ValueError):
-                    pass
-                
-                logger.error("Failed to extract JSON from LLM response")
-                return {}
+                await report_failure(self, "query_construction", e)
         
         async def on_end(self):
             logger.info("ConstructQueryBehaviour has ended. Stopping the agent.")
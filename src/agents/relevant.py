@@ -1,18 +1,20 @@
 import json
 from datetime import datetime
-from typing import Dict, Any
 
 from spade.agent import Agent
 from spade.behaviour import CyclicBehaviour
 from spade.message import Message
 from spade.template import Template
 
-from services.gemini import GeminiLLMService
+from agents.relevance_scoring import RelevanceScorer
+from services.blob_store import check_in, check_out
+from services.http_client import PooledHTTPMixin
+from agents.launcher import report_failure
 from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 
-class RelevantAgent(Agent):
+class RelevantAgent(PooledHTTPMixin, Agent):
     """
     Responsible for finding relevant papers and deciding whether to refine the query.
     Uses CyclicBehaviour as it continuously processes search results.
@@ -29,56 +31,16 @@ class RelevantAgent(Agent):
             try:
                 search_results = json.loads(msg.body)
                 research_question = search_results.get("research_question", "")
-                results = search_results.get("results", [])
+                results = await check_out(search_results.get("results", []))
                 
                 if not results:
                     logger.warning("No search results to process")
+                    await report_failure(self, "relevance", "no search results to process")
                     return
                 
-                llm_service = GeminiLLMService(CONFIG["gemini_api_key"])
-                
-                sample_results = results[:10]
-                
-                prompt = f"""
-                Evaluate the relevance of these research papers to the following question:
-                
-                Research Question: "{research_question}"
-                
-                Papers:
-                {json.dumps([{
-                    "id": p.get("id"),
-                    "title": p.get("title"),
-                    "abstract": p.get("summary", ""),
-                    "authors": p.get("authors", [])[:3]
-                } for p in sample_results], indent=2)}
-                
-                For each paper, assess its relevance on a scale of 0-10.
-                Then return a valid JSON with this structure:
-                {{
-                    "papers": [
-                        {{
-                            "id": "paper_id",
-                            "relevance_score": 8.5,
-                            "rationale": "Brief explanation of relevance"
-                        }},
-                        ...
-                    ],
-                    "should_refine_query": true/false,
-                    "refinement_suggestion": "Suggested way to refine the query if needed"
-                }}
-                """
-                
-                llm_response = await llm_service.generate_content(prompt)
-                
-                relevance_data = self._extract_json_from_llm_response(llm_response)
-                
-                if not relevance_data or "papers" not in relevance_data:
-                    logger.error("Failed to get valid relevance evaluation from LLM")
-                    relevance_data = {
-                        "papers": [{"id": p.get("id"), "relevance_score": 5.0, "rationale": "Default score"} for p in sample_results],
-                        "should_refine_query": False,
-                        "refinement_suggestion": ""
-                    }
+                # Score every candidate in token-budgeted batches scored concurrently
+                scorer = RelevanceScorer(research_question)
+                relevance_data = await scorer.score_all(results)
                 
                 relevance_scores = {p.get("id"): p.get("relevance_score", 0) for p in relevance_data.get("papers", [])}
                 
@@ -96,6 +58,8 @@ class RelevantAgent(Agent):
                     if relevance_score >= threshold:
                         relevant_papers.append(paper)
                 
+                relevant_papers.sort(key=lambda p: p["relevance_score"], reverse=True)
+                
                 should_refine = relevance_data.get("should_refine_query", False)
                 refinement_suggestion = relevance_data.get("refinement_suggestion", "")
                 
@@ -116,7 +80,7 @@ class RelevantAgent(Agent):
                 else:
                     relevant_data = {
                         "research_question": research_question,
-                        "relevant_papers": relevant_papers,
+                        "relevant_papers": await check_in(relevant_papers),
                         "timestamp": datetime.now().isoformat()
                     }
                     
@@ -130,35 +94,11 @@ class RelevantAgent(Agent):
                 
             except Exception as e:
                 logger.error(f"Error in RelevantAgent: {str(e)}")
+                await report_failure(self, "relevance", e)
         
         async def on_end(self):
             logger.info("FindRelevantBehaviour has ended. Stopping the agent.")
             await self.agent.stop()
-        
-        def _extract_json_from_llm_response(self, response: str) -> Dict[str, Any]:
-            """Extract JSON content from LLM response text"""
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'```(?:json)?\s*(.*?)```', response, re.DOTALL)
-                if json_match:
-                    try:
-                        return json.loads(json_match.group(1))
-                    except json.JSONDecodeError:
-                        pass
-                
-                try:
-                    start_idx = response.find('{')
-                    end_idx = response.rfind('}') + 1
-                    if start_idx >= 0 and end_idx > 0:
-                        json_str = response[start_idx:end_idx]
-                        return json.loads(json_str)
-                except (json.JSONDecodeError, ValueError):
-                    pass
-                
-                logger.error("Failed to extract JSON from LLM response")
-                return {}
     
     async def setup(self):
         template = Template(metadata={"type": MessageType.SEARCH_RESULTS})
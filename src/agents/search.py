@@ -1,4 +1,6 @@
+import asyncio
 import json
+import time
 from datetime import datetime
 
 from spade.agent import Agent
@@ -7,12 +9,15 @@ from spade.message import Message
 from spade.template import Template
 
 from services.arXiv import ArxivService
+from services.blob_store import check_in
+from services.http_client import PooledHTTPMixin
+from agents.launcher import report_failure
 from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 
 
-class SearchAgent(Agent):
+class SearchAgent(PooledHTTPMixin, Agent):
     """
     Responsible for executing searches on arXiv.
     Uses CyclicBehaviour as it continuously processes search requests.
@@ -32,31 +37,39 @@ class SearchAgent(Agent):
                 search_queries = search_params.get("search_queries", [])
                 if not search_queries:
                     logger.error("No search queries provided")
+                    await report_failure(self, "search", "no search queries provided")
                     return
                 
                 arxiv_service = ArxivService()
                 
+                # Issue every query at once; the shared rate limiter spaces the requests
+                queries = [q for q in search_queries if q.get("query", "")]
+                fan_out_start = time.perf_counter()
+                outcomes = await asyncio.gather(
+                    *(self.run_query(arxiv_service, query_info) for query_info in queries)
+                )
+                fan_out_seconds = time.perf_counter() - fan_out_start
+                
                 all_results = []
-                for query_info in search_queries:
-                    query = query_info.get("query", "")
-                    if not query:
-                        continue
-                    
-                    logger.info(f"Searching arXiv for: {query}")
-                    results = await arxiv_service.search(query, CONFIG["max_results"])
-                    logger.info(f"Found {len(results)} papers for query: {query}")
-                    
-                    for result in results:
-                        result["query"] = query
-                        result["query_explanation"] = query_info.get("explanation", "")
-                    
+                query_timings = []
+                for query_info, results, seconds in outcomes:
+                    query_timings.append({
+                        "query": query_info["query"],
+                        "seconds": round(seconds, 3),
+                        "results": len(results)
+                    })
                     all_results.extend(results)
+                logger.info(f"SearchAgent fan-out of {len(queries)} queries took {fan_out_seconds:.2f}s")
 
-                
                 search_results = {
                     "research_question": search_params.get("research_question", ""),
                     "search_params": search_params,
-                    "results": all_results,
+                    # Large result sets travel as a claim check: digest in the message, payload in the blob store
+                    "results": await check_in(all_results),
+                    "timings": {
+                        "queries": query_timings,
+                        "fan_out_seconds": round(fan_out_seconds, 3)
+                    },
                     "timestamp": datetime.now().isoformat()
                 }
                 
@@ -70,6 +83,34 @@ class SearchAgent(Agent):
                 
             except Exception as e:
                 logger.error(f"Error in SearchAgent: {str(e)}")
+                await report_failure(self, "search", e)
+        
+        async def run_query(self, arxiv_service, query_info):
+            """Run a single arXiv query and tag its results with the originating query"""
+            query = query_info["query"]
+            logger.info(f"Searching arXiv for: {query}")
+            started = time.perf_counter()
+            try:
+                if CONFIG["max_results"] > CONFIG["arxiv_page_size"]:
+                    # Large candidate sets are streamed page by page
+                    results = [
+                        paper async for paper in arxiv_service.search_paginated(
+                            query, CONFIG["max_results"], timeout=CONFIG["arxiv_query_timeout"]
+                        )
+                    ]
+                else:
+                    results = await arxiv_service.search(query, CONFIG["max_results"], timeout=CONFIG["arxiv_query_timeout"])
+            except Exception as e:
+                logger.error(f"arXiv search failed for query {query}: {str(e)}")
+                results = []
+            seconds = time.perf_counter() - started
+            logger.info(f"Found {len(results)} papers for query: {query} in {seconds:.2f}s")
+            
+            for result in results:
+                result["query"] = query
+                result["query_explanation"] = query_info.get("explanation", "")
+            
+            return query_info, results, seconds
         
         async def on_end(self):
             logger.info("SearchBehaviour has ended. Stopping the agent.")
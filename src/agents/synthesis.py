@@ -10,6 +10,23 @@ from utils.logger import logger
 from config import CONFIG
 from models import MessageType
 from services.gemini import GeminiLLMService
+from services.http_client import PooledHTTPMixin
+from agents.launcher import notify_launcher, report_failure
+
+
+SYNTHESIS_KEYS = ("common_themes", "research_gaps", "suggested_future_work")
+
+
+SYNTHESIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "common_themes": {"type": "STRING"},
+        "research_gaps": {"type": "STRING"},
+        "suggested_future_work": {"type": "STRING"}
+    },
+    "required": list(SYNTHESIS_KEYS),
+    "propertyOrdering": list(SYNTHESIS_KEYS)
+}
 
 
 async def synthesize_analysis(analysis_content: dict, research_question: str) -> dict:
@@ -39,37 +56,20 @@ async def synthesize_analysis(analysis_content: dict, research_question: str) ->
         "temperature": 0.4,
         "maxOutputTokens": 2048,
         "topP": 0.9,
-        "topK": 40,
-        "responseMimeType": "application/json",
-        "responseSchema": {
-            "type": "OBJECT",
-            "properties": {
-                "common_themes": {"type": "STRING"},
-                "research_gaps": {"type": "STRING"},
-                "suggested_future_work": {"type": "STRING"}
-            },
-            "propertyOrdering": ["common_themes", "research_gaps", "suggested_future_work"]
-        }
+        "topK": 40
     }
     try:
-        response = await gemini.generate_content(prompt, generation_config)
-        try:
-            result = json.loads(response)
-            return {
-                "common_themes": result.get("common_themes", ""),
-                "research_gaps": result.get("research_gaps", ""),
-                "suggested_future_work": result.get("suggested_future_work", "")
-            }
-        except Exception as e:
-            logger.warning(f"Failed to parse Gemini response for synthesis as JSON: {e}")
-            logger.debug(f"Gemini raw response for synthesis: {response}")
+        result = await gemini.generate_structured(prompt, SYNTHESIS_SCHEMA, "synthesis", generation_config)
+        if result is None:
+            logger.warning("Gemini returned no valid synthesis JSON")
             return {"common_themes": "", "research_gaps": "", "suggested_future_work": "Failed to parse LLM response."}
+        return {key: result.get(key, "") for key in SYNTHESIS_KEYS}
     except Exception as e:
         logger.error(f"Error calling Gemini for synthesis: {e}")
         return {"common_themes": "", "research_gaps": "", "suggested_future_work": "Error during LLM call."}
 
 
-class SynthesisAgent(Agent):
+class SynthesisAgent(PooledHTTPMixin, Agent):
     """
     Receives analysis results path from AnalysisAgent, reads the analysis,
     synthesizes it using Gemini, and saves the final report.
@@ -78,9 +78,10 @@ class SynthesisAgent(Agent):
     class SynthesizeReportBehaviour(OneShotBehaviour):
         async def run(self):
             logger.info(f"{self.agent.jid}: Waiting for analysis results...")
-            msg = await self.receive(timeout=CONFIG["timeout"] * 2)
+            msg = await self.receive(timeout=CONFIG["pipeline_timeout"])
             if not msg:
                 logger.warning(f"{self.agent.jid}: Timeout - no message received from AnalysisAgent")
+                await report_failure(self, "synthesis", "no analysis results received")
                 return
 
             logger.info(f"{self.agent.jid}: Received message from AnalysisAgent")
@@ -95,6 +96,7 @@ class SynthesisAgent(Agent):
 
                 if not analysis_results_path.exists():
                     logger.error(f"{self.agent.jid}: Analysis results file not found at {analysis_results_path}")
+                    await report_failure(self, "synthesis", f"analysis results not found at {analysis_results_path}")
                     return
 
                 with open(analysis_results_path, "r", encoding="utf-8") as f:
@@ -115,9 +117,14 @@ class SynthesisAgent(Agent):
                 logger.info(f"{self.agent.jid}: Saved final report to {final_report_path}")
                 
                 logger.info(f"{self.agent.jid}: Literature review process completed. Final report at {final_report_path}")
+                await notify_launcher(
+                    self, MessageType.PIPELINE_COMPLETE,
+                    stage="synthesis", folder_path=folder_path_str, report_path=str(final_report_path)
+                )
 
             except Exception as e:
                 logger.error(f"{self.agent.jid}: Error in SynthesizeReportBehaviour: {str(e)}")
+                await report_failure(self, "synthesis", e)
 
         async def on_end(self):
             logger.info(f"{self.agent.jid}: SynthesizeReportBehaviour has ended. Stopping the agent.")
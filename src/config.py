@@ -6,7 +6,77 @@ load_dotenv()
 CONFIG = {
     "gemini_api_key": os.getenv("GEMINI_API_KEY"),
     "jina_api_key": os.getenv("JINA_API_KEY"),
+    # External service endpoints (overridable, e.g. to point at the benchmark stand-ins)
+    "arxiv_api_url": os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query"),
+    "gemini_api_url": os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta"),
+    "jina_reader_url": os.getenv("JINA_READER_URL", "https://r.jina.ai"),
     "timeout": 60,
     "max_results": 20,
-    "relevance_threshold": 0.7
+    "relevance_threshold": 0.7,
+    # Shared HTTP connection pools
+    "http_pool_size": 100,
+    "http_pool_per_host": 10,
+    "http_dns_cache_ttl": 300,
+    "http_keepalive_timeout": 60,
+    # LLM response cache
+    "llm_cache_enabled": True,
+    "llm_cache_path": os.path.join("cache", "llm_responses.sqlite3"),
+    "llm_cache_memory_entries": 512,
+    "llm_cache_disk_entries": 20000,
+    "llm_cache_ttl": 7 * 24 * 3600,
+    # arXiv politeness: minimum spacing between requests and per-query timeout
+    "arxiv_request_interval": 3.0,
+    "arxiv_query_timeout": 30,
+    # Paginated arXiv search for large candidate sets
+    "arxiv_page_size": 100,
+    "arxiv_max_concurrent_pages": 3,
+    # Estimated title similarity above which two results are treated as the same paper
+    "dedup_title_similarity": 0.85,
+    # Batched relevance scoring
+    "relevance_batch_tokens": 6000,
+    "relevance_batch_size": 25,
+    "relevance_max_concurrency": 4,
+    # Lexical pre-ranking: drop papers scoring below this fraction of the best BM25 score
+    "prerank_cutoff": 0.2,
+    "prerank_min_keep": 20,
+    # Paper content fetching
+    "fetch_per_host_concurrency": 4,
+    "fetch_probe_timeout": 10,
+    "fetch_jina_timeout": 30,
+    # Local HTML -> Markdown conversion (Jina is used as fallback)
+    "local_html_conversion": True,
+    "local_conversion_min_chars": 1000,
+    "conversion_workers": 2,
+    # Shared paper store used by every knowledge base
+    "paper_store_path": "paper_store",
+    "paper_store_max_bytes": 2 * 1024 ** 3,
+    # Per-paper analysis worker pool
+    "analysis_concurrency": 4,
+    "analysis_paper_timeout": 120,
+    # Map-reduce analysis of full papers: "chunked" or "truncated" (first 5000 characters)
+    "analysis_mode": "chunked",
+    "analysis_chunk_tokens": 4000,
+    "analysis_token_budget": 24000,
+    "analysis_chunk_concurrency": 8,
+    # Hierarchical synthesis: token budget per synthesis call and concurrent calls per level
+    "synthesis_group_tokens": 12000,
+    "synthesis_concurrency": 4,
+    # Pipeline lifecycle: upper bound on one run and time given to in-flight behaviours at shutdown
+    "pipeline_timeout": 3600,
+    "shutdown_grace": 10,
+    # Multi-request workers: concurrent requests per stage and queued requests before senders are held
+    "analysis_workers": 2,
+    "analysis_queue_size": 8,
+    "synthesis_workers": 2,
+    "synthesis_queue_size": 8,
+    # BDI belief retention: idle time before a run's beliefs are retracted, runs kept per agent, sweep interval
+    "belief_ttl": 1800,
+    "belief_max_runs": 50,
+    "belief_gc_interval": 30,
+    # Claim checks: message payloads of at least this size go through the local blob store
+    "claim_check_min_bytes": 16 * 1024,
+    "blob_store_path": os.path.join("cache", "message_blobs.sqlite3"),
+    "blob_store_ttl": 24 * 3600,
+    # Agent transport: "xmpp" logs every agent in to the XMPP server, "local" runs a single-process mesh without one
+    "transport": os.getenv("AGENT_TRANSPORT", "xmpp")
 }
\ No newline at end of file
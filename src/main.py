@@ -1,13 +1,11 @@
 import asyncio
-import json
-
-from spade.agent import Agent
-from spade.behaviour import OneShotBehaviour
-from spade.message import Message
 
 from agents import SearchAgent, QueryConstructionAgent, RelevantAgent, KnowledgeAggregatorAgent, AnalysisAgent, SynthesisAgent
+from agents import LauncherAgent, shutdown_agents
+from services.http_client import http_clients
+from services.llm_cache import llm_cache
+from utils.html_markdown import shutdown_conversion_pool
 from utils.logger import logger
-from models import MessageType
 
 async def main():
     query_construction = QueryConstructionAgent("query_construction_agent@localhost", "password")
@@ -29,34 +27,22 @@ async def main():
     
     human_query = "What are the latest advances in quantum machine learning for drug discovery?"
     
-    class TempAgent(Agent):
-        class SendQuery(OneShotBehaviour):
-            async def run(self):
-                query_msg = Message(
-                    to="query_construction_agent@localhost",
-                    body=json.dumps({"research_question": human_query}),
-                    metadata={"type": MessageType.RESEARCH_QUERY}
-                )
-                await self.send(query_msg)
-                logger.info("Sent research query to QueryConstructionAgent")
-                
-        async def setup(self):
-            self.add_behaviour(self.SendQuery())
-    
-    temp_agent = TempAgent("user@localhost", "password")
-    await temp_agent.start()
+    launcher = LauncherAgent("user@localhost", "password", human_query)
+    await launcher.start()
     
-    await asyncio.sleep(300)  # 5 minutes
+    # Run until SynthesisAgent reports the final report or a stage reports a failure
+    outcome = await launcher.wait_for_completion()
+    logger.info(f"Pipeline finished: {outcome}")
     
     # Stop all agents
-    await query_construction.stop()
-    await search_agent.stop()
-    await relevant_agent.stop()
-    await knowledge_aggregator.stop()
-    await analysis_agent.stop()
-    await synthesis_agent.stop()
-    await temp_agent.stop()
-    
+    await shutdown_agents([
+        query_construction, search_agent, relevant_agent, knowledge_aggregator,
+        analysis_agent, synthesis_agent, launcher
+    ])
+    
+    logger.info(f"HTTP client pool stats: {http_clients.get_stats()}")
+    logger.info(f"LLM cache stats: {llm_cache.get_stats()}")
+    shutdown_conversion_pool()
     logger.info("MAS stopped.")
 
 if __name__ == "__main__":
@@ -8,4 +8,6 @@ class MessageType:
     REFINED_QUERY = "refined_query"    # From Relevant Agent to Query Construction
     KNOWLEDGE_READY = "knowledge_ready"  # From Knowledge Aggregator to Analysis Agent
     ANALYSIS_READY = "analysis_ready"  # From Analysis Agent to Synthesis Agent
+    PIPELINE_COMPLETE = "pipeline_complete"  # From the final stage to the launcher
+    PIPELINE_FAILED = "pipeline_failed"  # From any agent whose stage failed to the launcher
     ERROR = "error"
\ No newline at end of file
@@ -1,94 +1,219 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Awaitable
+import asyncio
+import threading
+import time
 import xml.etree.ElementTree as ET
 
 import aiohttp
 
+from services.http_client import http_clients
 from utils.logger import logger
+from config import CONFIG
+
+
+class ArxivRateLimiter:
+    """
+    Process-wide request spacing for the arXiv API.
+    Every caller reserves the next free slot, so concurrent searches from any
+    SearchAgent start at least `interval` seconds apart while their responses
+    are still awaited in parallel.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def wait(self):
+        """Sleep until this caller's reserved slot comes up"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+arxiv_rate_limiter = ArxivRateLimiter(CONFIG["arxiv_request_interval"])
+
 
 class ArxivService:
     """Service to search and retrieve papers from arXiv"""
     
+    ns = {'atom': 'http://www.w3.org/2005/Atom'}  # Define the namespace
+    entry_tag = "{http://www.w3.org/2005/Atom}entry"
+    total_results_tag = "{http://a9.com/-/spec/opensearch/1.1/}totalResults"
+    
     def __init__(self):
-        self.base_url = "http://export.arxiv.org/api/query"
+        self.base_url = CONFIG["arxiv_api_url"]
     
-    async def search(self, query: str, max_results: int = 20) -> List[Dict[str, Any]]:
-        """Search for papers on arXiv"""
+    async def search(self, query: str, max_results: int = 20, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Search for papers on arXiv.
+        The request waits for its politeness slot first; `timeout` only bounds the
+        request itself and an expired query returns no results instead of raising.
+        """
+        await arxiv_rate_limiter.wait()
+        results = []
+        
+        async def collect(paper):
+            results.append(paper)
+        
+        try:
+            await asyncio.wait_for(self._stream_page(query, 0, max_results, collect), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"arXiv query timed out after {timeout}s: {query}")
+        return results
+    
+    async def search_paginated(self, query: str, total_results: int, page_size: Optional[int] = None,
+                               timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search arXiv for up to `total_results` papers, yielding each paper as soon as it is parsed.
+        Pages are requested concurrently (bounded by `arxiv_max_concurrent_pages` and spaced by the
+        shared rate limiter) and streamed through an incremental parser, so memory stays flat and
+        consumers can start before the last page arrives. `timeout` bounds each stalled read.
+        """
+        page_size = page_size or CONFIG["arxiv_page_size"]
+        semaphore = asyncio.Semaphore(CONFIG["arxiv_max_concurrent_pages"])
+        queue: asyncio.Queue = asyncio.Queue(maxsize=page_size)
+        done = object()
+        available = {"total": total_results}
+        
+        def on_total(total):
+            available["total"] = min(available["total"], total)
+        
+        async def fetch_page(start):
+            async with semaphore:
+                # Skip pages beyond the number of results arXiv reported
+                if start >= available["total"]:
+                    return
+                await arxiv_rate_limiter.wait()
+                try:
+                    count = await self._stream_page(
+                        query, start, min(page_size, total_results - start), queue.put, on_total, timeout
+                    )
+                    logger.info(f"arXiv page at offset {start} yielded {count} papers for query: {query}")
+                except asyncio.TimeoutError:
+                    logger.warning(f"arXiv page at offset {start} timed out for query: {query}")
+                except Exception as e:
+                    logger.error(f"Error fetching arXiv page at offset {start}: {str(e)}")
+        
+        async def produce():
+            await asyncio.gather(*(fetch_page(start) for start in range(0, total_results, page_size)))
+            await queue.put(done)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                paper = await queue.get()
+                if paper is done:
+                    break
+                yield paper
+        finally:
+            producer.cancel()
+    
+    async def _stream_page(self, query: str, start: int, max_results: int,
+                           on_paper: Callable[[Dict[str, Any]], Awaitable[None]],
+                           on_total: Optional[Callable[[int], None]] = None,
+                           read_timeout: Optional[float] = None) -> int:
+        """Fetch one page of results and hand every entry to `on_paper` while the body is still arriving"""
         params = {
             "search_query": query,
-            "start": 0,
+            "start": start,
             "max_results": max_results,
             "sortBy": "relevance",
             "sortOrder": "descending"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.base_url, params=params) as response:
-                if response.status == 200:
-                    # arXiv API returns XML, we need to parse it
-                    xml_response = await response.text()
-                    return self._parse_arxiv_response(xml_response)
-                else:
-                    logger.error(f"arXiv API error: {await response.text()}")
-                    return []
+        session = http_clients.get_session("arxiv")
+        async with session.get(
+            self.base_url,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=read_timeout or CONFIG["timeout"])
+        ) as response:
+            if response.status != 200:
+                logger.error(f"arXiv API error: {await response.text()}")
+                return 0
+            
+            # arXiv API returns Atom XML; parse it incrementally as chunks arrive
+            parser = ET.XMLPullParser(events=("start", "end"))
+            root = None
+            count = 0
+            try:
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    parser.feed(chunk)
+                    for event, elem in parser.read_events():
+                        if event == "start":
+                            if root is None:
+                                root = elem
+                        elif elem.tag == self.entry_tag:
+                            await on_paper(self._parse_entry(elem))
+                            count += 1
+                            # Drop the finished entry so the tree never holds the whole feed
+                            root.remove(elem)
+                        elif elem.tag == self.total_results_tag and on_total and elem.text:
+                            on_total(int(elem.text))
+                parser.close()
+            except ET.ParseError as e:
+                logger.error(f"Error parsing arXiv response: {str(e)}")
+            return count
     
     def _parse_arxiv_response(self, xml_response: str) -> List[Dict[str, Any]]:
         try:
             root = ET.fromstring(xml_response)
-            ns = {'atom': 'http://www.w3.org/2005/Atom'}  # Define the namespace
-
-            results = []
-            for entry in root.findall('atom:entry', ns):
-                title_elem = entry.find('atom:title', ns)
-                title = title_elem.text.strip() if title_elem is not None else "Unknown Title"
-                
-                summary_elem = entry.find('atom:summary', ns)
-                summary = summary_elem.text.strip() if summary_elem is not None else ""
-                
-                # Extract author information
-                authors = []
-                for author_elem in entry.findall('atom:author', ns):
-                    name_elem = author_elem.find('atom:name', ns)
-                    if name_elem is not None:
-                        authors.append(name_elem.text.strip())
-                
-                # Extract published date
-                published_elem = entry.find('atom:published', ns)
-                published = published_elem.text.strip() if published_elem is not None else ""
-                
-                # Extract links
-                pdf_link = ""
-                page_link = ""
-                for link in entry.findall('atom:link', ns):
-                    href = link.get('href')
-                    rel = link.get('rel')
-                    title_attr = link.get('title')
-                    
-                    if rel == "alternate":
-                        page_link = href
-                    elif title_attr == "pdf":
-                        pdf_link = href
-                
-                # Extract categories/tags
-                categories = [cat.get('term') for cat in entry.findall('atom:category', ns)]
-                
-                # Extract paper ID
-                id_elem = entry.find('atom:id', ns)
-                arxiv_id = id_elem.text.split("/")[-1] if id_elem is not None else ""
-                
-                paper = {
-                    "id": arxiv_id,
-                    "title": title,
-                    "summary": summary,
-                    "authors": authors,
-                    "published": published,
-                    "pdf_url": pdf_link,
-                    "page_url": page_link,
-                    "categories": categories
-                }
-                
-                results.append(paper)
-            
-            return results
+            return [self._parse_entry(entry) for entry in root.findall('atom:entry', self.ns)]
         except Exception as e:
             logger.error(f"Error parsing arXiv response: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+    
+    def _parse_entry(self, entry: ET.Element) -> Dict[str, Any]:
+        """Convert one Atom <entry> element into a paper record"""
+        ns = self.ns
+        title_elem = entry.find('atom:title', ns)
+        title = title_elem.text.strip() if title_elem is not None else "Unknown Title"
+        
+        summary_elem = entry.find('atom:summary', ns)
+        summary = summary_elem.text.strip() if summary_elem is not None else ""
+        
+        # Extract author information
+        authors = []
+        for author_elem in entry.findall('atom:author', ns):
+            name_elem = author_elem.find('atom:name', ns)
+            if name_elem is not None:
+                authors.append(name_elem.text.strip())
+        
+        # Extract published date
+        published_elem = entry.find('atom:published', ns)
+        published = published_elem.text.strip() if published_elem is not None else ""
+        
+        # Extract links
+        pdf_link = ""
+        page_link = ""
+        for link in entry.findall('atom:link', ns):
+            href = link.get('href')
+            rel = link.get('rel')
+            title_attr = link.get('title')
+            
+            if rel == "alternate":
+                page_link = href
+            elif title_attr == "pdf":
+                pdf_link = href
+        
+        # Extract categories/tags
+        categories = [cat.get('term') for cat in entry.findall('atom:category', ns)]
+        
+        # Extract paper ID
+        id_elem = entry.find('atom:id', ns)
+        arxiv_id = id_elem.text.split("/")[-1] if id_elem is not None else ""
+        
+        return {
+            "id": arxiv_id,
+            "title": title,
+            "summary": summary,
+            "authors": authors,
+            "published": published,
+            "pdf_url": pdf_link,
+            "page_url": page_link,
+            "categories": categories
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.logger import logger
+from config import CONFIG
+
+CLAIM_KEY = "claim_check"
+
+
+class BlobStore:
+    """
+    Content-addressed SQLite store for large inter-agent payloads (claim checks).
+    The sender stores the serialized payload and sends only its sha256 digest; the
+    receiver loads it when it needs it and checks the digest. Identical payloads are
+    stored once, and entries older than the TTL are pruned as new ones arrive.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        self.path = path or CONFIG["blob_store_path"]
+        self.ttl = ttl if ttl is not None else CONFIG["blob_store_ttl"]
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {"puts": 0, "gets": 0, "misses": 0, "corrupt": 0, "pruned": 0, "bytes_stored": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "digest TEXT PRIMARY KEY, data BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_created ON blobs(created)")
+            self._conn.commit()
+        return self._conn
+
+    def put(self, data: bytes) -> str:
+        """Store a blob and return its sha256 digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, data, created) VALUES (?, ?, ?)",
+                (digest, data, time.time()),
+            )
+            self.stats["puts"] += 1
+            self.stats["bytes_stored"] += len(data)
+            if self.ttl and self.stats["puts"] % self.PRUNE_EVERY == 0:
+                cursor = conn.execute("DELETE FROM blobs WHERE created < ?", (time.time() - self.ttl,))
+                self.stats["pruned"] += cursor.rowcount
+            conn.commit()
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Load a blob; None if it is missing or does not match its digest"""
+        with self._lock:
+            row = self._connect().execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            data = bytes(row[0])
+            if hashlib.sha256(data).hexdigest() != digest:
+                self.stats["corrupt"] += 1
+                logger.warning(f"Blob {digest} does not match its digest")
+                return None
+            self.stats["gets"] += 1
+            return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+blob_store = BlobStore()
+
+
+async def check_in(payload: Any, min_bytes: Optional[int] = None) -> Any:
+    """
+    Claim-check a JSON-serializable payload for a message body: payloads of at least
+    `min_bytes` serialized bytes are replaced by {"claim_check": {sha256, size, count}}.
+    Serializing and storing run in a worker thread, off the event loop.
+    """
+    return await asyncio.to_thread(_check_in, payload, min_bytes)
+
+
+def _check_in(payload: Any, min_bytes: Optional[int]) -> Any:
+    min_bytes = CONFIG["claim_check_min_bytes"] if min_bytes is None else min_bytes
+    data = json.dumps(payload).encode("utf-8")
+    if len(data) < min_bytes:
+        return payload
+    return {
+        CLAIM_KEY: {
+            "sha256": blob_store.put(data),
+            "size": len(data),
+            "count": len(payload) if hasattr(payload, "__len__") else 1,
+        }
+    }
+
+
+def is_claim(value: Any) -> bool:
+    return isinstance(value, dict) and CLAIM_KEY in value
+
+
+def claim_count(value: Any) -> int:
+    """Number of items in a payload, without loading a claim-checked one"""
+    if is_claim(value):
+        return value[CLAIM_KEY]["count"]
+    return len(value) if hasattr(value, "__len__") else 1
+
+
+async def check_out(value: Any) -> Any:
+    """Payload behind a claim check; values sent inline are returned as they are"""
+    if not is_claim(value):
+        return value
+    return await asyncio.to_thread(_check_out, value)
+
+
+def _check_out(value: Any) -> Any:
+    digest = value[CLAIM_KEY]["sha256"]
+    data = blob_store.get(digest)
+    if data is None:
+        raise LookupError(f"claim-checked payload {digest} is not available")
+    return json.loads(data)
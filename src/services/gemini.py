@@ -1,57 +1,110 @@
-import aiohttp
+from typing import Any, Optional
 
+from services.http_client import http_clients
+from services.llm_cache import LLMResponseCache, llm_cache
+from services.structured import parse_structured, repair_prompt, structured_stats
 from utils.logger import logger
+from config import CONFIG
 
 class GeminiLLMService:
     """Service to interact with Google Gemini API"""
-    
-    def __init__(self, api_key):
+
+    def __init__(self, api_key, cache: Optional[LLMResponseCache] = None):
         self.api_key = api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-        
-    async def generate_content(self, prompt: str, generation_config: dict = None) -> str:
-        """Generate content using Gemini Pro model"""
+        self.model = "gemini-2.0-flash"
+        self.base_url = f"{CONFIG['gemini_api_url']}/models/{self.model}:generateContent"
+        self.cache = cache or llm_cache
+
+    async def generate_content(self, prompt: str, generation_config: dict = None,
+                               bypass_cache: bool = False, refresh_cache: bool = False) -> str:
+        """
+        Generate content using Gemini Pro model.
+        Responses are served from the LLM cache when possible; `bypass_cache` skips the
+        cache entirely and `refresh_cache` forces a new call whose result replaces the entry.
+        """
         params = {
             "key": self.api_key
         }
-        
-        if generation_config:
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": generation_config
-            }
-        else:
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 1000,
-                    "topP": 0.95,
-                    "topK": 40
-                }
+
+        if not generation_config:
+            generation_config = {
+                "temperature": 0.7,
+                "maxOutputTokens": 1000,
+                "topP": 0.95,
+                "topK": 40
             }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.base_url,
-                params=params,
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    # Extract text from response
-                    content = result.get("candidates", [{}])[0].get("content", {})
-                    parts = content.get("parts", [{}])
-                    return parts[0].get("text", "No response generated")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Gemini API error: {error_text}")
-                    return f"Error: {response.status} - {error_text}"
\ No newline at end of file
+
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": generation_config
+        }
+
+        use_cache = CONFIG["llm_cache_enabled"] and not bypass_cache
+        cache_key = self.cache.make_key(self.model, prompt, generation_config) if use_cache else None
+        if use_cache and not refresh_cache:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Serving Gemini response from cache")
+                return cached
+
+        session = http_clients.get_session("gemini")
+        async with session.post(
+            self.base_url,
+            params=params,
+            json=payload
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                # Extract text from response
+                content = result.get("candidates", [{}])[0].get("content", {})
+                parts = content.get("parts", [{}])
+                text = parts[0].get("text")
+                if text is None:
+                    return "No response generated"
+                if use_cache:
+                    await self.cache.put(cache_key, text)
+                return text
+            else:
+                error_text = await response.text()
+                logger.error(f"Gemini API error: {error_text}")
+                return f"Error: {response.status} - {error_text}"
+
+    async def generate_structured(self, prompt: str, schema: dict, name: str,
+                                  generation_config: dict = None, repair: bool = True) -> Optional[Any]:
+        """
+        Generate a JSON object constrained by `schema` (a Gemini response schema).
+        The response is validated against the schema; on a validation failure one
+        cheap repair call asks the model to fix its own output. Returns None when no
+        valid object could be produced. Outcomes are counted per call site `name`.
+        """
+        config = dict(generation_config or {"temperature": 0.7, "maxOutputTokens": 1000, "topP": 0.95, "topK": 40})
+        config["responseMimeType"] = "application/json"
+        config["responseSchema"] = schema
+
+        response = await self.generate_content(prompt, config)
+        if response.startswith("Error:") or response == "No response generated":
+            structured_stats.record(name, "error")
+            return None
+
+        value, errors = parse_structured(response, schema)
+        if not errors:
+            structured_stats.record(name, "valid")
+            return value
+
+        logger.warning(f"Structured output for {name} failed validation: {errors[:3]}")
+        if repair:
+            repair_config = {**config, "temperature": 0.0}
+            repaired = await self.generate_content(repair_prompt(response, schema, errors), repair_config)
+            value, repair_errors = parse_structured(repaired, schema)
+            if not repair_errors:
+                logger.info(f"Repaired structured output for {name}")
+                structured_stats.record(name, "repaired")
+                return value
+            logger.warning(f"Repair of structured output for {name} failed: {repair_errors[:3]}")
+
+        structured_stats.record(name, "failed")
+        return None
@@ -0,0 +1,98 @@
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+from utils.logger import logger
+from config import CONFIG
+
+
+class HTTPClientRegistry:
+    """
+    Process-wide registry of long-lived aiohttp sessions.
+    One keep-alive connection pool is kept per named client (e.g. "gemini", "arxiv")
+    so repeated calls reuse TCP/TLS connections instead of reconnecting every time.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._owners = 0
+        self.stats = {"hits": 0, "misses": 0, "closed": 0}
+
+    def get_session(self, name: str, timeout: Optional[float] = None) -> aiohttp.ClientSession:
+        """Return the pooled session for `name`, creating it on first use"""
+        session = self._sessions.get(name)
+        if session is not None and not session.closed:
+            self.stats["hits"] += 1
+            return session
+
+        self.stats["misses"] += 1
+        connector = aiohttp.TCPConnector(
+            limit=CONFIG["http_pool_size"],
+            limit_per_host=CONFIG["http_pool_per_host"],
+            ttl_dns_cache=CONFIG["http_dns_cache_ttl"],
+            keepalive_timeout=CONFIG["http_keepalive_timeout"],
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=timeout or CONFIG["timeout"]),
+        )
+        self._sessions[name] = session
+        logger.info(f"Opened pooled HTTP client '{name}'")
+        return session
+
+    def acquire(self):
+        """Register an owner (usually an agent) of the shared pools"""
+        self._owners += 1
+
+    async def release(self):
+        """Drop an owner; the pools are closed once the last owner is gone"""
+        self._owners = max(self._owners - 1, 0)
+        if self._owners == 0:
+            await self.close()
+
+    async def close(self):
+        """Close every pooled session"""
+        sessions, self._sessions = self._sessions, {}
+        for name, session in sessions.items():
+            if not session.closed:
+                await session.close()
+                self.stats["closed"] += 1
+                logger.info(f"Closed pooled HTTP client '{name}'")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool hit/miss counters plus the live connection count per client"""
+        requests_total = self.stats["hits"] + self.stats["misses"]
+        clients = {}
+        for name, session in self._sessions.items():
+            connector = session.connector
+            clients[name] = {
+                "closed": session.closed,
+                "limit": connector.limit if connector else 0,
+                "limit_per_host": connector.limit_per_host if connector else 0,
+                "open_connections": sum(len(c) for c in connector._conns.values()) if connector else 0,
+            }
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / requests_total if requests_total else 0.0,
+            "clients": clients,
+        }
+
+
+http_clients = HTTPClientRegistry()
+
+
+class PooledHTTPMixin:
+    """
+    Agent mixin that holds a share of the pooled HTTP clients while the agent runs.
+    The pools are closed when the last agent using them stops.
+    """
+
+    async def start(self, *args, **kwargs):
+        await super().start(*args, **kwargs)
+        http_clients.acquire()
+
+    async def stop(self):
+        was_alive = self.is_alive()
+        await super().stop()
+        if was_alive:
+            await http_clients.release()
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from utils.logger import logger
+from config import CONFIG
+
+
+class LLMResponseCache:
+    """
+    Two-tier, content-addressed cache for LLM responses.
+    Entries are keyed on (model, prompt, generation_config); an in-memory LRU sits
+    in front of a SQLite table that survives restarts. Both tiers honour a TTL and
+    evict least recently used entries once their size cap is reached. SQLite is only
+    touched from worker threads, so a miss or a store never blocks the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: Optional[int] = None,
+                 disk_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.path = path or CONFIG["llm_cache_path"]
+        self.memory_entries = memory_entries or CONFIG["llm_cache_memory_entries"]
+        self.disk_entries = disk_entries or CONFIG["llm_cache_disk_entries"]
+        self.ttl = ttl if ttl is not None else CONFIG["llm_cache_ttl"]
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: Optional[dict]) -> str:
+        """Stable digest of everything that determines the response"""
+        material = json.dumps(
+            {"model": model, "prompt": prompt, "generation_config": generation_config or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look the key up in memory first, then on disk in a worker thread"""
+        with self._lock:
+            response = self._memory_get(key)
+        if response is not None:
+            return response
+        return await asyncio.to_thread(self._disk_get, key)
+
+    async def put(self, key: str, response: str):
+        """Store a response in both tiers; the SQLite write runs in a worker thread"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+        await asyncio.to_thread(self._disk_put, key, response, now)
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        response, created = entry
+        if self._expired(created):
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        self.stats["memory_hits"] += 1
+        return response
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        """SQLite lookup; a live entry is promoted to the memory tier"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response, created = row
+                    if not self._expired(created):
+                        conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+                        conn.commit()
+                        self._remember(key, response, created)
+                        self.stats["disk_hits"] += 1
+                        return response
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache lookup failed: {e}")
+
+            self.stats["misses"] += 1
+            return None
+
+    def _disk_put(self, key: str, response: str, created: float):
+        """SQLite write, evicting the least recently used entries past the size cap"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, response, created, created),
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+                if count > self.disk_entries:
+                    overflow = count - self.disk_entries
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.stats["evictions"] += overflow
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache store failed: {e}")
+            self.stats["stores"] += 1
+
+    def _remember(self, key: str, response: str, created: float):
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached response from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the overall hit rate"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "memory_size": len(self._memory),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+llm_cache = LLMResponseCache()
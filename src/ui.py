@@ -3,17 +3,15 @@ import json
 import os
 import asyncio
 import glob
-from spade.agent import Agent
-from spade.behaviour import OneShotBehaviour
-from spade.message import Message
-import time
 from agents import (
     QueryConstructionAgent,
     SearchAgent,
     RelevantAgent,
-    KnowledgeAggregatorAgent
+    KnowledgeAggregatorAgent,
+    LauncherAgent,
+    shutdown_agents
 )
-from models import MessageType
+from utils.html_markdown import shutdown_conversion_pool
 
 
 st.set_page_config(page_title="Research Assistant MAS", layout="wide")
@@ -52,30 +50,16 @@ async def run_mas(research_question):
     await knowledge_aggregator.start()
     
     
-    class TempAgent(Agent):
-        class SendQuery(OneShotBehaviour):
-            async def run(self):
-                query_msg = Message(
-                    to="query_construction_agent@localhost",
-                    body=json.dumps({"research_question": research_question}),
-                    metadata={"type": MessageType.RESEARCH_QUERY}
-                )
-                await self.send(query_msg)
-                
-        async def setup(self):
-            self.add_behaviour(self.SendQuery())
+    # This UI runs the pipeline up to the knowledge base, so that stage's completion ends the run
+    launcher = LauncherAgent("user@localhost", "password", research_question, final_stage="knowledge")
+    await launcher.start()
     
-    temp_agent = TempAgent("user@localhost", "password")
-    await temp_agent.start()
-    
-    await asyncio.sleep(30)  
+    outcome = await launcher.wait_for_completion()
     
     # Stop all agents
-    await query_construction.stop()
-    await search_agent.stop()
-    await relevant_agent.stop()
-    await knowledge_aggregator.stop()
-    await temp_agent.stop()
+    await shutdown_agents([query_construction, search_agent, relevant_agent, knowledge_aggregator, launcher])
+    shutdown_conversion_pool()
+    return outcome
 
 
 with st.form("research_form"):
@@ -92,8 +76,11 @@ if submit_button:
         st.error("Please enter a research question")
     else:
         with st.spinner("Multi-Agent System is processing your research question... This may take a few minutes."):
-            asyncio.run(run_mas(research_question))
-        st.success("Research complete!")
+            outcome = asyncio.run(run_mas(research_question))
+        if outcome.get("status") == "completed":
+            st.success("Research complete!")
+        else:
+            st.error(f"Research did not complete ({outcome.get('status')}): {outcome.get('error', '')}")
 
         st.subheader("Research Results")
 
@@ -0,0 +1,78 @@
+import re
+from typing import List, Tuple
+
+from utils.tokens import estimate_tokens
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$", re.MULTILINE)
+_SKIPPED_SECTIONS = re.compile(r"\b(references|bibliography|acknowledg(e)?ments?)\b", re.IGNORECASE)
+_PRIORITY_SECTIONS = re.compile(
+    r"\b(abstract|method|approach|model|experiment|evaluation|result|finding|"
+    r"discussion|conclusion|limitation|future)", re.IGNORECASE
+)
+
+
+def split_sections(markdown: str) -> List[Tuple[str, str]]:
+    """Split markdown into (heading, text) sections; text before the first heading gets an empty heading"""
+    sections = []
+    matches = list(_HEADING.finditer(markdown))
+    if not matches or matches[0].start() > 0:
+        end = matches[0].start() if matches else len(markdown)
+        sections.append(("", markdown[:end]))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        sections.append((match.group(2).strip(), markdown[match.start():end]))
+    return [(heading, text) for heading, text in sections if text.strip()]
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Break a section that exceeds the chunk size on paragraph boundaries"""
+    pieces, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    # Paragraphs that are still too large are cut by characters
+    max_chars = max_tokens * 4
+    return [piece[i:i + max_chars] for piece in pieces for i in range(0, len(piece), max_chars)]
+
+
+def chunk_markdown(markdown: str, chunk_tokens: int, token_budget: int) -> List[str]:
+    """
+    Split a paper into section-aware chunks of at most `chunk_tokens` each.
+    Reference lists and acknowledgements are dropped. When the chunks exceed
+    `token_budget` in total, the opening chunk and chunks from methodology, results
+    and conclusion sections are kept first; the selection keeps document order.
+    """
+    chunks: List[Tuple[bool, str]] = []
+    current, current_priority = "", False
+    for heading, text in split_sections(markdown):
+        if heading and _SKIPPED_SECTIONS.search(heading):
+            continue
+        priority = bool(_PRIORITY_SECTIONS.search(heading))
+        for piece in _split_oversized(text, chunk_tokens):
+            candidate = f"{current}\n\n{piece}" if current else piece
+            if current and estimate_tokens(candidate) > chunk_tokens:
+                chunks.append((current_priority, current))
+                current, current_priority = piece, priority
+            else:
+                current, current_priority = candidate, current_priority or priority
+    if current:
+        chunks.append((current_priority, current))
+
+    if sum(estimate_tokens(text) for _, text in chunks) <= token_budget:
+        return [text for _, text in chunks]
+
+    order = sorted(range(len(chunks)), key=lambda i: (i != 0, not chunks[i][0], i))
+    selected, used = set(), 0
+    for i in order:
+        tokens = estimate_tokens(chunks[i][1])
+        if used + tokens > token_budget:
+            continue
+        selected.add(i)
+        used += tokens
+    return [chunks[i][1] for i in sorted(selected)]
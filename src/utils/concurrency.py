@@ -0,0 +1,21 @@
+import asyncio
+import weakref
+from typing import Dict, Hashable
+
+# One set of limits per event loop; a loop's semaphores are dropped with the loop
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def loop_semaphore(key: Hashable, limit: int) -> asyncio.Semaphore:
+    """
+    Process-wide semaphore named `key` for the running event loop.
+    asyncio primitives bind to the first loop that waits on them, so a module-level
+    semaphore breaks every later asyncio.run (e.g. one per UI submission) once the limit
+    is reached; keying by loop keeps the limit shared within a loop and valid across loops.
+    """
+    semaphores = _loop_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if key not in semaphores:
+        semaphores[key] = asyncio.Semaphore(limit)
+    return semaphores[key]